@@ -1 +1,2 @@
-from .form import Form
\ No newline at end of file
+from .form import Form
+from .structure import FormStructure, FormElement, FormAttribute, FormCommand, FormOption, FormEvent
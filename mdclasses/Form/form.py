@@ -1,68 +1,139 @@
 from typing import List, Optional
+from itertools import chain
 from pathlib import Path
 
-from mdclasses.Module import create_module, ModuleParser, Module
+from mdclasses.Module import create_module, ModuleParser, ModuleCache, Module
+from mdclasses.utils.manifest import DumpManifest
+from mdclasses.utils.instrumentation import phase
+from mdclasses.supportable import Supportable
+from mdclasses.Form.structure import (FormStructure, FormOption, FormAttribute, FormCommand, FormElement, FormEvent,
+                                      read_form_structure, link_handlers)
 
 
-class Form:
+# Парсер не хранит состояния разбора, поэтому один экземпляр используется всеми формами, в том числе из потоков
+_module_parser = ModuleParser()
 
-    def __init__(self, description_path: Path, structure_path: Path):
 
-        self.attributes: List[FormAttribute] = list()
-        self.elements: List[FormElement] = list()
+class Form(Supportable):
 
-        self.options: List[FormOption] = list()
-        self.commands: List[FormCommand] = list()
+    def __init__(self, description_path: Path, structure_path: Path, manifest: Optional[DumpManifest] = None,
+                 name: Optional[str] = None, module_dir: Optional[Path] = None, uuid: str = '',
+                 line_number: int = 0):
+        # В выгрузке конфигуратора uuid формы хранится в ее описании, в описании объекта - только имя
+        super(Form, self).__init__(uuid)
+        self.line_number = line_number
 
-        self.module: Optional[Module] = None
+        # Структура формы читается при первом обращении к ее составу
+        self._structure: Optional[FormStructure] = None
+
+        # Модуль формы разбирается при первом обращении к нему
+        self._module: Optional[Module] = None
+        self._module_read = False
+        self._manifest = manifest
 
         self.description_path = description_path
         self.structure_path = structure_path
 
-        self.name = description_path.stem
-
-        self._read_module()
-
+        self.name = description_path.stem if name is None else name
+        self.module_dir = module_dir
 
     @property
     def full_name(self):
         return f'form.{self.name}'
 
-    def _read_module(self):
-        ext_path = self.description_path.parent.joinpath(self.description_path.stem, 'Ext', 'Form')
-
-        if not ext_path.exists():
-            return
-
-        parser = ModuleParser()
-
-        for element in ext_path.iterdir():
-            if element.is_file() and element.suffix == '.bsl':
-                self.module = create_module(parser, element, self)
-
-    def read_structure(self):
-        pass
-
-
-class FormOption:
+    def to_dict(self) -> dict:
+        data = super(Form, self).to_dict()
+        data.update(
+            dict(
+                name=self.name,
+                line_number=self.line_number
+            )
+        )
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, description_path: Path, structure_path: Path,
+                  manifest: Optional[DumpManifest] = None, module_dir: Optional[Path] = None) -> 'Form':
+        return cls(description_path, structure_path, manifest=manifest, name=data['name'], module_dir=module_dir,
+                   uuid=data['uuid'], line_number=data['line_number'])
 
-    def __init__(self):
-        pass
+    @property
+    def module(self) -> Optional[Module]:
+        if not self._module_read:
+            self.read_module()
+        return self._module
 
+    @module.setter
+    def module(self, value: Optional[Module]):
+        self._module = value
+        self._module_read = True
 
-class FormAttribute:
+    @property
+    def module_path(self) -> Optional[Path]:
+        ext_path = self.module_dir
+        if ext_path is None:
+            ext_path = self.description_path.parent.joinpath(self.description_path.stem, 'Ext', 'Form')
+
+        if self._manifest is not None:
+            elements = self._manifest.files(ext_path, '.bsl')
+        elif ext_path.exists():
+            elements = [el for el in ext_path.iterdir() if el.is_file() and el.suffix == '.bsl']
+        else:
+            return None
+
+        return elements[-1] if elements else None
+
+    def read_module(self, parser: Optional[ModuleParser] = None,
+                    cache: Optional[ModuleCache] = None) -> Optional[Module]:
+        module_path = self.module_path
+        module = None
+        if module_path is not None:
+            module = create_module(_module_parser if parser is None else parser, module_path, self, cache=cache)
+        self.module = module
+        return module
+
+    def read_structure(self) -> FormStructure:
+        structure_path = Path(self.structure_path) if self.structure_path else None
+        if structure_path is None or not structure_path.exists():
+            self._structure = FormStructure()
+            return self._structure
+
+        with phase('read_form_structure', path=structure_path) as cur_phase:
+            self._structure = read_form_structure(structure_path)
+            cur_phase.count('elements', len(self._structure.elements))
+
+        if self.module is not None:
+            sub_programs = {sub_program.name.upper(): sub_program
+                            for sub_program in chain(self.module.functions(), self.module.procedures())}
+            link_handlers(self._structure, sub_programs)
+
+        return self._structure
 
-    def __init__(self):
-        pass
+    @property
+    def structure(self) -> FormStructure:
+        if self._structure is None:
+            self.read_structure()
+        return self._structure
 
+    @property
+    def attributes(self) -> List[FormAttribute]:
+        return self.structure.attributes
 
-class FormCommand:
+    @property
+    def elements(self) -> List[FormElement]:
+        return self.structure.elements
 
-    def __init__(self):
-        pass
+    @property
+    def options(self) -> List[FormOption]:
+        return self.structure.options
 
+    @property
+    def commands(self) -> List[FormCommand]:
+        return self.structure.commands
 
-class FormElement:
+    @property
+    def events(self) -> List[FormEvent]:
+        return self.structure.events
 
-    def __init__(self):
-        pass
\ No newline at end of file
+    def handlers(self) -> List[FormEvent]:
+        return self.structure.handlers()
\ No newline at end of file
@@ -0,0 +1,301 @@
+from typing import Dict, List, Optional, Union, TYPE_CHECKING
+from pathlib import Path
+
+from lxml.etree import QName, iterparse
+
+if TYPE_CHECKING:
+    from mdclasses.Module.Module import SubProgram
+
+
+class FormEvent:
+
+    __slots__ = ('event', 'handler', 'sub_program')
+
+    def __init__(self, event: str, handler: str):
+        self.event = event
+        self.handler = handler
+        self.sub_program: Optional['SubProgram'] = None
+
+    def __repr__(self):
+        return f'<FormEvent: {self.event} {self.handler}>'
+
+
+class FormOption:
+
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name: str, value: Optional[str]):
+        self.name = name
+        self.value = value
+
+    def __repr__(self):
+        return f'<FormOption: {self.name}={self.value}>'
+
+
+class FormAttribute:
+
+    __slots__ = ('name', 'id', 'types', 'main', 'parent', 'line_number')
+
+    def __init__(self, name: str, attr_id: str, parent: Optional['FormAttribute'] = None, line_number: int = 0):
+        self.name = name
+        self.id = attr_id
+        self.types: List[str] = list()
+        self.main = False
+        self.parent = parent
+        self.line_number = line_number
+
+    @property
+    def full_name(self):
+        return self.name if self.parent is None else f'{self.parent.full_name}.{self.name}'
+
+    def __repr__(self):
+        return f'<FormAttribute: {self.full_name}>'
+
+
+class FormCommand:
+
+    __slots__ = ('name', 'id', 'events', 'line_number')
+
+    def __init__(self, name: str, command_id: str, line_number: int = 0):
+        self.name = name
+        self.id = command_id
+        self.events: List[FormEvent] = list()
+        self.line_number = line_number
+
+    @property
+    def action(self) -> Optional[FormEvent]:
+        return self.events[0] if self.events else None
+
+    def __repr__(self):
+        return f'<FormCommand: {self.name}>'
+
+
+class FormElement:
+
+    __slots__ = ('element_type', 'name', 'id', 'data_path', 'events', 'parent', 'line_number')
+
+    def __init__(self, element_type: str, name: str, element_id: str, parent: Optional['FormElement'] = None,
+                 line_number: int = 0):
+        self.element_type = element_type
+        self.name = name
+        self.id = element_id
+        self.data_path: Optional[str] = None
+        self.events: List[FormEvent] = list()
+        self.parent = parent
+        self.line_number = line_number
+
+    def __repr__(self):
+        return f'<FormElement: {self.element_type} {self.name}>'
+
+
+class FormStructure:
+
+    __slots__ = ('options', 'attributes', 'commands', 'elements', 'events')
+
+    def __init__(self):
+        self.options: List[FormOption] = list()
+        self.attributes: List[FormAttribute] = list()
+        self.commands: List[FormCommand] = list()
+        self.elements: List[FormElement] = list()
+        self.events: List[FormEvent] = list()
+
+    def handlers(self) -> List[FormEvent]:
+        result = list(self.events)
+        for element in self.elements:
+            result.extend(element.events)
+        for command in self.commands:
+            result.extend(command.events)
+        return result
+
+
+def read_form_structure(path: Union[str, Path]) -> FormStructure:
+    """
+    Чтение структуры формы (Form.xml выгрузки конфигуратора или Form.form проекта EDT).
+
+    Файл читается потоково (iterparse), обработанные элементы сразу освобождаются.
+    """
+    path = Path(path)
+    with path.open('rb') as f:
+        head = f.read(1024)
+    if b'http://g5.1c.ru/v8/dt/form' in head:
+        return _EDTFormReader(path).read()
+    return _XMLFormReader(path).read()
+
+
+def _free(el):
+    el.clear()
+    parent = el.getparent()
+    if parent is not None:
+        while el.getprevious() is not None:
+            del parent[0]
+
+
+class _XMLFormReader:
+
+    SECTIONS = {'ChildItems', 'AutoCommandBar', 'Attributes', 'Commands', 'Events', 'Parameters',
+                'CommandInterface', 'CommandSet'}
+    ELEMENT_SECTIONS = {'ChildItems', 'AutoCommandBar'}
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.structure = FormStructure()
+
+    def read(self) -> FormStructure:
+        structure = self.structure
+        tags: List[str] = list()
+        # Стек прочитанных записей: (глубина, запись)
+        records: List[tuple] = list()
+
+        for event, el in iterparse(str(self.path), events=('start', 'end'), remove_comments=True):
+            tag = QName(el).localname
+
+            if event == 'start':
+                tags.append(tag)
+                self._start(el, tag, tags, records)
+                continue
+
+            depth = len(tags)
+            self._end(el, tag, tags, records)
+
+            if records and records[-1][0] == depth:
+                records.pop()
+            tags.pop()
+            if depth > 1:
+                _free(el)
+
+        return structure
+
+    def _start(self, el, tag: str, tags: List[str], records: List[tuple]):
+        depth = len(tags)
+        if depth < 2:
+            return
+        section = tags[1]
+        name = el.get('name')
+        if name is None:
+            return
+
+        if section in self.ELEMENT_SECTIONS and el.get('id') is not None:
+            parent = self._last(records, FormElement)
+            element = FormElement(tag, name, el.get('id'), parent, el.sourceline)
+            self.structure.elements.append(element)
+            records.append((depth, element))
+        elif section == 'Attributes' and tag in ('Attribute', 'Column'):
+            parent = self._last(records, FormAttribute)
+            attribute = FormAttribute(name, el.get('id'), parent, el.sourceline)
+            self.structure.attributes.append(attribute)
+            records.append((depth, attribute))
+        elif section == 'Commands' and tag == 'Command' and depth == 3:
+            command = FormCommand(name, el.get('id'), el.sourceline)
+            self.structure.commands.append(command)
+            records.append((depth, command))
+
+    def _end(self, el, tag: str, tags: List[str], records: List[tuple]):
+        depth = len(tags)
+        owner_depth, owner = records[-1] if records else (1, None)
+
+        if depth == 2 and tag not in self.SECTIONS and len(el) == 0:
+            self.structure.options.append(FormOption(tag, el.text))
+        elif tag == 'Event' and depth >= 3 and tags[-2] == 'Events':
+            form_event = FormEvent(el.get('name'), el.text)
+            if depth == 3:
+                self.structure.events.append(form_event)
+            elif owner is not None and owner_depth == depth - 2:
+                owner.events.append(form_event)
+        elif tag == 'Type' and isinstance(owner, FormAttribute) and owner_depth == depth - 2 and tags[-2] == 'Type':
+            owner.types.append(el.text)
+        elif owner is None or owner_depth != depth - 1:
+            return
+        elif tag == 'DataPath' and isinstance(owner, FormElement):
+            owner.data_path = el.text
+        elif tag == 'Action' and isinstance(owner, FormCommand) and el.text:
+            owner.events.append(FormEvent('Action', el.text))
+        elif tag == 'MainAttribute' and isinstance(owner, FormAttribute):
+            owner.main = el.text == 'true'
+
+    @staticmethod
+    def _last(records: List[tuple], cls):
+        for _, record in reversed(records):
+            if isinstance(record, cls):
+                return record
+        return None
+
+
+class _EDTFormReader:
+
+    ELEMENT_TAGS = {'items', 'autoCommandBar', 'contextMenu', 'extendedTooltip', 'searchStringAddition',
+                    'viewStatusAddition', 'searchControlAddition'}
+    XSI_TYPE = '{http://www.w3.org/2001/XMLSchema-instance}type'
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.structure = FormStructure()
+
+    def read(self) -> FormStructure:
+        # Элементы верхнего уровня разбираются целиком после чтения и затем освобождаются
+        depth = 0
+        for event, el in iterparse(str(self.path), events=('start', 'end'), remove_comments=True):
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            if depth != 1:
+                continue
+
+            tag = QName(el).localname
+            if tag in self.ELEMENT_TAGS:
+                self._read_element(el, None)
+            elif tag == 'attributes':
+                self._read_attribute(el, None)
+            elif tag == 'formCommands':
+                self._read_command(el)
+            elif tag == 'handlers':
+                self.structure.events.append(self._read_handler(el))
+            elif len(el) == 0:
+                self.structure.options.append(FormOption(tag[0].upper() + tag[1:], el.text))
+            _free(el)
+
+        return self.structure
+
+    def _read_element(self, el, parent: Optional[FormElement]):
+        tag = QName(el).localname
+        element_type = el.findtext('type')
+        if not element_type:
+            element_type = el.get(self.XSI_TYPE, '').split(':')[-1] if tag == 'items' else tag[0].upper() + tag[1:]
+        element = FormElement(element_type, el.findtext('name'), el.findtext('id'), parent, el.sourceline)
+        self.structure.elements.append(element)
+
+        segments = el.find('dataPath/segments')
+        if segments is not None:
+            element.data_path = segments.text
+
+        for child in el:
+            tag = QName(child).localname
+            if tag == 'handlers':
+                element.events.append(self._read_handler(child))
+            elif tag in self.ELEMENT_TAGS:
+                self._read_element(child, element)
+
+    def _read_attribute(self, el, parent: Optional[FormAttribute]):
+        attribute = FormAttribute(el.findtext('name'), el.findtext('id'), parent, el.sourceline)
+        attribute.types = [types.text for types in el.iterfind('valueType/types')]
+        attribute.main = el.findtext('main') == 'true'
+        self.structure.attributes.append(attribute)
+        for column in el.iterfind('columns'):
+            self._read_attribute(column, attribute)
+
+    def _read_command(self, el):
+        command = FormCommand(el.findtext('name'), el.findtext('id'), el.sourceline)
+        handler = el.findtext('action/handler/name')
+        if handler:
+            command.events.append(FormEvent('Action', handler))
+        self.structure.commands.append(command)
+
+    @staticmethod
+    def _read_handler(el) -> FormEvent:
+        return FormEvent(el.findtext('event'), el.findtext('name'))
+
+
+def link_handlers(structure: FormStructure, sub_programs: Dict[str, 'SubProgram']):
+    for form_event in structure.handlers():
+        if form_event.handler:
+            form_event.sub_program = sub_programs.get(form_event.handler.upper())
@@ -3,7 +3,10 @@ from typing import Optional, Dict, List, Generator, Union
 import pathlib
 import logging
 
-from mdclasses.Module.ModuleParser import ModuleParser, ModuleBlock
+from mdclasses.Module.ModuleParser import ModuleParser, ModuleBlock, FileSource
+from mdclasses.Module.ModuleCache import ModuleCache
+from mdclasses.utils.file_utils import text_digest, write_text_atomic
+from mdclasses.utils.instrumentation import phase
 
 
 logger = logging.getLogger(__name__)
@@ -77,6 +80,10 @@ class ModuleElement(ABC):
     def _get_text(self) -> str:
         return self.__text
 
+    @property
+    def content_hash(self) -> str:
+        return text_digest(self.text)
+
     @classmethod
     @abstractmethod
     def from_data(cls, data: ModuleBlock):
@@ -371,7 +378,7 @@ class Region(Subordinates):
     def __init__(self, name: str, text: str, start: int, end: int, end_text: str,
                  elements: Optional[List[ModuleElement]] = None):
         super(Region, self).__init__(start=start, end=end, text=text, end_text=end_text, elements=elements)
-        self.name: str = name
+        self.__name: str = name
 
     @property
     def name(self):
@@ -411,12 +418,20 @@ class Module(Subordinates):
 
         self.__procedures: Optional[Dict[str, Procedure]] = None
         self.__functions: Optional[Dict[str, Function]] = None
+        self.__source_text: Optional[str] = None
 
         self.parent = parent
 
     @property
     def text(self):
-        return super(Subordinates, self).text
+        text = super(Subordinates, self).text
+        if text is None:
+            # Модуль прочитан из файла построчно: исходный текст неизмененного модуля читается из файла
+            # при первом обращении
+            if self.__source_text is None:
+                self.__source_text = FileSource(self._path).text()
+            return self.__source_text
+        return text
 
     @property
     def name(self):
@@ -507,7 +522,7 @@ class Module(Subordinates):
             yield element
 
     def save_to_file(self):
-        self._path.write_text(self.text, 'utf-8-sig')
+        write_text_atomic(self._path, self.text, 'utf-8-sig')
 
     def match(self, other: 'Module'):
         if self.parent is None or other.parent is None:
@@ -519,19 +534,24 @@ class Module(Subordinates):
         return f'<{self.name} file:{self.file_name}>'
 
 
-def create_module(parser: ModuleParser, module_path: pathlib.Path, parent=None) -> Module:
+def create_module(parser: ModuleParser, module_path: pathlib.Path, parent=None,
+                  cache: Optional[ModuleCache] = None) -> Module:
     try:
-        module_text = module_path.read_text('utf-8-sig')
+        with phase('create_module', path=module_path) as cur_phase:
+            if cache is None:
+                block = parser.parse_module_file(module_path)
+            else:
+                block = cache.parse_module_file(parser, module_path)
+            block.add_data('name', module_path.stem)
+            block.add_data('path', module_path)
+            block.add_data('parent', parent)
 
-        block = parser.parse_module_text(module_text)
-        block.add_data('name', module_path.stem)
-        block.add_data('path', module_path)
-        block.add_data('parent', parent)
+            module = Module.from_data(block)
 
-        module = Module.from_data(block)
+            for element in block.sub_elements:
+                module.elements.append(_create_module_element(element))
 
-        for element in block.sub_elements:
-            module.elements.append(_create_module_element(element))
+            cur_phase.count('lines', block.end or 0)
     except Exception as ex:
         logger.error(f'Ошибка создания модуля из файла по пут {module_path}')
         raise ex
@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from typing import Optional, Union
+import pathlib
+import hashlib
+import logging
+import gzip
+import json
+import mmap
+import os
+import threading
+
+from mdclasses.Module.ModuleParser import ModuleParser, ModuleBlock
+
+
+logger = logging.getLogger(__name__)
+
+
+class ModuleCache:
+    """
+    Кеш результатов разбора модулей.
+
+    Ключ - хеш содержимого файла модуля и версии разбора (ModuleParser.VERSION).
+    Результат разбора (дерево ModuleBlock) хранится в памяти процесса (LRU)
+    и, если указан cache_dir, на диске с ограничением общего размера.
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, pathlib.Path]] = None,
+                 max_size: int = 256 * 1024 * 1024, memory_items: int = 1024):
+        self.cache_dir = None if cache_dir is None else pathlib.Path(cache_dir)
+        self.max_size = max_size
+        self.memory_items = memory_items
+
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_size: Optional[int] = None
+
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(module_path: Union[str, pathlib.Path]) -> str:
+        digest = hashlib.sha1(ModuleParser.VERSION.encode())
+        with open(module_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    digest.update(data)
+        return digest.hexdigest()
+
+    def parse_module_file(self, parser: ModuleParser, module_path: Union[str, pathlib.Path]) -> ModuleBlock:
+        key = self.key(module_path)
+
+        data = self.get(key)
+        if data is not None:
+            return ModuleBlock.from_dict(data)
+
+        block = parser.parse_module_file(module_path)
+        self.put(key, block.to_dict())
+
+        return block
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return data
+
+        data = self._read_from_disk(key)
+
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, data)
+
+        return data
+
+    def put(self, key: str, data: dict):
+        with self._lock:
+            self._remember(key, data)
+        self._write_to_disk(key, data)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.cache_dir is not None:
+            for path in self._disk_files():
+                path.unlink()
+            self._disk_size = 0
+
+    def _remember(self, key: str, data: dict):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> pathlib.Path:
+        return self.cache_dir.joinpath(key[:2], f'{key}.json.gz')
+
+    def _disk_files(self):
+        return list(self.cache_dir.glob('*/*.json.gz'))
+
+    def _read_from_disk(self, key: str) -> Optional[dict]:
+        if self.cache_dir is None:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            # Время изменения используется как время последнего обращения при вытеснении
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as ex:
+            logger.warning(f'Не удалось прочитать кеш модуля {path}: {ex}')
+            return None
+
+        return data
+
+    def _write_to_disk(self, key: str, data: dict):
+        if self.cache_dir is None:
+            return
+
+        path = self._disk_path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(p.stat().st_size for p in self._disk_files())
+            else:
+                self._disk_size += path.stat().st_size
+
+            if self._disk_size > self.max_size:
+                self._evict()
+
+    def _evict(self):
+        files = []
+        for path in self._disk_files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        size = sum(f[1] for f in files)
+        # Освобождаем с запасом, чтобы не вытеснять при каждой записи
+        limit = self.max_size * 0.9
+        for _, file_size, path in files:
+            if size <= limit:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            size -= file_size
+
+        self._disk_size = size
@@ -0,0 +1,196 @@
+from typing import Dict, List, Optional, Union, Iterable
+from itertools import chain
+import pathlib
+import logging
+import gzip
+import json
+import re
+
+from mdclasses.Module.Module import Module, SubProgram, create_module
+from mdclasses.Module.ModuleParser import ModuleParser
+
+
+logger = logging.getLogger(__name__)
+
+
+class IndexEntry:
+
+    def __init__(self, path: pathlib.Path, line: int, token: str):
+        self.path = path
+        # Номер строки считается с 0, как в TextRange элементов модуля
+        self.line = line
+        self.token = token
+        self.module: Optional[Module] = None
+        self.sub_program: Optional[SubProgram] = None
+
+    def __repr__(self):
+        sub_program = '' if self.sub_program is None else f' {self.sub_program.name}'
+        return f'<IndexEntry: {self.token} {self.path}:{self.line}{sub_program}>'
+
+
+class ModuleIndex:
+    """
+    Инвертированный индекс идентификаторов модулей (.bsl).
+
+    Идентификаторы приводятся к верхнему регистру, как при поиске подпрограмм в модуле,
+    каждому идентификатору сопоставляются пары (файл модуля, номер строки).
+    """
+
+    VERSION = 1
+
+    TokenRegExp = re.compile(r'[^\W\d]\w*')
+
+    def __init__(self, root_path: Union[str, pathlib.Path]):
+        self.root_path = pathlib.Path(root_path)
+
+        self._files: Dict[str, dict] = dict()
+        self._file_ids: Dict[int, str] = dict()
+        self._next_id = 0
+        self._postings: Dict[str, Dict[int, List[int]]] = dict()
+        self._file_tokens: Dict[int, set] = dict()
+
+    @classmethod
+    def tokenize(cls, line: str) -> Iterable[str]:
+        for match in cls.TokenRegExp.finditer(line):
+            yield match.group(0).upper()
+
+    @property
+    def files(self) -> List[pathlib.Path]:
+        return [self.root_path.joinpath(name) for name in self._files]
+
+    def __len__(self):
+        return len(self._postings)
+
+    def update(self) -> dict:
+        current = dict()
+        for path in self.root_path.rglob('*.bsl'):
+            stat = path.stat()
+            current[path.relative_to(self.root_path).as_posix()] = (stat.st_mtime_ns, stat.st_size)
+
+        stats = dict(added=0, updated=0, removed=0)
+
+        for name in list(self._files.keys()):
+            if name not in current:
+                self._remove_file(name)
+                stats['removed'] += 1
+
+        for name, (mtime, size) in current.items():
+            entry = self._files.get(name)
+            if entry is not None and entry['mtime'] == mtime and entry['size'] == size:
+                continue
+            stats['updated' if entry is not None else 'added'] += 1
+            self._remove_file(name)
+            self._add_file(name, mtime, size)
+
+        return stats
+
+    def search(self, token: str) -> List[IndexEntry]:
+        token = token.upper()
+        postings = self._postings.get(token, {})
+        result = []
+        for file_id, lines in postings.items():
+            path = self.root_path.joinpath(self._file_ids[file_id])
+            result.extend(IndexEntry(path, line, token) for line in lines)
+        return result
+
+    def _add_file(self, name: str, mtime: int, size: int):
+        file_id = self._next_id
+        self._next_id += 1
+
+        self._files[name] = dict(id=file_id, mtime=mtime, size=size)
+        self._file_ids[file_id] = name
+
+        tokens = set()
+        text = self.root_path.joinpath(name).read_text('utf-8-sig')
+        for line_number, line in enumerate(text.splitlines()):
+            for token in set(self.tokenize(line)):
+                self._postings.setdefault(token, {}).setdefault(file_id, []).append(line_number)
+                tokens.add(token)
+        self._file_tokens[file_id] = tokens
+
+    def _remove_file(self, name: str):
+        entry = self._files.pop(name, None)
+        if entry is None:
+            return
+        file_id = entry['id']
+        self._file_ids.pop(file_id)
+        for token in self._file_tokens.pop(file_id, ()):
+            postings = self._postings[token]
+            postings.pop(file_id, None)
+            if not postings:
+                del self._postings[token]
+
+    def save(self, index_path: Union[str, pathlib.Path]):
+        # Номера строк хранятся разностями, что вместе со сжатием дает компактный файл
+        postings = {}
+        for token, files in self._postings.items():
+            data = []
+            for file_id, lines in files.items():
+                data.append(file_id)
+                data.append(len(lines))
+                prev = 0
+                for line in lines:
+                    data.append(line - prev)
+                    prev = line
+            postings[token] = data
+
+        data = dict(
+            version=self.VERSION,
+            next_id=self._next_id,
+            files=self._files,
+            postings=postings
+        )
+        with gzip.open(pathlib.Path(index_path), 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, index_path: Union[str, pathlib.Path], root_path: Union[str, pathlib.Path]) -> 'ModuleIndex':
+        index = cls(root_path)
+        with gzip.open(pathlib.Path(index_path), 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data['version'] != cls.VERSION:
+            logger.info(f'Версия индекса {index_path} устарела, индекс будет построен заново')
+            return index
+
+        index._next_id = data['next_id']
+        index._files = data['files']
+        index._file_ids = {entry['id']: name for name, entry in index._files.items()}
+
+        for token, encoded in data['postings'].items():
+            files = {}
+            pos = 0
+            while pos < len(encoded):
+                file_id, count = encoded[pos], encoded[pos + 1]
+                pos += 2
+                lines = []
+                line = 0
+                for delta in encoded[pos:pos + count]:
+                    line += delta
+                    lines.append(line)
+                pos += count
+                files[file_id] = lines
+                index._file_tokens.setdefault(file_id, set()).add(token)
+            index._postings[token] = files
+
+        return index
+
+
+def resolve_sub_programs(entries: List[IndexEntry], parser: Optional[ModuleParser] = None) -> List[IndexEntry]:
+    parser = ModuleParser() if parser is None else parser
+
+    modules: Dict[pathlib.Path, Module] = dict()
+    for entry in entries:
+        if entry.path not in modules:
+            modules[entry.path] = create_module(parser, entry.path)
+        entry.module = modules[entry.path]
+        entry.sub_program = find_sub_program_by_line(entry.module, entry.line)
+
+    return entries
+
+
+def find_sub_program_by_line(module: Module, line: int) -> Optional[SubProgram]:
+    for sub_program in chain(module.functions(), module.procedures()):
+        if sub_program.text_range.start_line <= line <= sub_program.text_range.end_line:
+            return sub_program
+    return None
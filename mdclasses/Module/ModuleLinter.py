@@ -0,0 +1,372 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import pathlib
+import re
+import threading
+
+from mdclasses.Module.Module import Module, SubProgram, create_module
+from mdclasses.Module.ModuleParser import ModuleParser
+from mdclasses.Module.ModuleCache import ModuleCache
+from mdclasses.utils.file_utils import file_digest
+from mdclasses.utils.instrumentation import phase
+
+
+class LintIssue:
+
+    __slots__ = ('rule', 'message', 'line', 'sub_program', 'path')
+
+    def __init__(self, rule: str, message: str, line: int, sub_program: str, path: Optional[pathlib.Path] = None):
+        self.rule = rule
+        self.message = message
+        # Номер строки в модуле, считается с 0, как в TextRange элементов модуля
+        self.line = line
+        self.sub_program = sub_program
+        self.path = path
+
+    def to_dict(self) -> dict:
+        return dict(rule=self.rule, message=self.message, line=self.line, sub_program=self.sub_program)
+
+    @classmethod
+    def from_dict(cls, data: dict, path: Optional[pathlib.Path] = None) -> 'LintIssue':
+        return cls(data['rule'], data['message'], data['line'], data['sub_program'], path)
+
+    def __repr__(self):
+        return f'<LintIssue: {self.rule} {self.path}:{self.line} {self.sub_program}>'
+
+
+_LOOP_TOKENS = re.compile(r'(?<![\w.])(Цикл|Do|КонецЦикла|EndDo)(?!\w)', re.IGNORECASE)
+_FOR_EACH = re.compile(r'(?<![\w.])(?:Для\s+Каждого|For\s+Each)\s+(\w+)\s+(?:Из|In)(?!\w)', re.IGNORECASE)
+_LOOP_END = {'КОНЕЦЦИКЛА', 'ENDDO'}
+
+
+class SubProgramCode:
+    """
+    Код подпрограммы для проверок: строки без комментариев и содержимого строковых литералов,
+    глубина вложенности циклов и переменные циклов Для Каждого в каждой позиции строки.
+    Тело цикла начинается после Цикл и заканчивается перед КонецЦикла, в том числе внутри одной строки.
+    """
+
+    __slots__ = ('sub_program', 'start_line', 'lines', 'sub_programs', '_states')
+
+    def __init__(self, sub_program: SubProgram, sub_programs: Dict[str, SubProgram]):
+        self.sub_program = sub_program
+        self.start_line = sub_program.text_range.start_line
+        self.lines = code_lines(sub_program.text)
+        # Подпрограммы модуля по имени в верхнем регистре
+        self.sub_programs = sub_programs
+
+        # Для каждой строки - состояния циклов (позиция в строке, глубина, переменные Для Каждого)
+        # с начала строки и после каждого Цикл и перед каждым КонецЦикла
+        self._states: List[List[Tuple[int, int, Tuple[str, ...]]]] = list()
+        stack: List[Optional[str]] = list()
+        pending: List[Optional[str]] = list()
+        for line in self.lines:
+            states = [(0, len(stack), _variables(stack))]
+            tokens = sorted(
+                [(match.start(), match.end(), match.group(1).upper()) for match in _FOR_EACH.finditer(line)]
+                + [(match.start(), match.end(), None) for match in _LOOP_TOKENS.finditer(line)],
+                key=lambda el: el[0]
+            )
+            for token_start, token_end, variable in tokens:
+                if variable is not None:
+                    pending.append(variable)
+                    continue
+                if line[token_start:token_end].upper() in _LOOP_END:
+                    if stack:
+                        stack.pop()
+                    states.append((token_start, len(stack), _variables(stack)))
+                else:
+                    stack.append(pending.pop(0) if pending else None)
+                    states.append((token_end, len(stack), _variables(stack)))
+            self._states.append(states)
+
+    def _state(self, line: int, column: int) -> Tuple[int, int, Tuple[str, ...]]:
+        result = self._states[line][0]
+        for state in self._states[line]:
+            if state[0] > column:
+                break
+            result = state
+        return result
+
+    def loop_depth(self, line: int, column: int = 0) -> int:
+        return self._state(line, column)[1]
+
+    def loop_variables(self, line: int, column: int = 0) -> Tuple[str, ...]:
+        return self._state(line, column)[2]
+
+    def has_loop(self, line: int) -> bool:
+        # В строке есть код внутри цикла: строка начинается в цикле или в ней открывается цикл
+        return any(depth for _, depth, _ in self._states[line])
+
+    def issue(self, rule: 'LintRule', line: int, message: str) -> LintIssue:
+        return LintIssue(rule.code, message, self.start_line + line, self.sub_program.name)
+
+
+def _variables(stack: List[Optional[str]]) -> Tuple[str, ...]:
+    return tuple(var for var in stack if var is not None)
+
+
+def code_lines(text: str) -> List[str]:
+    """
+    Строки текста модуля без комментариев, строковые литералы заменяются пустыми ("").
+    """
+    result = []
+    in_string = False
+    for line in text.splitlines():
+        parts = []
+        pos = 0
+        if in_string:
+            stripped = line.lstrip()
+            if stripped.startswith('|'):
+                pos = len(line) - len(stripped) + 1
+            elif stripped.startswith('//') or not stripped:
+                result.append('')
+                continue
+            else:
+                in_string = False
+
+        while pos < len(line):
+            if in_string:
+                end = line.find('"', pos)
+                if end == -1:
+                    break
+                if line.startswith('""', end):
+                    pos = end + 2
+                    continue
+                parts.append('""')
+                in_string = False
+                pos = end + 1
+            else:
+                quote = line.find('"', pos)
+                comment = line.find('//', pos)
+                if comment != -1 and (quote == -1 or comment < quote):
+                    parts.append(line[pos:comment])
+                    break
+                if quote == -1:
+                    parts.append(line[pos:])
+                    break
+                parts.append(line[pos:quote])
+                in_string = True
+                pos = quote + 1
+        result.append(''.join(parts))
+    return result
+
+
+class LintRule(ABC):
+    """
+    Правило проверки кода подпрограммы. code - идентификатор правила в результатах проверки.
+    """
+
+    code = ''
+
+    @property
+    def key(self) -> str:
+        # Ключ правила в кеше результатов: правила с параметрами добавляют к нему значения параметров
+        return self.code
+
+    @abstractmethod
+    def check(self, code: SubProgramCode) -> Iterator[LintIssue]:
+        pass
+
+
+class QueryInLoopRule(LintRule):
+    """
+    Выполнение запроса в цикле: Выполнить (ВыполнитьПакет) у переменной, которой присвоен Новый Запрос.
+    """
+
+    code = 'query_in_loop'
+
+    _NEW_QUERY = re.compile(r'(?<![\w.])(\w+)\s*=\s*(?:Новый|New)\s+(?:Запрос|Query)(?!\w)', re.IGNORECASE)
+    _EXECUTE = re.compile(r'(?<![\w.])(\w+)\s*\.\s*(?:Выполнить|ВыполнитьПакет|Execute|ExecuteBatch)\s*\(',
+                          re.IGNORECASE)
+
+    def check(self, code: SubProgramCode) -> Iterator[LintIssue]:
+        queries = {match.group(1).upper() for line in code.lines for match in self._NEW_QUERY.finditer(line)}
+        if not queries:
+            return
+        for line_number, line in enumerate(code.lines):
+            if not code.has_loop(line_number):
+                continue
+            for match in self._EXECUTE.finditer(line):
+                if match.group(1).upper() in queries and code.loop_depth(line_number, match.start()):
+                    yield code.issue(self, line_number, f'Запрос {match.group(1)} выполняется в цикле')
+
+
+class FindInLoopRule(LintRule):
+    """
+    Поиск элемента справочника в цикле: каждый вызов - отдельный запрос к базе данных.
+    """
+
+    code = 'find_in_loop'
+
+    METHODS = ('НайтиПоНаименованию', 'FindByDescription', 'НайтиПоКоду', 'FindByCode',
+               'НайтиПоРеквизиту', 'FindByAttribute')
+
+    def __init__(self, methods: Optional[Iterable[str]] = None):
+        self.methods = tuple(self.METHODS if methods is None else methods)
+        self._call = re.compile(r'\.\s*(' + '|'.join(map(re.escape, self.methods)) + r')\s*\(', re.IGNORECASE)
+
+    @property
+    def key(self) -> str:
+        return f'{self.code}:{",".join(self.methods)}'
+
+    def check(self, code: SubProgramCode) -> Iterator[LintIssue]:
+        for line_number, line in enumerate(code.lines):
+            if not code.has_loop(line_number):
+                continue
+            for match in self._call.finditer(line):
+                if code.loop_depth(line_number, match.start()):
+                    yield code.issue(self, line_number, f'{match.group(1)} вызывается в цикле')
+
+
+class DotChainInLoopRule(LintRule):
+    """
+    Обращение через точку к реквизитам ссылки в цикле Для Каждого: Стр.Номенклатура.Наименование -
+    каждое обращение к реквизиту ссылки читает объект из базы данных.
+    """
+
+    code = 'dot_chain_in_loop'
+
+    _CHAIN = re.compile(r'(?<![\w.])(\w+)((?:\s*\.\s*\w+){2,})')
+
+    def check(self, code: SubProgramCode) -> Iterator[LintIssue]:
+        for line_number, line in enumerate(code.lines):
+            if not code.has_loop(line_number):
+                continue
+            for match in self._CHAIN.finditer(line):
+                if match.group(1).upper() in code.loop_variables(line_number, match.start()):
+                    chain_text = match.group(1) + re.sub(r'\s+', '', match.group(2))
+                    yield code.issue(self, line_number, f'Обращение через точку {chain_text} в цикле')
+
+
+class ServerCallFromClientRule(LintRule):
+    """
+    Серверные вызовы из клиентского кода модуля (&НаКлиенте): вызовы подпрограмм &НаСервере и
+    &НаСервереБезКонтекста в цикле и вызовы сверх max_calls в одной клиентской подпрограмме.
+    """
+
+    code = 'server_call_from_client'
+
+    CLIENT = {'НАКЛИЕНТЕ', 'ATCLIENT'}
+    SERVER = {'НАСЕРВЕРЕ', 'ATSERVER', 'НАСЕРВЕРЕБЕЗКОНТЕКСТА', 'ATSERVERNOCONTEXT'}
+
+    _CALL = re.compile(r'(?<![\w.&])(\w+)\s*\(')
+
+    def __init__(self, max_calls: int = 1):
+        self.max_calls = max_calls
+
+    @property
+    def key(self) -> str:
+        return f'{self.code}:{self.max_calls}'
+
+    def check(self, code: SubProgramCode) -> Iterator[LintIssue]:
+        if _directive(code.sub_program) not in self.CLIENT:
+            return
+        calls = 0
+        for line_number, line in enumerate(code.lines):
+            for match in self._CALL.finditer(line):
+                target = code.sub_programs.get(match.group(1).upper())
+                if target is None or target is code.sub_program or _directive(target) not in self.SERVER:
+                    continue
+                calls += 1
+                if code.loop_depth(line_number, match.start()):
+                    yield code.issue(self, line_number, f'Серверный вызов {target.name} в цикле')
+                elif calls > self.max_calls:
+                    yield code.issue(self, line_number, f'Повторный серверный вызов {target.name}')
+
+
+def _directive(sub_program: SubProgram) -> str:
+    directive = sub_program.compilation_directive
+    return '' if directive is None else directive.compilation_type.upper()
+
+
+DEFAULT_RULES = (QueryInLoopRule, FindInLoopRule, DotChainInLoopRule, ServerCallFromClientRule)
+
+
+class LintCache:
+    """
+    Кеш результатов проверки модулей в памяти процесса. Ключ - хеш содержимого файла модуля и ключи правил.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._data: Dict[str, List[dict]] = dict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        with self._lock:
+            data = self._data.get(key)
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return data
+
+    def put(self, key: str, data: List[dict]):
+        with self._lock:
+            self._data[key] = data
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ModuleLinter:
+    """
+    Проверка кода модулей набором правил (LintRule). Правила применяются к каждой подпрограмме модуля,
+    модули проверяются параллельно, результаты кешируются по хешу содержимого файла модуля.
+    """
+
+    def __init__(self, rules: Optional[Iterable[LintRule]] = None, workers: Optional[int] = None,
+                 cache: Optional[LintCache] = None, module_cache: Optional[ModuleCache] = None):
+        self.rules: List[LintRule] = [rule() for rule in DEFAULT_RULES] if rules is None else list(rules)
+        self.workers = workers
+        self.cache = LintCache() if cache is None else cache
+        self.module_cache = module_cache
+        self._parser = ModuleParser()
+        self._rules_key = '|'.join(rule.key for rule in self.rules)
+
+    def lint_module(self, module: Module) -> List[LintIssue]:
+        sub_programs = dict()
+        for sub_program in chain(module.functions(), module.procedures()):
+            sub_programs[sub_program.name.upper()] = sub_program
+
+        result = []
+        for sub_program in sorted(sub_programs.values(), key=lambda el: el.text_range.start_line):
+            code = SubProgramCode(sub_program, sub_programs)
+            for rule in self.rules:
+                for issue in rule.check(code):
+                    issue.path = module.file_name
+                    result.append(issue)
+        return result
+
+    def lint_file(self, path: Union[str, pathlib.Path], parent=None) -> List[LintIssue]:
+        path = pathlib.Path(path)
+        key = f'{file_digest(path)}:{self._rules_key}'
+        data = self.cache.get(key)
+        if data is not None:
+            return [LintIssue.from_dict(issue, path) for issue in data]
+
+        with phase('lint_module', path=path) as cur_phase:
+            issues = self.lint_module(create_module(self._parser, path, parent, cache=self.module_cache))
+            cur_phase.count('issues', len(issues))
+        self.cache.put(key, [issue.to_dict() for issue in issues])
+        return issues
+
+    def lint_files(self, paths: Iterable[Union[pathlib.Path, Tuple[pathlib.Path, object]]],
+                   workers: Optional[int] = None) -> Iterator[LintIssue]:
+        """
+        Параллельная проверка модулей. paths - файлы модулей или пары (файл модуля, владелец модуля),
+        workers - число потоков вместо заданного для проверки.
+        Результаты выдаются по мере готовности в порядке входных данных.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.workers if workers is None else workers)
+        try:
+            tasks = executor.map(lambda item: self.lint_file(*item) if isinstance(item, tuple) else self.lint_file(item),
+                                 paths)
+            for issues in tasks:
+                yield from issues
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
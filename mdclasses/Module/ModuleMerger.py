@@ -0,0 +1,249 @@
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import pathlib
+
+from mdclasses.Module.Module import ModuleElement, Subordinates, SubProgram, Region, create_module
+from mdclasses.Module.ModuleParser import ModuleParser
+from mdclasses.Module.ModuleCache import ModuleCache
+from mdclasses.utils.file_utils import file_digest, write_text_atomic
+from mdclasses.utils.instrumentation import phase
+
+
+class MergeStatus(Enum):
+    # Поставщик модуль не менял, остается наш вариант
+    UNCHANGED = 'unchanged'
+    # Мы модуль не меняли, берется вариант поставщика
+    THEIRS = 'theirs'
+    MERGED = 'merged'
+    CONFLICT = 'conflict'
+
+
+class MergeResult:
+
+    __slots__ = ('path', 'status', 'text', 'conflicts')
+
+    def __init__(self, path: pathlib.Path, status: MergeStatus, text: Optional[str] = None,
+                 conflicts: Optional[List[str]] = None):
+        self.path = path
+        self.status = status
+        self.text = text
+        self.conflicts: List[str] = list() if conflicts is None else conflicts
+
+    def to_dict(self) -> dict:
+        return dict(
+            path=str(self.path),
+            status=self.status.value,
+            conflicts=list(self.conflicts)
+        )
+
+    def __repr__(self):
+        return f'<MergeResult: {self.status.value} {self.path}>'
+
+
+class ModuleMerger:
+    """
+    Трехстороннее слияние модулей: base - исходная версия поставщика, theirs - новая версия поставщика,
+    ours - наш измененный модуль.
+
+    Модули сравниваются по хешу файлов, разбираются только модули, измененные обеими сторонами.
+    Подпрограммы сопоставляются по имени, области - по имени, остальные блоки текста - по позиции
+    после предыдущей подпрограммы или области. Изменения одной стороны принимаются автоматически,
+    изменения одного блока обеими сторонами помечаются маркерами конфликта.
+    """
+
+    def __init__(self, workers: Optional[int] = None, ours_label: str = 'ours', theirs_label: str = 'theirs',
+                 cache: Optional[ModuleCache] = None, encoding: str = 'utf-8-sig'):
+        self.workers = workers
+        self.ours_label = ours_label
+        self.theirs_label = theirs_label
+        self.cache = cache
+        self.encoding = encoding
+        self._parser = ModuleParser()
+
+    def merge(self, base_path: Optional[pathlib.Path], theirs_path: pathlib.Path,
+              ours_path: pathlib.Path) -> MergeResult:
+        # base_path = None - модуля не было в прошлой поставке
+        base_path = None if base_path is None else pathlib.Path(base_path)
+        theirs_path, ours_path = pathlib.Path(theirs_path), pathlib.Path(ours_path)
+        base_hash = '' if base_path is None else file_digest(base_path)
+        theirs_hash, ours_hash = file_digest(theirs_path), file_digest(ours_path)
+
+        if theirs_hash == base_hash or theirs_hash == ours_hash:
+            return MergeResult(ours_path, MergeStatus.UNCHANGED)
+        if ours_hash == base_hash:
+            return MergeResult(ours_path, MergeStatus.THEIRS, theirs_path.read_text(encoding=self.encoding))
+
+        with phase('merge_module', path=ours_path) as cur_phase:
+            conflicts = list()
+            base, theirs, ours = self._source(base_path), self._source(theirs_path), self._source(ours_path)
+            text = self._merge_elements(
+                (base, theirs, ours), base.elements, theirs.elements, ours.elements, [], conflicts
+            )
+            if ours.ends_with_new_line and not text.endswith('\n'):
+                text = f'{text}\n'
+            cur_phase.count('conflicts', len(conflicts))
+
+        status = MergeStatus.CONFLICT if conflicts else MergeStatus.MERGED
+        return MergeResult(ours_path, status, text, conflicts)
+
+    def merge_all(self, paths: Iterable[Tuple[Optional[pathlib.Path], pathlib.Path, pathlib.Path]],
+                  write: bool = False) -> Iterator[MergeResult]:
+        """
+        Параллельное слияние набора модулей (base, theirs, ours). Результаты выдаются по мере готовности
+        в порядке входных данных, с write=True слитый текст записывается в наш модуль.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            yield from executor.map(lambda el: self._merge_task(*el, write=write), paths)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _merge_task(self, base_path, theirs_path, ours_path, write: bool = False) -> MergeResult:
+        result = self.merge(base_path, theirs_path, ours_path)
+        if write and result.text is not None:
+            write_text_atomic(result.path, result.text, self.encoding)
+        return result
+
+    def _source(self, path: Optional[pathlib.Path]) -> '_Source':
+        if path is None or not path.exists():
+            return _Source('', [])
+        module = create_module(self._parser, path, cache=self.cache)
+        return _Source(module.text, module.elements)
+
+    def _merge_elements(self, sources: Tuple['_Source', '_Source', '_Source'], base: List[ModuleElement],
+                        theirs: List[ModuleElement], ours: List[ModuleElement],
+                        path: List[str], conflicts: List[str]) -> str:
+        names = dict()
+        base_keys, theirs_keys, ours_keys = _keyed(base, names), _keyed(theirs, names), _keyed(ours, names)
+
+        order = list(ours_keys)
+        positions = set(order)
+        theirs_order = list(theirs_keys)
+        for i, key in enumerate(theirs_order):
+            if key in positions:
+                continue
+            # Блок, которого нет у нас, ставится после ближайшего предшествующего ему блока поставщика
+            index = 0
+            for prev_key in reversed(theirs_order[:i]):
+                if prev_key in positions:
+                    index = order.index(prev_key) + 1
+                    break
+            order.insert(index, key)
+            positions.add(key)
+
+        parts = []
+        for key in order:
+            text = self._merge_element(sources, base_keys.get(key), theirs_keys.get(key), ours_keys.get(key),
+                                       path + [names[key]], conflicts)
+            if text is not None:
+                parts.append(text)
+        return '\n'.join(parts)
+
+    def _merge_element(self, sources: Tuple['_Source', '_Source', '_Source'], base: Optional[ModuleElement],
+                       theirs: Optional[ModuleElement], ours: Optional[ModuleElement],
+                       path: List[str], conflicts: List[str]) -> Optional[str]:
+        base_source, theirs_source, ours_source = sources
+        base_text, theirs_text, ours_text = base_source.text(base), theirs_source.text(theirs), ours_source.text(ours)
+
+        if _same(ours_text, theirs_text) or _same(theirs_text, base_text):
+            return ours_text
+        if _same(ours_text, base_text):
+            return theirs_text
+
+        if _is_container(base) and _is_container(theirs) and _is_container(ours) \
+                and type(base) == type(theirs) == type(ours):
+            elements_text = self._merge_elements(sources, base.elements, theirs.elements, ours.elements,
+                                                 path, conflicts)
+            head_text = self._merge_element_text(
+                base_source.head(base), theirs_source.head(theirs), ours_source.head(ours), path, conflicts
+            )
+            end_text = self._merge_element_text(
+                base_source.end(base), theirs_source.end(theirs), ours_source.end(ours), path, conflicts
+            )
+            return '\n'.join([head_text, elements_text, end_text])
+
+        return self._conflict(theirs_text, ours_text, path, conflicts)
+
+    def _merge_element_text(self, base: str, theirs: str, ours: str, path: List[str], conflicts: List[str]) -> str:
+        if _same(ours, theirs) or _same(theirs, base):
+            return ours
+        if _same(ours, base):
+            return theirs
+        return self._conflict(theirs, ours, path, conflicts)
+
+    def _conflict(self, theirs: Optional[str], ours: Optional[str], path: List[str], conflicts: List[str]) -> str:
+        conflicts.append('.'.join(path))
+        lines = [f'<<<<<<< {self.ours_label}']
+        if ours is not None:
+            lines.append(ours)
+        lines.append('=======')
+        if theirs is not None:
+            lines.append(theirs)
+        lines.append(f'>>>>>>> {self.theirs_label}')
+        return '\n'.join(lines)
+
+
+def _keyed(elements: List[ModuleElement], names: Dict[tuple, str]) -> Dict[tuple, ModuleElement]:
+    # Ключи: подпрограммы и области - по имени, прочие блоки - по позиции после предыдущего именованного блока
+    result = dict()
+    anchor = None
+    position = 0
+    for element in elements:
+        if isinstance(element, (SubProgram, Region)):
+            key = ('region' if isinstance(element, Region) else 'sub_program', element.name.upper(), 0)
+            while key in result:
+                key = (key[0], key[1], key[2] + 1)
+            names.setdefault(key, element.name if key[2] == 0 else f'{element.name}[{key[2]}]')
+            anchor = key
+            position = 0
+        else:
+            key = ('text', anchor, position)
+            names.setdefault(key, f'{"" if anchor is None else names[anchor]}[{position}]')
+            position += 1
+        result[key] = element
+    return result
+
+
+class _Source:
+    """
+    Исходный текст модуля одной из сторон слияния. Текст блоков берется из исходного текста по номерам
+    строк элементов: текст, собранный из элементов, отличается от исходного (пустые строки, перевод
+    строки в конце последнего элемента).
+    """
+
+    __slots__ = ('lines', 'elements', 'ends_with_new_line')
+
+    def __init__(self, text: str, elements: List[ModuleElement]):
+        self.lines = text.split('\n')
+        self.elements = elements
+        self.ends_with_new_line = text.endswith('\n')
+
+    def _lines(self, start: int, end: int) -> str:
+        return '\n'.join(self.lines[start:end])
+
+    def text(self, element: Optional[ModuleElement]) -> Optional[str]:
+        if element is None:
+            return None
+        return self._lines(element.text_range.start_line, element.text_range.end_line + 1)
+
+    def head(self, element: Subordinates) -> str:
+        # Строки контейнера до первого вложенного элемента (#Область Имя, #Если ... Тогда)
+        start = element.text_range.start_line
+        end = element.elements[0].text_range.start_line if element.elements else start + 1
+        return self._lines(start, end)
+
+    def end(self, element: Subordinates) -> str:
+        start = element.elements[-1].text_range.end_line + 1 if element.elements else element.text_range.start_line + 1
+        return self._lines(start, element.text_range.end_line + 1)
+
+
+def _same(text: Optional[str], other: Optional[str]) -> bool:
+    # Блоки сравниваются без переводов строк в конце: у последнего блока файла он есть, у остальных нет
+    if text is None or other is None:
+        return text is other
+    return text.rstrip('\r\n') == other.rstrip('\r\n')
+
+
+def _is_container(element: Optional[ModuleElement]) -> bool:
+    return isinstance(element, Subordinates) and not isinstance(element, SubProgram)
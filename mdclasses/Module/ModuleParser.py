@@ -1,9 +1,18 @@
+from array import array
+from typing import Dict, Iterator, List, Optional, Union
+from pathlib import Path
+import codecs
+import mmap
 import re
-from typing import Dict, List, Optional, Union
+
+from mdclasses.utils.instrumentation import phase
 
 
 class ModuleParser:
 
+    # Версия разбора: меняется при любом изменении результата разбора, входит в ключ кеша модулей
+    VERSION = '2'
+
     RegionDataRegExp = re.compile(r'^( |\t)*#Область\s*(?P<region_name>.*$)', flags=re.MULTILINE | re.IGNORECASE)
 
     PreprocessorDataRegExp = re.compile(
@@ -41,7 +50,20 @@ class ModuleParser:
 
         module_block = self.get_module_blocks(text)
 
-        self.parse_block(module_block)
+        with phase('parse_block', size=len(text)):
+            self.parse_block(module_block)
+
+        self.parse_sub_programs(module_block)
+
+        return module_block
+
+    def parse_module_file(self, path: Union[str, Path]) -> 'ModuleBlock':
+
+        text_parser = TextLineParser.from_file(path)
+        module_block = text_parser.get_module_blocks()
+
+        with phase('parse_block', path=path):
+            self.parse_block(module_block)
 
         self.parse_sub_programs(module_block)
 
@@ -204,17 +226,22 @@ class TextLineParser:
         flags=re.MULTILINE | re.IGNORECASE
     )
 
-    def __init__(self, text: str):
+    def __init__(self, text: Optional[str], source: Optional['TextSource'] = None):
         self.current_level: int = 0
         self.root: ModuleBlock = ModuleBlock(level=0, block_type='module', start=0, text=text)
-        self.__lines: List[str] = text.splitlines(keepends=True)
+        self.__source: TextSource = TextSource(text) if source is None else source
         self.current_root: ModuleBlock = self.root
         self.text_data_cache: dict = {'text': None, 'comment': None, 'preproc': None}
         self.line_number: int = 0
 
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> 'TextLineParser':
+        # Текст модуля целиком не хранится, строки читаются из файла по мере разбора
+        return cls(None, FileSource(path))
+
     def get_module_blocks(self) -> 'ModuleBlock':
 
-        if len(self.__lines) == 0:
+        if self.__source.empty:
             return self.root
 
         for line in self.lines:
@@ -245,9 +272,10 @@ class TextLineParser:
             else:
                 self.handle_text_data(line_type, line)
 
-        self.clear_text_cache_data()
+        # Текстовый блок в конце модуля заканчивается последней строкой модуля
+        self.clear_text_cache_data(end=self.line_number)
 
-        if self.root.text[-1] == '\n':
+        if self.__source.ends_with_new_line:
             self.add_last_line()
 
         self.root.end = self.line_number
@@ -309,16 +337,17 @@ class TextLineParser:
 
     @property
     def lines(self):
-        for line_number, line in enumerate(self.__lines):
+        for line_number, line in enumerate(self.__source.lines()):
             self.line_number = line_number
-            yield line.replace('\n', '')
+            yield line
 
-    def clear_text_cache_data(self, exept_key: Optional[str] = None):
+    def clear_text_cache_data(self, exept_key: Optional[str] = None, end: Optional[int] = None):
+        end = self.line_number - 1 if end is None else end
         for key in self.text_data_cache.keys():
             if exept_key is not None and key == exept_key:
                 continue
             if self.text_data_cache[key] is not None:
-                self.text_data_cache[key].end = self.line_number - 1
+                self.text_data_cache[key].end = end
                 self.text_data_cache[key] = None
 
     def get_text_data_from_cache(self, line_type: str):
@@ -350,6 +379,90 @@ class TextLineParser:
         return line_type in ['region__end', 'preprocessor__end', 'sub_program__end']
 
 
+class TextSource:
+
+    def __init__(self, text: str):
+        self.__text = text
+
+    @property
+    def empty(self) -> bool:
+        return self.__text == ''
+
+    @property
+    def ends_with_new_line(self) -> bool:
+        return self.__text[-1] == '\n'
+
+    def lines(self) -> Iterator[str]:
+        for line in self.__text.splitlines(keepends=True):
+            yield line.replace('\n', '')
+
+
+class FileSource:
+    """
+    Построчное чтение файла модуля через отображение в память.
+
+    Смещения переводов строк находятся одним проходом по отображению файла и хранятся в массиве,
+    строки декодируются по одной в момент разбора. Переводы строк \r\n, \r и \n обрабатываются
+    как в Path.read_text.
+    """
+
+    NewLineRegExp = re.compile(b'\r\n|\r|\n')
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+        self.__size = self.path.stat().st_size
+        self.__start = 0
+        self.__ends_with_new_line = False
+
+        if self.__size > 0:
+            with self.path.open('rb') as f:
+                head = f.read(len(codecs.BOM_UTF8))
+                if head == codecs.BOM_UTF8:
+                    self.__start = len(codecs.BOM_UTF8)
+                f.seek(-1, 2)
+                self.__ends_with_new_line = f.read(1) in (b'\n', b'\r')
+
+    @property
+    def empty(self) -> bool:
+        return self.__size <= self.__start
+
+    @property
+    def ends_with_new_line(self) -> bool:
+        return self.__ends_with_new_line
+
+    def lines(self) -> Iterator[str]:
+        if self.empty:
+            return
+
+        with self.path.open('rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offsets = self.line_offsets(data)
+            start = self.__start
+            # Смещения хранятся парами: начало и конец перевода строки
+            for index in range(0, len(offsets), 2):
+                yield data[start:offsets[index]].decode('utf-8')
+                start = offsets[index + 1]
+            if start < self.__size:
+                yield data[start:self.__size].decode('utf-8')
+
+    def line_offsets(self, data: mmap.mmap) -> array:
+        offsets = array('q')
+        for match in self.NewLineRegExp.finditer(data, self.__start):
+            offsets.append(match.start())
+            offsets.append(match.end())
+        return offsets
+
+    def text(self) -> str:
+        """
+        Текст файла целиком, как его возвращает Path.read_text(encoding='utf-8-sig').
+        """
+        if self.empty:
+            return ''
+        with self.path.open('rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            text = data[self.__start:].decode('utf-8')
+        return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
 class ModuleBlock:
 
     def __init__(self, level: int,
@@ -397,6 +510,32 @@ class ModuleBlock:
     def get_data(self):
         return self.__aditional_data
 
+    def to_dict(self) -> dict:
+        return dict(
+            block_type=self.block_type,
+            level=self.level,
+            start=self.start,
+            end=self.end,
+            text=self.text,
+            data=dict(self.__aditional_data),
+            sub_elements=[block.to_dict() for block in self.sub_elements]
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict, root: Optional['ModuleBlock'] = None) -> 'ModuleBlock':
+        block = cls(
+            level=data['level'],
+            block_type=data['block_type'],
+            start=data['start'],
+            end=data['end'],
+            text=data['text'],
+            root=root
+        )
+        for name, value in data['data'].items():
+            block.add_data(name, value)
+        block.sub_elements.extend(cls.from_dict(sub_data, block) for sub_data in data['sub_elements'])
+        return block
+
     def __repr__(self):
         return f'<ModuleBlock: {self.block_type} {self.start}:{self.end}>'
 
@@ -0,0 +1,281 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import pathlib
+import re
+
+from mdclasses.configuration_enums import ObjectType
+from mdclasses.Module.Module import Module, SubProgram, create_module
+from mdclasses.Module.ModuleParser import ModuleParser
+from mdclasses.Module.ModuleCache import ModuleCache
+from mdclasses.utils.instrumentation import phase
+
+
+# Имена таблиц языка запросов (русские и английские) и типы объектов метаданных
+TABLE_TYPES = {
+    'СПРАВОЧНИК': ObjectType.CATALOG,
+    'CATALOG': ObjectType.CATALOG,
+    'ДОКУМЕНТ': ObjectType.DOCUMENT,
+    'DOCUMENT': ObjectType.DOCUMENT,
+    'ЖУРНАЛДОКУМЕНТОВ': ObjectType.DOCUMENT_JOURNAL,
+    'DOCUMENTJOURNAL': ObjectType.DOCUMENT_JOURNAL,
+    'ПЕРЕЧИСЛЕНИЕ': ObjectType.ENUM,
+    'ENUM': ObjectType.ENUM,
+    'КОНСТАНТА': ObjectType.CONSTANT,
+    'CONSTANT': ObjectType.CONSTANT,
+    'ПЛАНОБМЕНА': ObjectType.EXCHANGE_PLAN,
+    'EXCHANGEPLAN': ObjectType.EXCHANGE_PLAN,
+    'ПЛАНВИДОВХАРАКТЕРИСТИК': ObjectType.CHART_OF_CHARACTERISTIC_TYPES,
+    'CHARTOFCHARACTERISTICTYPES': ObjectType.CHART_OF_CHARACTERISTIC_TYPES,
+    'ПЛАНСЧЕТОВ': ObjectType.CHART_OF_ACCOUNTS,
+    'CHARTOFACCOUNTS': ObjectType.CHART_OF_ACCOUNTS,
+    'ПЛАНВИДОВРАСЧЕТА': ObjectType.CHART_OF_CALCULATION_TYPES,
+    'CHARTOFCALCULATIONTYPES': ObjectType.CHART_OF_CALCULATION_TYPES,
+    'РЕГИСТРСВЕДЕНИЙ': ObjectType.INFORMATION_REGISTER,
+    'INFORMATIONREGISTER': ObjectType.INFORMATION_REGISTER,
+    'РЕГИСТРНАКОПЛЕНИЯ': ObjectType.ACCUMULATION_REGISTER,
+    'ACCUMULATIONREGISTER': ObjectType.ACCUMULATION_REGISTER,
+    'РЕГИСТРБУХГАЛТЕРИИ': ObjectType.ACCOUNTING_REGISTER,
+    'ACCOUNTINGREGISTER': ObjectType.ACCOUNTING_REGISTER,
+    'РЕГИСТРРАСЧЕТА': ObjectType.CALCULATION_REGISTER,
+    'CALCULATIONREGISTER': ObjectType.CALCULATION_REGISTER,
+    'БИЗНЕСПРОЦЕСС': ObjectType.BUSINESS_PROCESS,
+    'BUSINESSPROCESS': ObjectType.BUSINESS_PROCESS,
+    'ЗАДАЧА': ObjectType.TASK,
+    'TASK': ObjectType.TASK,
+    'ПОСЛЕДОВАТЕЛЬНОСТЬ': ObjectType.SEQUENCE,
+    'SEQUENCE': ObjectType.SEQUENCE,
+    'КРИТЕРИЙОТБОРА': ObjectType.FILTER_CRITERION,
+    'FILTERCRITERION': ObjectType.FILTER_CRITERION,
+    'ВНЕШНИЙИСТОЧНИКДАННЫХ': ObjectType.EXTERNAL_DATA_SOURCE,
+    'EXTERNALDATASOURCE': ObjectType.EXTERNAL_DATA_SOURCE,
+}
+
+QUERY_START = re.compile(r'^\s*(?:ВЫБРАТЬ|SELECT|УНИЧТОЖИТЬ|DROP)(?![\w])', re.IGNORECASE)
+
+_QUERY_TOKENS = re.compile(
+    r'(?P<comment>//[^\n]*)|(?P<string>"[^"]*")|(?P<name>[^\W\d]\w*(?:\.\w+)*)|(?P<param>&\w+)'
+    r'|(?P<punct>[(),;])|(?P<other>\S)'
+)
+
+_FROM = {'ИЗ', 'FROM'}
+_JOIN = {'СОЕДИНЕНИЕ', 'JOIN'}
+_CLAUSE_END = {
+    'ГДЕ', 'WHERE', 'СГРУППИРОВАТЬ', 'GROUP', 'УПОРЯДОЧИТЬ', 'ORDER', 'ИМЕЮЩИЕ', 'HAVING',
+    'ОБЪЕДИНИТЬ', 'UNION', 'ИНДЕКСИРОВАТЬ', 'INDEX', 'ИТОГИ', 'TOTALS', 'ДЛЯ', 'FOR', 'ВЫБРАТЬ', 'SELECT'
+}
+
+
+class TableReference:
+    """
+    Таблица объекта метаданных в запросе: Документ.Имя, Документ.Имя.ТабличнаяЧасть,
+    РегистрНакопления.Имя.Остатки и т.п. table - табличная часть или виртуальная таблица.
+    """
+
+    __slots__ = ('obj_type', 'name', 'table', 'line')
+
+    def __init__(self, obj_type: ObjectType, name: str, table: str = '', line: int = 0):
+        self.obj_type = obj_type
+        self.name = name
+        self.table = table
+        # Номер строки в тексте запроса, считается с 0
+        self.line = line
+
+    @property
+    def full_name(self) -> str:
+        return f'{self.obj_type.value}.{self.name}'
+
+    def __repr__(self):
+        table = f'.{self.table}' if self.table else ''
+        return f'<TableReference: {self.full_name}{table}>'
+
+
+class QueryText:
+
+    __slots__ = ('text', 'line', 'module', 'sub_program', 'tables')
+
+    def __init__(self, text: str, line: int, module: Module, sub_program: SubProgram):
+        self.text = text
+        # Номер строки начала литерала в модуле, считается с 0, как в TextRange элементов модуля
+        self.line = line
+        self.module = module
+        self.sub_program = sub_program
+        self.tables: List[TableReference] = query_tables(text)
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self.module.file_name
+
+    def __repr__(self):
+        return f'<QueryText: {self.path}:{self.line} {self.sub_program.name}>'
+
+
+def string_literals(text: str) -> Iterator[Tuple[int, str]]:
+    """
+    Строковые литералы текста модуля: (номер строки начала литерала, значение).
+
+    Многострочные литералы продолжаются строками, начинающимися с |, строки комментариев
+    внутри литерала пропускаются, удвоенные кавычки заменяются одной.
+    """
+    parts: List[str] = []
+    start = 0
+    in_string = False
+
+    for line_number, line in enumerate(text.splitlines()):
+        pos = 0
+        if in_string:
+            stripped = line.lstrip()
+            if stripped.startswith('|'):
+                parts.append('\n')
+                pos = len(line) - len(stripped) + 1
+            elif stripped.startswith('//') or not stripped:
+                continue
+            else:
+                # Незакрытый литерал без продолжения - ошибка в модуле, литерал завершается
+                yield start, ''.join(parts)
+                in_string = False
+
+        while pos < len(line):
+            if in_string:
+                end = line.find('"', pos)
+                if end == -1:
+                    parts.append(line[pos:])
+                    break
+                if line.startswith('""', end):
+                    parts.append(line[pos:end + 1])
+                    pos = end + 2
+                    continue
+                parts.append(line[pos:end])
+                yield start, ''.join(parts)
+                in_string = False
+                pos = end + 1
+            else:
+                quote = line.find('"', pos)
+                comment = line.find('//', pos)
+                if quote == -1 or -1 < comment < quote:
+                    break
+                in_string = True
+                start = line_number
+                parts = []
+                pos = quote + 1
+
+    if in_string:
+        yield start, ''.join(parts)
+
+
+def query_tables(text: str) -> List[TableReference]:
+    """
+    Таблицы объектов метаданных в источниках запроса (ИЗ, СОЕДИНЕНИЕ, в том числе во вложенных запросах).
+    Временные таблицы и параметры (&Таблица) не учитываются.
+    """
+    result = []
+    depth = 0
+    from_depths = set()
+    expect_source = False
+
+    for match in _QUERY_TOKENS.finditer(text):
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind in ('comment', 'string', 'param', 'other'):
+            expect_source = False
+            continue
+
+        if kind == 'punct':
+            if value == '(':
+                depth += 1
+                expect_source = False
+            elif value == ')':
+                from_depths.discard(depth)
+                depth = max(depth - 1, 0)
+            elif value == ';':
+                depth = 0
+                from_depths.clear()
+                expect_source = False
+            elif depth in from_depths:
+                expect_source = True
+            continue
+
+        upper = value.upper()
+        if upper in _FROM:
+            from_depths.add(depth)
+            expect_source = True
+        elif upper in _JOIN:
+            expect_source = depth in from_depths
+        elif upper in _CLAUSE_END:
+            from_depths.discard(depth)
+            expect_source = False
+        elif expect_source:
+            expect_source = False
+            parts = value.split('.')
+            obj_type = TABLE_TYPES.get(parts[0].upper())
+            if obj_type is not None and len(parts) > 1:
+                result.append(TableReference(obj_type, parts[1], '.'.join(parts[2:]),
+                                             text.count('\n', 0, match.start())))
+
+    return result
+
+
+def extract_queries(module: Module) -> List[QueryText]:
+    """
+    Тексты запросов в подпрограммах модуля: строковые литералы, которые начинаются с ВЫБРАТЬ (SELECT)
+    или УНИЧТОЖИТЬ (DROP).
+    """
+    result = []
+    sub_programs = sorted(chain(module.functions(), module.procedures()), key=lambda el: el.text_range.start_line)
+    for sub_program in sub_programs:
+        start_line = sub_program.text_range.start_line
+        for line, literal in string_literals(sub_program.text):
+            if QUERY_START.match(literal):
+                result.append(QueryText(literal, start_line + line, module, sub_program))
+    return result
+
+
+class ModuleQueryIndex:
+    """
+    Индекс запросов модулей: полное имя объекта метаданных (Document.Имя) - запросы, которые читают его таблицы.
+
+    Модули разбираются и запросы извлекаются параллельно.
+    """
+
+    def __init__(self):
+        self.queries: List[QueryText] = list()
+        self._objects: Dict[str, List[QueryText]] = dict()
+
+    @classmethod
+    def build(cls, paths: Iterable[Union[pathlib.Path, Tuple[pathlib.Path, object]]], workers: Optional[int] = None,
+              parser: Optional[ModuleParser] = None, cache: Optional[ModuleCache] = None) -> 'ModuleQueryIndex':
+        """
+        paths - файлы модулей или пары (файл модуля, владелец модуля).
+        """
+        parser = ModuleParser() if parser is None else parser
+        index = cls()
+
+        def read(item) -> List[QueryText]:
+            path, parent = item if isinstance(item, tuple) else (item, None)
+            return extract_queries(create_module(parser, pathlib.Path(path), parent, cache=cache))
+
+        with phase('build_module_query_index') as cur_phase:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for queries in executor.map(read, paths):
+                    for query in queries:
+                        index.add(query)
+            cur_phase.count('queries', len(index.queries))
+        return index
+
+    def add(self, query: QueryText):
+        self.queries.append(query)
+        for full_name in dict.fromkeys(table.full_name for table in query.tables):
+            self._objects.setdefault(full_name, []).append(query)
+
+    def objects(self) -> List[str]:
+        return list(self._objects)
+
+    def reading(self, obj) -> List[QueryText]:
+        """
+        Запросы, которые читают таблицы объекта. obj - объект конфигурации или его полное имя.
+        """
+        full_name = obj if isinstance(obj, str) else obj.full_name
+        return list(self._objects.get(full_name, []))
+
+    def __len__(self):
+        return len(self.queries)
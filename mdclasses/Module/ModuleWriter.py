@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+import pathlib
+import logging
+
+from mdclasses.Module.Module import Module
+from mdclasses.utils.file_utils import content_digest, encode_text, file_digest, write_bytes_atomic
+
+
+logger = logging.getLogger(__name__)
+
+
+class WriteReport:
+
+    def __init__(self):
+        self.written: List[pathlib.Path] = list()
+        self.skipped: List[pathlib.Path] = list()
+        self.not_changed: List[pathlib.Path] = list()
+        self.failed: Dict[pathlib.Path, Exception] = dict()
+
+    @property
+    def success(self) -> bool:
+        return len(self.failed) == 0
+
+    def to_dict(self) -> dict:
+        return dict(
+            written=[str(path) for path in self.written],
+            skipped=[str(path) for path in self.skipped],
+            not_changed=[str(path) for path in self.not_changed],
+            failed={str(path): str(ex) for path, ex in self.failed.items()}
+        )
+
+    def __repr__(self):
+        return f'<WriteReport: записано {len(self.written)}, пропущено {len(self.skipped)}, ' \
+               f'без изменений {len(self.not_changed)}, ошибок {len(self.failed)}>'
+
+
+class ModuleWriter:
+    """
+    Пакетная запись модулей.
+
+    Собирает измененные модули, формирует их текст и записывает файлы в пуле потоков.
+    Файлы, содержимое которых совпадает с сформированным текстом (по хешу), не перезаписываются.
+    """
+
+    WRITTEN = 'written'
+    SKIPPED = 'skipped'
+
+    def __init__(self, workers: Optional[int] = None, encoding: str = 'utf-8-sig'):
+        self.workers = workers
+        self.encoding = encoding
+        self._modules: Dict[pathlib.Path, Module] = dict()
+        self._not_changed: List[pathlib.Path] = list()
+
+    def add(self, module: Module):
+        if not module.changed:
+            self._not_changed.append(module.file_name)
+            return
+        self._modules[module.file_name] = module
+
+    def add_modules(self, modules: Iterable[Module]):
+        for module in modules:
+            self.add(module)
+
+    @property
+    def modules(self) -> List[Module]:
+        return list(self._modules.values())
+
+    def write(self) -> WriteReport:
+        report = WriteReport()
+        report.not_changed.extend(self._not_changed)
+
+        modules = self.modules
+        if modules:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(self._write_module, modules))
+
+            for module, (result, error) in zip(modules, results):
+                if error is not None:
+                    report.failed[module.file_name] = error
+                elif result == self.WRITTEN:
+                    report.written.append(module.file_name)
+                else:
+                    report.skipped.append(module.file_name)
+
+        self._modules = dict()
+        self._not_changed = list()
+
+        return report
+
+    def _write_module(self, module: Module) -> (Optional[str], Optional[Exception]):
+        try:
+            data = encode_text(module.text, self.encoding)
+            if content_digest(data) == file_digest(module.file_name):
+                return self.SKIPPED, None
+            write_bytes_atomic(module.file_name, data)
+        except Exception as ex:
+            logger.error(f'Ошибка записи модуля {module} : {ex}')
+            return None, ex
+
+        return self.WRITTEN, None
@@ -1,2 +1,8 @@
 from .Module import Module, create_module, TextData, Procedure
-from .ModuleParser import ModuleParser
\ No newline at end of file
+from .ModuleParser import ModuleParser
+from .ModuleCache import ModuleCache
+from .ModuleWriter import ModuleWriter, WriteReport
+from .ModuleIndex import ModuleIndex, IndexEntry, resolve_sub_programs
+from .ModuleMerger import ModuleMerger, MergeResult, MergeStatus
+from .ModuleQueries import ModuleQueryIndex, QueryText, TableReference, extract_queries
+from .ModuleLinter import ModuleLinter, LintRule, LintIssue, LintCache, SubProgramCode, DEFAULT_RULES
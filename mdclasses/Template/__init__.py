@@ -0,0 +1,2 @@
+from .template import Template
+from .dcs import DCSQuery, read_dcs_queries
@@ -0,0 +1,88 @@
+from typing import BinaryIO, Iterator, List, Optional, Union
+from pathlib import Path
+
+from lxml.etree import QName, iterparse
+
+from mdclasses.utils.instrumentation import phase
+
+
+DCS_NAMESPACE = 'http://v8.1c.ru/8.1/data-composition-system/schema'
+
+_DATA_SET = f'{{{DCS_NAMESPACE}}}dataSet'
+_ITEM = f'{{{DCS_NAMESPACE}}}item'
+_QUERY = f'{{{DCS_NAMESPACE}}}query'
+_NAME = f'{{{DCS_NAMESPACE}}}name'
+_DATA_SOURCE = f'{{{DCS_NAMESPACE}}}dataSource'
+_FIELD = f'{{{DCS_NAMESPACE}}}field'
+_DATA_PATH = f'{{{DCS_NAMESPACE}}}dataPath'
+
+
+class DCSQuery:
+    """
+    Запрос набора данных схемы компоновки данных.
+
+    fields - пути к данным полей набора (dataPath), line_number - строка текста запроса в файле схемы.
+    """
+
+    __slots__ = ('data_set', 'data_source', 'text', 'fields', 'line_number')
+
+    def __init__(self, data_set: str, data_source: Optional[str], text: str, fields: List[str],
+                 line_number: int = 0):
+        self.data_set = data_set
+        self.data_source = data_source
+        self.text = text
+        self.fields = fields
+        self.line_number = line_number
+
+    def __repr__(self):
+        return f'<DCSQuery: {self.data_set}>'
+
+
+def read_dcs_queries(source: Union[str, Path, BinaryIO]) -> Iterator[DCSQuery]:
+    """
+    Потоковое чтение запросов схемы компоновки данных (Template.xml выгрузки конфигуратора, Template.dcs EDT).
+
+    Запросы выдаются по мере разбора наборов данных, в том числе вложенных в объединения.
+    Разобранные элементы верхнего уровня освобождаются, схема целиком в памяти не строится.
+    Файл, заданный путем, закрывается и при остановке чтения до конца схемы (close генератора).
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as f:
+            yield from _read_dcs_queries(f, Path(source))
+    else:
+        yield from _read_dcs_queries(source, None)
+
+
+def _read_dcs_queries(source: BinaryIO, path: Optional[Path]) -> Iterator[DCSQuery]:
+    with phase('read_dcs_queries', path=path) as cur_phase:
+        depth = 0
+        for event, el in iterparse(source, events=('start', 'end'), remove_comments=True):
+            if event == 'start':
+                depth += 1
+                continue
+
+            depth -= 1
+            if el.tag in (_DATA_SET, _ITEM):
+                query = el.find(_QUERY)
+                if query is not None:
+                    cur_phase.count('queries')
+                    yield DCSQuery(
+                        data_set=el.findtext(_NAME, ''),
+                        data_source=el.findtext(_DATA_SOURCE),
+                        text=query.text or '',
+                        fields=[field.findtext(_DATA_PATH) for field in el.iterchildren(_FIELD)
+                                if field.find(_DATA_PATH) is not None],
+                        line_number=query.sourceline
+                    )
+
+            if depth == 1:
+                el.clear()
+                parent = el.getparent()
+                while el.getprevious() is not None:
+                    del parent[0]
+
+
+def is_dcs(head: bytes) -> bool:
+    # Проверка по началу файла: схема компоновки данных объявляет свое пространство имен в корневом элементе
+    return DCS_NAMESPACE.encode('utf-8') in head
+
@@ -0,0 +1,143 @@
+from typing import List, Optional, Union
+from pathlib import Path
+import mmap
+import os
+
+from lxml.etree import QName, iterparse
+
+from mdclasses.configuration_enums import TemplateType
+from mdclasses.supportable import Supportable
+from mdclasses.Template.dcs import DCSQuery, read_dcs_queries, is_dcs
+
+
+class Template(Supportable):
+    """
+    Макет объекта или общий макет.
+
+    Метаданные макета (имя, uuid, тип) доступны сразу, файл данных макета (Template.*) ищется
+    и отображается в память (mmap) только при обращении к payload, до этого файл не открывается.
+    Отображение держит открытый дескриптор файла до close(): при обходе большого числа макетов
+    payload читается в контексте макета (with template: ...) или освобождается через close().
+    is_dcs и queries отображение не создают.
+    """
+
+    def __init__(self, name: str, data_dir: Path, description_path: Optional[Path] = None,
+                 template_type: Optional[TemplateType] = None, uuid: str = '', line_number: int = 0):
+        super(Template, self).__init__(uuid)
+        self.name = name
+        self.line_number = line_number
+        self.data_dir = data_dir
+        self.description_path = description_path
+
+        # Тип макета выгрузки конфигуратора читается из описания макета при первом обращении
+        self._template_type = template_type
+        self._payload_path: Optional[Path] = None
+        self._payload: Optional[Union[mmap.mmap, bytes]] = None
+
+    @property
+    def full_name(self):
+        return f'template.{self.name}'
+
+    @property
+    def template_type(self) -> Optional[TemplateType]:
+        if self._template_type is None and self.description_path is not None and self.description_path.exists():
+            self._template_type = _read_template_type(self.description_path)
+        return self._template_type
+
+    @property
+    def payload_path(self) -> Optional[Path]:
+        if self._payload_path is None:
+            try:
+                with os.scandir(self.data_dir) as entries:
+                    names = sorted(entry.name for entry in entries
+                                   if entry.is_file() and entry.name.split('.')[0] == 'Template')
+            except OSError:
+                return None
+            if names:
+                self._payload_path = self.data_dir.joinpath(names[0])
+        return self._payload_path
+
+    @property
+    def payload(self) -> Union[mmap.mmap, bytes]:
+        """
+        Данные макета только для чтения: mmap файла данных, для пустого или отсутствующего файла - b''.
+        """
+        if self._payload is None:
+            path = self.payload_path
+            if path is None or path.stat().st_size == 0:
+                self._payload = b''
+            else:
+                with path.open('rb') as f:
+                    self._payload = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._payload
+
+    @property
+    def loaded(self) -> bool:
+        return self._payload is not None
+
+    def text(self, encoding: str = 'utf-8-sig') -> str:
+        return self.payload[:].decode(encoding)
+
+    @property
+    def is_dcs(self) -> bool:
+        template_type = self.template_type
+        if template_type is not None:
+            return template_type == TemplateType.DATA_COMPOSITION_SCHEMA
+        # Тип макета, найденного только на диске, определяется по началу файла
+        if self.loaded:
+            return is_dcs(self.payload[:1024])
+        path = self.payload_path
+        if path is None:
+            return False
+        with path.open('rb') as f:
+            return is_dcs(f.read(1024))
+
+    def queries(self) -> List[DCSQuery]:
+        """
+        Тексты запросов наборов данных схемы компоновки данных, для остальных макетов - пустой список.
+        """
+        if not self.is_dcs or self.payload_path is None:
+            return []
+        return list(read_dcs_queries(self.payload_path))
+
+    def close(self):
+        if isinstance(self._payload, mmap.mmap):
+            self._payload.close()
+        self._payload = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def to_dict(self) -> dict:
+        data = super(Template, self).to_dict()
+        template_type = self.template_type
+        data.update(
+            dict(
+                name=self.name,
+                line_number=self.line_number,
+                template_type=None if template_type is None else template_type.value
+            )
+        )
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, data_dir: Path, description_path: Optional[Path] = None) -> 'Template':
+        template_type = data.get('template_type')
+        return cls(data['name'], data_dir, description_path=description_path,
+                   template_type=None if template_type is None else TemplateType(template_type),
+                   uuid=data['uuid'], line_number=data['line_number'])
+
+    def __repr__(self):
+        return f'<Template: {self.name}>'
+
+
+def _read_template_type(path: Path) -> Optional[TemplateType]:
+    # Файл открывается здесь: iterparse, остановленный до конца файла, оставил бы свой файл открытым
+    with path.open('rb') as f:
+        for _, el in iterparse(f, events=('end',), remove_comments=True):
+            if QName(el).localname == 'TemplateType':
+                return TemplateType(el.text)
+    return None
@@ -1,5 +1,7 @@
-from mdclasses.builder import read_configuration
+from mdclasses.builder import read_configuration, aread_configuration
 from mdclasses.conf_base import Configuration, ConfObject, ObjectAttribute
-from mdclasses.configuration_enums import ObjectType, Format, SupportType
+from mdclasses.type_description import TypeDescription
+from mdclasses.configuration_enums import ObjectType, Format, SupportType, TemplateType
 from mdclasses.Module import Module, TextData, Procedure
 from mdclasses.Form import Form
+from mdclasses.Template import Template
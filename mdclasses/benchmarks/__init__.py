@@ -0,0 +1,2 @@
+from .generator import generate_configuration
+from .scenarios import run_benchmarks, save_results, SCENARIOS
@@ -0,0 +1,43 @@
+from pathlib import Path
+import argparse
+import tempfile
+
+from mdclasses.benchmarks import generate_configuration, run_benchmarks, save_results, SCENARIOS
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Замеры скорости чтения конфигурации и разбора модулей')
+    arg_parser.add_argument('--config', help='Каталог выгрузки конфигурации. По умолчанию формируется синтетическая.')
+    arg_parser.add_argument('--objects', type=int, default=100, help='Количество синтетических объектов')
+    arg_parser.add_argument('--attributes', type=int, default=10, help='Количество реквизитов объекта')
+    arg_parser.add_argument('--modules', type=int, default=10, help='Количество подпрограмм в модуле объекта')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='Количество повторов каждого сценария')
+    arg_parser.add_argument('--scenario', action='append', help='Выполнить только указанные сценарии')
+    arg_parser.add_argument('--output', default='bench_output.json', help='Файл результатов в формате json')
+    args = arg_parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.scenario:
+        scenarios = [scenario for scenario in SCENARIOS if scenario.name in args.scenario]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.config is None:
+            config_dir = generate_configuration(
+                Path(temp_dir).joinpath('config'),
+                objects=args.objects,
+                attributes=args.attributes,
+                modules=args.modules
+            )
+        else:
+            config_dir = Path(args.config)
+
+        results = run_benchmarks(config_dir, repeat=args.repeat, scenarios=scenarios)
+
+    save_results(results, args.output)
+
+    for name, data in results['scenarios'].items():
+        print(f'{name:<30} min {data["min"]:.4f}s  mean {data["mean"]:.4f}s  max {data["max"]:.4f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+from pathlib import Path
+from typing import Union
+import re
+
+
+class RegExpSupportConfigurationParser:
+    '''
+    Прежняя реализация чтения ParentConfigurations.bin (весь файл и список всех полей в памяти).
+    Используется только как база для сравнения в замерах.
+    '''
+    REG_EXP = r'(?:,|\\n|^)(\"(?:(?:\"\")*[^\"]*)*\"|[^\",\\n]*|(?:\\n|$))'
+
+    FILE_CONF_NUMBER = 2
+
+    CONF_VERSION_SHIFT = 3
+    CONF_PROVIDER_SHIFT = 4
+    CONF_NAME_SHIFT = 5
+    CONF_OBJECTS_SHIFT = 6
+
+    OBJECT_TUPLE_LEN = 4
+    OBJECT_SUPPORT_TYPE_SHIFT = 0
+    OBJECT_UUID_SHIFT = 2
+
+    def __init__(self, file_path: Union[str, Path]):
+        self.file_path = Path(file_path)
+
+    def parse(self) -> dict:
+        conf_data = {}
+        if not self.file_path.exists():
+            return dict()
+
+        data = self.file_path.read_text(encoding='utf-8-sig')
+
+        file_reg_exp = re.compile(self.REG_EXP)
+        file_data = file_reg_exp.findall(data)
+
+        cur_element = 3
+        cur_configuration = int(file_data[self.FILE_CONF_NUMBER])
+
+        for conf_number in range(cur_configuration):
+
+            conf_version = file_data[cur_element+self.CONF_VERSION_SHIFT]
+            conf_provider = file_data[cur_element+self.CONF_PROVIDER_SHIFT]
+            conf_name = file_data[cur_element+self.CONF_NAME_SHIFT].replace('"', '')
+            cur_conf_objects = int(file_data[cur_element+self.CONF_OBJECTS_SHIFT])
+            conf_objects = {}
+
+            for object_num in range(
+                    cur_element + 1 + self.CONF_OBJECTS_SHIFT,
+                    cur_element + self.CONF_OBJECTS_SHIFT + cur_conf_objects * self.OBJECT_TUPLE_LEN,
+                    self.OBJECT_TUPLE_LEN):
+                object_support_type = int(file_data[object_num + self.OBJECT_SUPPORT_TYPE_SHIFT])
+                object_uuid = file_data[object_num + self.OBJECT_UUID_SHIFT]
+                conf_objects[object_uuid] = object_support_type
+
+            cur_element = object_num + 2 + self.OBJECT_TUPLE_LEN
+
+            conf_data[conf_name] = dict(
+                conf_version=conf_version,
+                conf_provider=conf_provider,
+                conf_objects=conf_objects,
+            )
+
+        return conf_data
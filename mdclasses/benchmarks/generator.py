@@ -0,0 +1,118 @@
+from copy import deepcopy
+from pathlib import Path
+from typing import Union
+import re
+import shutil
+import uuid
+
+from lxml.etree import QName, parse, SubElement
+
+test_data_root = Path(__file__).parent.parent.joinpath('tests', 'test_data', 'config')
+
+TEMPLATE_TYPE_DIR = 'Catalogs'
+TEMPLATE_NAME = 'Справочник1'
+TEMPLATE_TAG = 'Catalog'
+
+UUIDRegExp = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+SUB_PROGRAM_TEMPLATE = '''
+// Синтетическая процедура {index}
+//
+// Параметры:
+//  Парам1 - Строка
+//
+&НаСервере
+Процедура Процедура{index}(Парам1, Знач Парам2 = Неопределено) Экспорт
+\tЗапрос = Новый Запрос;
+\tЗапрос.Текст = "ВЫБРАТЬ
+\t|\tСправочник.Ссылка
+\t|ИЗ
+\t|\tСправочник.{name} КАК Справочник";
+\tРезультат = Запрос.Выполнить();
+\tДля Каждого Строка Из Результат.Выгрузить() Цикл
+\t\tПарам1 = Парам1 + Строка.Ссылка;
+\tКонецЦикла;
+КонецПроцедуры
+'''
+
+
+def generate_configuration(target_dir: Union[str, Path], objects: int = 100, attributes: int = 10,
+                           modules: int = 10, source_dir: Union[str, Path] = test_data_root) -> Path:
+    """
+    Формирует синтетическую выгрузку конфигурации на основе тестовой:
+    добавляет objects справочников, в каждом attributes реквизитов и модуль объекта из modules подпрограмм.
+    """
+    target_dir = Path(target_dir)
+    if target_dir.exists():
+        shutil.rmtree(target_dir)
+    shutil.copytree(source_dir, target_dir)
+
+    template_file = target_dir.joinpath(TEMPLATE_TYPE_DIR, f'{TEMPLATE_NAME}.xml')
+    template_dir = target_dir.joinpath(TEMPLATE_TYPE_DIR, TEMPLATE_NAME)
+    template_text = template_file.read_text(encoding='utf-8-sig')
+
+    names = []
+    uuids = []
+    for number in range(objects):
+        name = f'БенчСправочник{number:05}'
+        names.append(name)
+
+        obj_file = target_dir.joinpath(TEMPLATE_TYPE_DIR, f'{name}.xml')
+        obj_text = UUIDRegExp.sub(lambda _: str(uuid.uuid4()), template_text.replace(TEMPLATE_NAME, name))
+        obj_file.write_text(obj_text, encoding='utf-8')
+        _add_attributes(obj_file, attributes)
+        uuids.extend(UUIDRegExp.findall(obj_file.read_text(encoding='utf-8')))
+
+        obj_dir = target_dir.joinpath(TEMPLATE_TYPE_DIR, name)
+        shutil.copytree(template_dir, obj_dir)
+        module_text = ''.join(SUB_PROGRAM_TEMPLATE.format(index=index, name=name) for index in range(modules))
+        obj_dir.joinpath('Ext', 'ObjectModule.bsl').write_text(module_text, encoding='utf-8-sig')
+
+    _add_to_configuration(target_dir.joinpath('Configuration.xml'), names)
+    write_support_file(target_dir.joinpath('Ext', 'ParentConfigurations.bin'), uuids)
+
+    return target_dir
+
+
+def write_support_file(path: Path, uuids: list, configurations: int = 1):
+    """
+    Файл описания поддержки: все переданные uuid на поддержке у каждого из configurations поставщиков.
+    """
+    fields = ['{6', '1', str(configurations)]
+    for number in range(configurations):
+        fields.extend([str(uuid.uuid4()), '1', str(uuid.uuid4()), '"1.0.0"', '"Поставщик"',
+                       f'"Поставщик{number}"', str(len(uuids))])
+        for obj_uuid in uuids:
+            fields.extend([str(number % 3), '0', obj_uuid, obj_uuid])
+        fields.extend(['0', '0'])
+    fields.append('0}')
+    path.write_text(','.join(fields), encoding='utf-8-sig')
+
+
+def _add_attributes(obj_file: Path, count: int):
+    tree = parse(str(obj_file))
+    root = tree.getroot()
+    ns = {'tns': root.nsmap[None]}
+    child_objects = root.xpath(f'//tns:{TEMPLATE_TAG}/tns:ChildObjects', namespaces=ns)[0]
+    attributes = child_objects.xpath('./tns:Attribute', namespaces=ns)
+    if not attributes:
+        return
+
+    template = attributes[0]
+    for number in range(count):
+        attribute = deepcopy(template)
+        attribute.attrib['uuid'] = str(uuid.uuid4())
+        attribute.xpath('./tns:Properties/tns:Name', namespaces=ns)[0].text = f'БенчРеквизит{number:04}'
+        child_objects.append(attribute)
+
+    tree.write(str(obj_file), xml_declaration=True, encoding='utf-8')
+
+
+def _add_to_configuration(conf_file: Path, names: list):
+    tree = parse(str(conf_file))
+    root = tree.getroot()
+    ns = {'tns': root.nsmap[None]}
+    child_objects = root.xpath('//tns:Configuration/tns:ChildObjects', namespaces=ns)[0]
+    for name in names:
+        SubElement(child_objects, QName(root.nsmap[None], TEMPLATE_TAG)).text = name
+    tree.write(str(conf_file), xml_declaration=True, encoding='utf-8')
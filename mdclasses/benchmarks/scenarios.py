@@ -0,0 +1,130 @@
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+from json import dump
+import datetime
+import platform
+import statistics
+import tempfile
+import time
+
+from mdclasses.builder import (create_configuration, read_configuration, read_configuration_objects, save_to_json,
+                               get_support_data)
+from mdclasses.benchmarks.baseline import RegExpSupportConfigurationParser
+from mdclasses.conf_base import Configuration
+from mdclasses.configuration_enums import ObjectType
+
+
+class Scenario:
+
+    def __init__(self, name: str, run: Callable, setup: Optional[Callable] = None):
+        self.name = name
+        self._run = run
+        self._setup = setup
+
+    def setup(self, config_dir: Path):
+        if self._setup is None:
+            return config_dir
+        return self._setup(config_dir)
+
+    def run(self, context):
+        return self._run(context)
+
+    def measure(self, config_dir: Path, repeat: int) -> List[float]:
+        timings = []
+        for _ in range(repeat):
+            context = self.setup(config_dir)
+            start = time.perf_counter()
+            self.run(context)
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    def __repr__(self):
+        return f'<Scenario: {self.name}>'
+
+
+def _read_all_modules(conf: Configuration) -> Configuration:
+    for obj in conf.conf_objects:
+        if obj.obj_type == ObjectType.SUBSYSTEM:
+            continue
+        obj.read_modules()
+    return conf
+
+
+def _sub_program_names(config_dir: Path):
+    conf = _read_all_modules(read_configuration(config_dir))
+    data = []
+    for obj in conf.conf_objects:
+        if obj.obj_type == ObjectType.SUBSYSTEM:
+            continue
+        for module in obj.modules:
+            names = [sub.name for sub in module.functions()] + [sub.name for sub in module.procedures()]
+            data.append((module, names))
+    return data
+
+
+def _find_sub_programs(data):
+    for module, names in data:
+        for name in names:
+            module.find_sub_program(name)
+
+
+def _configuration_objects(config_dir: Path) -> Configuration:
+    return create_configuration(config_dir)
+
+
+def _save_to_json(conf: Configuration):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        save_to_json(conf, Path(temp_dir).joinpath('configuration.json'))
+
+
+def _support_data_regexp(config_dir: Path):
+    return RegExpSupportConfigurationParser(config_dir.joinpath('Ext', 'ParentConfigurations.bin')).parse()
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario('create_configuration', run=create_configuration),
+    Scenario('read_configuration_objects', setup=_configuration_objects, run=read_configuration_objects),
+    Scenario('read_modules', setup=read_configuration, run=_read_all_modules),
+    Scenario('find_sub_program', setup=_sub_program_names, run=_find_sub_programs),
+    Scenario('to_dict', setup=read_configuration, run=lambda conf: conf.to_dict()),
+    Scenario('from_dict', setup=lambda path: read_configuration(path).to_dict(), run=Configuration.from_dict),
+    Scenario('save_to_json', setup=read_configuration, run=_save_to_json),
+    Scenario('get_support_data', run=get_support_data),
+    Scenario('get_support_data_regexp', run=_support_data_regexp),
+]
+
+
+def run_benchmarks(config_dir: Union[str, Path], repeat: int = 5,
+                   scenarios: Optional[List[Scenario]] = None) -> dict:
+    config_dir = Path(config_dir)
+    scenarios = SCENARIOS if scenarios is None else scenarios
+
+    results: Dict[str, dict] = {}
+    for scenario in scenarios:
+        timings = scenario.measure(config_dir, repeat)
+        results[scenario.name] = dict(
+            runs=timings,
+            min=min(timings),
+            mean=statistics.mean(timings),
+            max=max(timings)
+        )
+
+    conf = create_configuration(config_dir)
+
+    return dict(
+        meta=dict(
+            created=datetime.datetime.now().isoformat(timespec='seconds'),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            config_dir=str(config_dir),
+            objects=len(conf.conf_objects),
+            modules=len(list(config_dir.rglob('*.bsl'))),
+            repeat=repeat
+        ),
+        scenarios=results
+    )
+
+
+def save_results(results: dict, json_path: Union[str, Path]):
+    with Path(json_path).open('w', encoding='utf-8') as f:
+        dump(results, f, ensure_ascii=False, indent=2)
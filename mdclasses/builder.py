@@ -1,18 +1,23 @@
-from typing import Union
+from typing import Optional, Union
 from pathlib import Path
 from json import load, dump
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, Executor
+import asyncio
 
 
 from mdclasses.parser import get_parser, SupportConfigurationParser
 from mdclasses.conf_base import Configuration, SubSystem
 from mdclasses.utils.path_resolver import get_path_resolver
 from mdclasses.configuration_enums import ObjectType, Format
+from mdclasses.utils.instrumentation import phase, add_observer, remove_observer, PhaseReporter
 
 
-def read_configuration(config_dir: str) -> Configuration:
-    conf = create_configuration(config_dir)
-    read_configuration_objects(conf)
-    conf.set_support(get_support_data(config_dir))
+def read_configuration(config_dir: Union[str, Path], file_format: Format = Format.CONFIGURATOR,
+                       workers: Optional[int] = None) -> Configuration:
+    conf = create_configuration(config_dir, file_format)
+    read_configuration_objects(conf, workers)
+    conf.set_support(get_support_data(conf.root_path, file_format=file_format))
 
     return conf
 
@@ -21,57 +26,129 @@ def create_configuration(config_dir: Union[str, Path], file_format: Format = For
 
     path_resolver = get_path_resolver(file_format)
 
-    config_data = Path(config_dir).joinpath(path_resolver.conf_file_path(ObjectType.CONFIGURATION))
-    parser = get_parser(config_data, ObjectType.CONFIGURATION)
+    config_dir = path_resolver.source_root(config_dir)
+    config_data = config_dir.joinpath(path_resolver.conf_file_path(ObjectType.CONFIGURATION))
 
-    uuid, child_data, name, props = parser.parse()
+    with phase('create_configuration', path=config_data) as cur_phase:
+        parser = get_parser(config_data, ObjectType.CONFIGURATION, file_format)
 
-    return Configuration(uuid=uuid, conf_objects=child_data, root_path=config_dir,
-                         name=name, props=props, parser=parser, file_format=file_format)
+        with phase('parse', path=config_data):
+            uuid, child_data, name, props = parser.parse()
 
+        cur_phase.count('objects', len(child_data))
 
-def get_support_data(config_dir: Union[str, Path]):
-    config_dir = Path(config_dir)
-    support_path = config_dir.joinpath('Ext/ParentConfigurations.bin').absolute()
-    parser = SupportConfigurationParser(support_path)
-    return parser.parse()
+        return Configuration(uuid=uuid, conf_objects=child_data, root_path=config_dir,
+                             name=name, props=props, parser=parser, file_format=file_format)
 
 
-def read_configuration_objects(conf: Configuration):
+def get_support_data(config_dir: Union[str, Path], uuid_as_bytes: bool = False,
+                     file_format: Format = Format.CONFIGURATOR):
+    path_resolver = get_path_resolver(file_format)
+    config_dir = path_resolver.source_root(config_dir)
+    support_path = config_dir.joinpath(
+        path_resolver.ext_path(ObjectType.CONFIGURATION), 'ParentConfigurations.bin'
+    ).absolute()
+    with phase('get_support_data', path=support_path) as cur_phase:
+        parser = SupportConfigurationParser(support_path, uuid_as_bytes=uuid_as_bytes)
+        data = parser.parse()
+        cur_phase.count('configurations', len(data))
+    return data
+
+
+def read_configuration_objects(conf: Configuration, workers: Optional[int] = None):
+    # Файлы объектов разбираются параллельно, результаты применяются к объектам в исходном порядке
+    conf_objects = list(conf.conf_objects)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(read_configuration_object, conf_objects))
+
+    for conf_object, result in zip(conf_objects, results):
+        _set_object_data(conf, conf_object, result)
+
+    _build_indexes(conf)
+
+
+async def aread_configuration(config_dir: Union[str, Path], file_format: Format = Format.CONFIGURATOR,
+                              executor: Optional[Executor] = None) -> Configuration:
+    """
+    Асинхронное чтение конфигурации. Разбор файлов выполняется в executor (по умолчанию - executor цикла),
+    между объектами управление возвращается циклу событий, чтение можно отменить.
+    """
+    loop = asyncio.get_running_loop()
+    conf = await loop.run_in_executor(executor, create_configuration, config_dir, file_format)
+    await aread_configuration_objects(conf, executor)
+    support_data = await loop.run_in_executor(
+        executor, partial(get_support_data, conf.root_path, file_format=file_format)
+    )
+    conf.set_support(support_data)
+
+    return conf
+
+
+async def aread_configuration_objects(conf: Configuration, executor: Optional[Executor] = None):
+    loop = asyncio.get_running_loop()
+    conf_objects = list(conf.conf_objects)
+    futures = [loop.run_in_executor(executor, read_configuration_object, obj) for obj in conf_objects]
+    try:
+        for conf_object, future in zip(conf_objects, futures):
+            result = await future
+            if conf_object.obj_type == ObjectType.SUBSYSTEM:
+                await loop.run_in_executor(executor, _set_object_data, conf, conf_object, result)
+            else:
+                _set_object_data(conf, conf_object, result)
+            await asyncio.sleep(0)
+    except asyncio.CancelledError:
+        for future in futures:
+            future.cancel()
+        raise
 
-    for conf_object in conf.conf_objects:
+    _build_indexes(conf)
 
-        conf_object.uuid, obj_childes, conf_object.line_number, conf_object.props = read_configuration_object(conf_object)
-        conf_object.set_childes(obj_childes)
 
-        if conf_object.obj_type != ObjectType.SUBSYSTEM:
-            continue
+def _set_object_data(conf: Configuration, conf_object, result: tuple):
+    conf_object.uuid, obj_childes, conf_object.line_number, conf_object.props = result
+    conf_object.set_childes(obj_childes)
 
+    if conf_object.obj_type == ObjectType.SUBSYSTEM:
         handle_child_subsystems(conf, conf_object, obj_childes)
 
 
+def _build_indexes(conf: Configuration):
+    conf.reset_indexes()
+    with phase('subsystem_index'):
+        conf.subsystem_index
+    with phase('reference_index'):
+        conf.reference_index
+
+
 def read_configuration_object(conf_object):
         object_config = conf_object.file_name
-        parser = get_parser(object_config, conf_object.obj_type)
-        return parser.parse()
+        parser = get_parser(object_config, conf_object.obj_type, conf_object.file_format)
+        with phase('parse', path=object_config):
+            return parser.parse()
 
 
 def handle_child_subsystems(conf: Configuration, obj: SubSystem, obj_childes: dict):
+    with phase('handle_child_subsystems', path=obj.file_name):
+        _handle_child_subsystems(conf, obj, obj_childes)
+
+
+def _handle_child_subsystems(conf: Configuration, obj: SubSystem, obj_childes: dict):
 
     for subsystem in filter(lambda ch: ch[0] == 'Subsystem', obj_childes['others']):
         conf_obj = SubSystem(
             name=subsystem[1],
-            parent=obj
+            parent=obj,
+            file_format=obj.file_format
         )
         conf_obj.uuid, obj_childes, conf_obj.line_number, conf_obj.props = read_configuration_object(conf_obj)
         conf_obj.set_childes(obj_childes)
         conf.conf_objects.append(conf_obj)
-        handle_child_subsystems(conf, conf_obj, obj_childes)
+        _handle_child_subsystems(conf, conf_obj, obj_childes)
 
 
-def save_to_json(conf: Configuration, json_path: [str, Path]):
+def save_to_json(conf: Configuration, json_path: [str, Path], hashes: bool = False):
     json_path = Path(json_path)
-    data = conf.to_dict()
+    data = conf.to_dict(hashes=hashes)
     with json_path.open('w', encoding='utf-8') as f:
         dump(data, f, ensure_ascii=False)
 
@@ -1,61 +1,100 @@
 from _ast import For
-from typing import List, Dict, Union, Optional
+from typing import List, Dict, Union, Optional, Iterator, Tuple, Set
 from pathlib import Path
 from abc import ABC, abstractmethod
+from uuid import UUID
 import shutil
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, Executor
 
-from mdclasses.configuration_enums import ObjectType, SupportType, Format
-from mdclasses.Module import Module, create_module, ModuleParser
+from mdclasses.configuration_enums import ObjectType, SupportType, Format, TemplateType
+from mdclasses.Module import Module, create_module, ModuleParser, ModuleCache, ModuleIndex, IndexEntry, resolve_sub_programs
+from mdclasses.Module import ModuleQueryIndex, ModuleLinter, LintIssue
 from mdclasses.Form import Form
-from mdclasses.utils.path_resolver import get_path_resolver, ABCPathResolver
+from mdclasses.Template import Template, DCSQuery
+from mdclasses.utils.path_resolver import get_path_resolver, ABCPathResolver, PathCache
+from mdclasses.utils.manifest import DumpManifest
+from mdclasses.query import ConfigurationQuery, QueryIndex
+from mdclasses.merkle import MerkleTree, object_content_hash
+from mdclasses.type_description import TypeDescription
+from mdclasses.supportable import Serializable, Supportable
 
 
-class Serializable(ABC):
+class SupportIndex:
+    """
+    Плоская таблица всех объектов с поддержкой конфигурации.
 
-    @abstractmethod
-    def to_dict(self) -> dict:
-        pass
+    Типы поддержки назначаются одним проходом по таблице uuid,
+    для каждого типа поддержки хранится битовая карта позиций объектов в таблице.
+    """
 
-    @classmethod
-    @abstractmethod
-    def from_dict(cls, args, kwargs):
-        pass
-    
+    SUPPORT_TYPES = {support_type.value: support_type for support_type in SupportType}
 
-class Supportable(Serializable):
+    def __init__(self, objects: List[Supportable]):
+        self.objects = objects
+        self.uuids = [obj.uuid for obj in objects]
+        self._uuid_bytes: Optional[List[Optional[bytes]]] = None
+        self._bitmaps: Dict[SupportType, int] = dict()
+        self._build_bitmaps()
 
-    def __init__(self, uuid: str = ''):
-        self.uuid = uuid
-        self.support_type = SupportType.NONE_SUPPORT
+    @property
+    def uuid_bytes(self) -> List[Optional[bytes]]:
+        if self._uuid_bytes is None:
+            self._uuid_bytes = [self._to_bytes(uuid) for uuid in self.uuids]
+        return self._uuid_bytes
 
-    def set_support(self, support: dict):
+    @staticmethod
+    def _to_bytes(uuid: str) -> Optional[bytes]:
         try:
-            self.support_type = SupportType(support[self.uuid])
-        except KeyError:
-            self.support_type = SupportType.NONE_SUPPORT
-
-    @property
-    def on_support(self) -> bool:
-        return self.support_type in [
-            SupportType.NOT_EDITABLE,
-            SupportType.EDITABLE_SUPPORT_ENABLED,
-            SupportType.NOT_SUPPORTED
-        ]
-    
-    def to_dict(self) -> dict:
-        return dict(
-            uuid=self.uuid,
-            support_type={self.uuid: self.support_type.value}
-        )
-
-    @classmethod
-    def from_dict(cls, *args, **kwargs):
-        data = args[0] if 'data' not in kwargs else kwargs['data']
+            return UUID(uuid).bytes
+        except ValueError:
+            return None
+
+    def assign(self, support: dict):
+        bytes_keys = isinstance(next(iter(support), None), bytes)
+        keys = self.uuid_bytes if bytes_keys else self.uuids
+
+        support_types = self.SUPPORT_TYPES
+        none_support = SupportType.NONE_SUPPORT.value
+        get_support = support.get
+
+        for obj, key in zip(self.objects, keys):
+            obj.support_type = support_types[get_support(key, none_support)]
+
+        self._build_bitmaps()
+
+    def _build_bitmaps(self):
+        size = (len(self.objects) + 7) // 8
+        bitmaps = {support_type: bytearray(size) for support_type in SupportType}
+        for position, obj in enumerate(self.objects):
+            bitmaps[obj.support_type][position >> 3] |= 1 << (position & 7)
+        self._bitmaps = {
+            support_type: int.from_bytes(bitmap, 'little') for support_type, bitmap in bitmaps.items()
+        }
+
+    def bitmap(self, *support_types: SupportType) -> int:
+        result = 0
+        for support_type in support_types:
+            result |= self._bitmaps[support_type]
+        return result
+
+    def objects_by_bitmap(self, bitmap: int) -> List[Supportable]:
+        result = []
+        data = bitmap.to_bytes((len(self.objects) + 7) // 8, 'little')
+        for byte_number, byte in enumerate(data):
+            if byte == 0:
+                continue
+            for bit in range(8):
+                if byte & (1 << bit):
+                    result.append(self.objects[(byte_number << 3) + bit])
+        return result
 
-        obj = cls(data['uuid']) if 'obj' not in kwargs else kwargs['obj']
+    def objects_by_support(self, *support_types: SupportType) -> List[Supportable]:
+        return self.objects_by_bitmap(self.bitmap(*support_types))
 
-        obj.uuid = data['uuid']
-        obj.set_support(data['support_type'])
+    def __len__(self):
+        return len(self.objects)
 
 
 class SubSystem(Supportable):
@@ -68,6 +107,10 @@ class SubSystem(Supportable):
 
         self.file_format = file_format
         self.__path_resolver: Optional[ABCPathResolver] = None
+        self._path_cache = PathCache()
+        # Корень вложенной подсистемы кэшируется отдельно: ключ его кэша (родитель и его корень) отличается
+        # от ключа кэша путей подсистемы, в общем кэше они сбрасывали бы друг друга
+        self._root_path_cache = PathCache()
 
         self.line_number = line_number
 
@@ -80,18 +123,27 @@ class SubSystem(Supportable):
         self._childes: Optional[List[Union['SubSystem', ObjectType]]] = None
 
     @property
-    def childes(self) -> List[Union['SubSystem', ObjectType]]:
+    def childes(self) -> List[Union['SubSystem', 'ConfObject']]:
         if self._childes is None:
-            self._childes = list()
-            for obj_type, name in self._childes_names:
-                self._childes.append(self.parent.get_object(name, obj_type))
+            self._childes = self.configuration.subsystem_index.members(self)
         return self._childes
 
+    @property
+    def configuration(self) -> 'Configuration':
+        parent = self.parent
+        while isinstance(parent, SubSystem):
+            parent = parent.parent
+        return parent
+
+    def members(self, recursive: bool = False) -> List[Union['SubSystem', 'ConfObject']]:
+        return self.configuration.subsystem_index.members(self, recursive)
+
     def get_object(self, name: str, obj_type: Union[ObjectType, str]):
         return self.parent.get_object(name, obj_type)
 
     def set_childes(self, childes: Dict[str, list]):
         self._childes_names = childes['others']
+        self._childes = None
 
     @property
     def path_resolver(self) -> ABCPathResolver:
@@ -99,22 +151,43 @@ class SubSystem(Supportable):
             self.__path_resolver = get_path_resolver(self.file_format)
         return self.__path_resolver
 
+    def _cached_path(self, name: str, factory) -> Path:
+        return self._path_cache.get((self.parent, self.root_path, self.name, self.file_format), name, factory)
+
     @property
     def root_path(self) -> Path:
-        if isinstance(self.parent, Configuration):
-            return self.parent.root_path
+        parent = self.parent
+        if isinstance(parent, Configuration):
+            return parent.root_path
         else:
-            parent_ext_path = self.path_resolver.ext_path(self.parent.obj_type, self.parent.name)
-            return self.parent.root_path.joinpath(parent_ext_path.parent)
+            return self._root_path_cache.get(
+                (parent, parent.root_path, parent.name, self.file_format),
+                'root_path',
+                lambda: parent.root_path.joinpath(self.path_resolver.obj_dir(parent.obj_type, parent.name))
+            )
 
     @property
     def file_name(self) -> Path:
-        return self.root_path.joinpath(self.path_resolver.conf_file_path(self.obj_type, self.name))
+        return self._cached_path(
+            'file_name',
+            lambda: self.root_path.joinpath(self.path_resolver.conf_file_path(self.obj_type, self.name))
+        )
 
     @property
     def full_name(self):
         return f'{self.obj_type.value}.{self.name}'
 
+    @property
+    def qualified_name(self) -> str:
+        # Имя с именами родительских подсистем: вложенные подсистемы разных родителей могут называться одинаково
+        if isinstance(self.parent, SubSystem):
+            return f'{self.parent.qualified_name}.{self.name}'
+        return self.name
+
+    @property
+    def content_hash(self) -> str:
+        return object_content_hash(self)
+
     @property
     def level(self):
         if self.parent.obj_type == ObjectType.CONFIGURATION:
@@ -144,6 +217,7 @@ class SubSystem(Supportable):
         obj.uuid = data['uuid']
         obj.set_support(data['support_type'])
         obj.parent = parent
+        obj._childes_names = [(obj_type, name) for name, obj_type in data.get('childes', [])]
 
         return obj
 
@@ -151,6 +225,126 @@ class SubSystem(Supportable):
         return f'<Subsystem: {self.name}>'
 
 
+class SubSystemIndex:
+    """
+    Состав подсистем в обе стороны: объекты подсистемы и подсистемы, в которые входит объект.
+
+    Объекты вложенных подсистем считаются входящими и во все родительские подсистемы.
+    Объекты идентифицируются полным именем (Тип.Имя), как в Configuration.get_object, подсистемы -
+    именем с именами родителей (SubSystem.qualified_name): вложенные подсистемы разных родителей
+    могут называться одинаково.
+    """
+
+    def __init__(self, objects: List[Union['SubSystem', 'ConfObject']]):
+        self._objects: Dict[str, Union['SubSystem', 'ConfObject']] = dict()
+        for obj in objects:
+            self._objects.setdefault(obj.full_name, obj)
+        self._members: Dict[str, List[Union['SubSystem', 'ConfObject']]] = dict()
+        self._all_members: Dict[str, List[Union['SubSystem', 'ConfObject']]] = dict()
+        self._subsystems: Dict[str, List['SubSystem']] = dict()
+        self._all_subsystems: Dict[str, List['SubSystem']] = dict()
+        self._subsystem_objects: Dict[str, 'SubSystem'] = dict()
+        # Пары (подсистема, объект) полного состава: проверка повторов без поиска в списках
+        self._all_pairs: Set[Tuple[str, str]] = set()
+
+        for obj in objects:
+            if obj.obj_type == ObjectType.SUBSYSTEM:
+                self._add_subsystem(obj)
+
+    @staticmethod
+    def _key(obj: Union['SubSystem', 'ConfObject']) -> str:
+        if obj.obj_type == ObjectType.SUBSYSTEM:
+            return f'{obj.obj_type.value}.{obj.qualified_name}'
+        return obj.full_name
+
+    def _add_subsystem(self, subsystem: 'SubSystem'):
+        key = self._key(subsystem)
+        if key in self._members:
+            return
+
+        members = []
+        for obj_type, name in subsystem._childes_names:
+            obj = self._objects.get(f'{ObjectType(obj_type).value}.{name}')
+            if obj is not None:
+                members.append(obj)
+        self._members[key] = members
+        self._subsystem_objects[key] = subsystem
+        subsystem._childes = members
+
+        ancestors = [subsystem]
+        parent = subsystem.parent
+        while isinstance(parent, SubSystem):
+            ancestors.append(parent)
+            parent = parent.parent
+
+        for obj in members:
+            obj_key = self._key(obj)
+            self._subsystems.setdefault(obj_key, []).append(subsystem)
+            for ancestor in ancestors:
+                ancestor_key = self._key(ancestor)
+                if (ancestor_key, obj_key) in self._all_pairs:
+                    continue
+                self._all_pairs.add((ancestor_key, obj_key))
+                self._all_members.setdefault(ancestor_key, []).append(obj)
+                self._all_subsystems.setdefault(obj_key, []).append(ancestor)
+
+    def members(self, subsystem: 'SubSystem', recursive: bool = False) -> List[Union['SubSystem', 'ConfObject']]:
+        index = self._all_members if recursive else self._members
+        return list(index.get(self._key(subsystem), []))
+
+    def subsystems(self, obj: Union['SubSystem', 'ConfObject'], recursive: bool = True) -> List['SubSystem']:
+        index = self._all_subsystems if recursive else self._subsystems
+        return list(index.get(self._key(obj), []))
+
+    def to_dict(self) -> dict:
+        # Ключ - SubSystem.qualified_name, порядок подсистем - порядок их в составе конфигурации
+        data = dict()
+        for key, members in self._members.items():
+            subsystem = self._subsystem_objects[key]
+            data[subsystem.qualified_name] = dict(
+                parent=subsystem.parent.qualified_name if isinstance(subsystem.parent, SubSystem) else None,
+                members=[obj.full_name for obj in members]
+            )
+        return data
+
+
+class ReferenceIndex:
+    """
+    Обратный индекс ссылок между объектами: какие объекты ссылаются на объект (по типам реквизитов,
+    RegisterRecords, BasedOn и другим свойствам). Строится одним проходом по ссылкам объектов.
+    """
+
+    def __init__(self, objects: List[Union['SubSystem', 'ConfObject']]):
+        self._objects: Dict[str, Union['SubSystem', 'ConfObject']] = {obj.full_name: obj for obj in objects}
+        self._references: Dict[str, List[tuple]] = dict()
+        self._referenced_by: Dict[str, List['ConfObject']] = dict()
+
+        for obj in objects:
+            for target, path in getattr(obj, 'references', []):
+                self._references.setdefault(target, []).append((obj, path))
+                referenced_by = self._referenced_by.setdefault(target, [])
+                if not referenced_by or referenced_by[-1] is not obj:
+                    referenced_by.append(obj)
+
+    @staticmethod
+    def _key(obj: Union['SubSystem', 'ConfObject', str]) -> str:
+        return obj if isinstance(obj, str) else obj.full_name
+
+    def referenced_by(self, obj: Union['SubSystem', 'ConfObject', str]) -> List['ConfObject']:
+        return list(self._referenced_by.get(self._key(obj), []))
+
+    def references(self, obj: Union['SubSystem', 'ConfObject', str]) -> List[tuple]:
+        # Ссылки на объект: (ссылающийся объект, путь к свойству)
+        return list(self._references.get(self._key(obj), []))
+
+    def is_referenced(self, obj: Union['SubSystem', 'ConfObject', str]) -> bool:
+        return self._key(obj) in self._referenced_by
+
+    def unresolved(self) -> List[str]:
+        # Ссылки на объекты, которых нет в конфигурации
+        return [target for target in self._references if target not in self._objects]
+
+
 class ConfObject(Supportable):
 
     def __init__(self, name: str, obj_type: Union[ObjectType, str], parent: 'Configuration',
@@ -159,6 +353,7 @@ class ConfObject(Supportable):
 
         self.file_format = file_format
         self.__path_resolver: Optional[ABCPathResolver] = None
+        self._path_cache = PathCache()
 
         if props is None:
             props = {}
@@ -178,9 +373,12 @@ class ConfObject(Supportable):
             self.obj_type = obj_type
 
         self.forms: List[Form] = list()
-        self.templates = list()
-        self.commands = list()
+        self.templates: List[Template] = list()
+        self.commands: List[ObjectChild] = list()
         self.attributes: List[ObjectAttribute] = list()
+        # Ссылки на другие объекты: (полное имя объекта, путь к свойству)
+        self.references: List[tuple] = list()
+        self._template: Optional[Template] = None
 
     @property
     def path_resolver(self) -> ABCPathResolver:
@@ -192,9 +390,20 @@ class ConfObject(Supportable):
     def full_name(self):
         return f'{self.obj_type.value}.{self.name}'
 
+    @property
+    def content_hash(self) -> str:
+        return object_content_hash(self)
+
+    def _cached_path(self, name: str, factory) -> Path:
+        return self._path_cache.get((self.parent, self.root_path, self.name, self.obj_type, self.file_format),
+                                    name, factory)
+
     @property
     def file_name(self) -> Path:
-        return self.root_path.joinpath(self.path_resolver.conf_file_path(self.obj_type, self.name))
+        return self._cached_path(
+            'file_name',
+            lambda: self.root_path.joinpath(self.path_resolver.conf_file_path(self.obj_type, self.name))
+        )
 
     @property
     def root_path(self) -> Path:
@@ -202,61 +411,179 @@ class ConfObject(Supportable):
 
     @property
     def obj_type_dir(self) -> Path:
-        return self.file_name.parent
+        return self._cached_path(
+            'obj_type_dir',
+            lambda: self.root_path.joinpath(self.path_resolver.type_path(self.obj_type))
+        )
 
     @property
     def obj_dir(self) -> Path:
-        return self.ext_path.parent
+        return self._cached_path(
+            'obj_dir',
+            lambda: self.root_path.joinpath(self.path_resolver.obj_dir(self.obj_type, self.name)).absolute()
+        )
 
     @property
     def form_path(self):
-        return self.root_path.joinpath(self.path_resolver.form_path(self.obj_type, self.name))
+        return self._cached_path(
+            'form_path',
+            lambda: self.root_path.joinpath(self.path_resolver.form_path(self.obj_type, self.name))
+        )
 
     @property
     def ext_path(self) -> Path:
-        return self.root_path.joinpath(self.path_resolver.ext_path(self.obj_type, self.name)).absolute()
+        return self._cached_path(
+            'ext_path',
+            lambda: self.root_path.joinpath(self.path_resolver.ext_path(self.obj_type, self.name)).absolute()
+        )
 
-    def read_modules(self):
-        ext_path = self.ext_path
+    @property
+    def manifest(self) -> DumpManifest:
+        return self.parent.manifest
+
+    def module_files(self) -> Dict[str, Path]:
+        """
+        Файлы модулей объекта по имени модуля: имя файла для модулей объекта,
+        Форма.<имя формы>.<имя файла> для модулей форм.
+        """
+        manifest = self.manifest
+        result = {path.stem: path for path in manifest.files(self.ext_path, '.bsl')}
+
+        if self.obj_type == ObjectType.COMMON_FORM:
+            for path in manifest.files(self.ext_path.joinpath('Form'), '.bsl'):
+                result[f'Форма.{path.stem}'] = path
+            return result
+        if self.obj_type == ObjectType.CONSTANT:
+            # Форма констант - общая форма, ее модуль относится к общим формам
+            return result
 
-        if not ext_path.exists():
-            return
+        try:
+            form_path = self.form_path
+        except ValueError:
+            return result
 
+        path_resolver = self.path_resolver
+        for form_dir in manifest.dirs(form_path):
+            for path in manifest.files(path_resolver.form_module_dir(form_dir), '.bsl'):
+                result[f'Форма.{form_dir.name}.{path.stem}'] = path
+        return result
+
+    def read_modules(self, cache: Optional[ModuleCache] = None):
         parser = ModuleParser()
 
-        for element in ext_path.iterdir():
-            if element.is_file() and element.suffix == '.bsl':
-                self.modules.append(create_module(parser, element, self))
+        for element in self.manifest.files(self.ext_path, '.bsl'):
+            self.modules.append(create_module(parser, element, self, cache=cache))
+
+    async def aread_modules(self, cache: Optional[ModuleCache] = None, executor: Optional[Executor] = None):
+        """
+        Асинхронное чтение модулей: модули разбираются одновременно в executor (по умолчанию - executor цикла).
+        При отмене еще не начатые разборы отменяются, модули объекта не изменяются.
+        """
+        loop = asyncio.get_running_loop()
+        parser = ModuleParser()
 
-    def read_forms(self):
+        paths = await loop.run_in_executor(executor, self.manifest.files, self.ext_path, '.bsl')
+        futures = [loop.run_in_executor(executor, create_module, parser, path, self, cache) for path in paths]
+        try:
+            modules = await asyncio.gather(*futures)
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+
+        self.modules.extend(modules)
+
+    def read_forms(self, parse_modules: bool = False, workers: Optional[int] = None,
+                   cache: Optional[ModuleCache] = None):
+        """
+        Чтение списка форм объекта с диска. Модули форм разбираются при первом обращении к Form.module,
+        с parse_modules=True модули всех форм разбираются сразу, параллельно.
+
+        Список форм заполняется при чтении описания объекта, чтение с диска дополняет его формами,
+        не указанными в описании, uuid и строка формы из описания сохраняются.
+        """
+        known = {form.name: form for form in self.forms}
         self.forms = []
 
+        manifest = self.manifest
         forms_path = self.form_path
 
-        if not forms_path.exists():
-            return
-
         forms = {}
 
-        for element in forms_path.iterdir():
-            if element.is_file() and element.suffix == '.xml':
-                name = element.stem
-                if name in forms:
-                    forms[name]['description_path'] = element
-                else:
-                    forms[name] = dict(description_path=element, structure_path='')
-            elif element.is_dir():
-                struct_path = element.joinpath('Ext', 'Form', 'Form.xml')
-                name = element.stem
-                if name in forms:
-                    forms[name]['structure_path'] = struct_path
-                else:
-                    forms[name] = dict(description_path='', structure_path=struct_path)
-
-        self.forms.extend(
-            [Form(**v) for v in forms.values()]
+        for element in manifest.files(forms_path, '.xml'):
+            name = element.stem
+            if name in forms:
+                forms[name]['description_path'] = element
+            else:
+                forms[name] = dict(description_path=element, structure_path='')
+
+        path_resolver = self.path_resolver
+        for element in manifest.dirs(forms_path):
+            struct_path = path_resolver.form_structure_path(element)
+            name = element.stem
+            if name in forms:
+                forms[name]['structure_path'] = struct_path
+            else:
+                # В формате EDT описание и структура формы хранятся в одном файле каталога формы
+                forms[name] = dict(description_path=struct_path, structure_path=struct_path)
+            forms[name]['name'] = name
+            forms[name]['module_dir'] = path_resolver.form_module_dir(element)
+
+        for name, form_data in forms.items():
+            form = Form(**form_data, manifest=manifest)
+            known_form = known.get(name)
+            if known_form is not None:
+                form.uuid = known_form.uuid
+                form.line_number = known_form.line_number
+                form.support_type = known_form.support_type
+            self.forms.append(form)
+        # Формы из описания объекта, которых нет на диске, остаются в списке
+        self.forms.extend(form for name, form in known.items() if name not in forms)
+
+        if parse_modules and self.forms:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda form: form.read_module(cache=cache), self.forms))
+
+    def _create_template(self, template_data: dict) -> Template:
+        path_resolver = self.path_resolver
+        template_dir = self.root_path.joinpath(
+            path_resolver.template_path(self.obj_type, self.name, template_data['name'])
+        )
+        return Template.from_dict(
+            template_data,
+            data_dir=path_resolver.template_data_dir(template_dir),
+            description_path=path_resolver.template_description_path(template_dir)
         )
 
+    @property
+    def template(self) -> Optional[Template]:
+        """
+        Макет общего макета, для остальных объектов - None.
+        """
+        if self.obj_type != ObjectType.COMMON_TEMPLATE:
+            return None
+        if self._template is None:
+            self._template = self._create_template(dict(
+                name=self.name,
+                uuid=self.uuid,
+                line_number=self.line_number,
+                template_type=self.props.get('TemplateType')
+            ))
+        return self._template
+
+    def read_templates(self):
+        """
+        Поиск макетов объекта на диске. Список макетов заполняется при чтении описания объекта,
+        поиск дополняет его макетами, не указанными в описании.
+        """
+        known = {template.name for template in self.templates}
+        templates_dir = self.root_path.joinpath(self.path_resolver.template_path(self.obj_type, self.name))
+
+        for template_dir in self.manifest.dirs(templates_dir):
+            if template_dir.name not in known:
+                known.add(template_dir.name)
+                self.templates.append(self._create_template(dict(name=template_dir.name, uuid='', line_number=0)))
+
     def set_support(self, support: dict):
 
         super(ConfObject, self).set_support(support)
@@ -273,20 +600,39 @@ class ConfObject(Supportable):
         for attribute in self.attributes:
             attribute.set_support(support)
 
+    def supportables(self) -> Iterator[Supportable]:
+        yield self
+        for child in self.forms + self.templates + self.commands:
+            if isinstance(child, Supportable):
+                yield from child.supportables()
+        for attribute in self.attributes:
+            yield from attribute.supportables()
+
     def set_childes(self, childes: Dict[str, list]):
         self.set_attributes(childes['attributes'])
         self.set_forms(childes['forms'])
         self.set_templates(childes['templates'])
         self.set_commands(childes['commands'])
-
-    def set_forms(self, forms):
-        pass
-
-    def set_templates(self, templates):
-        pass
-
-    def set_commands(self, commands):
-        pass
+        self.references = [tuple(ref) for ref in childes.get('references', [])]
+
+    def set_forms(self, forms: List[dict]):
+        path_resolver = self.path_resolver
+        for form_data in forms:
+            form_dir = self.form_path.joinpath(form_data['name'])
+            self.forms.append(Form.from_dict(
+                form_data,
+                description_path=path_resolver.form_description_path(form_dir),
+                structure_path=path_resolver.form_structure_path(form_dir),
+                module_dir=path_resolver.form_module_dir(form_dir)
+            ))
+
+    def set_templates(self, templates: List[dict]):
+        for template_data in templates:
+            self.templates.append(self._create_template(template_data))
+
+    def set_commands(self, commands: List[dict]):
+        for command_data in commands:
+            self.commands.append(ObjectChild.from_dict(command_data, self, 'Command'))
 
     def set_attributes(self, attributes: List[dict]):
         for attr_data in attributes:
@@ -302,6 +648,7 @@ class ConfObject(Supportable):
                 forms=[form.to_dict() for form in self.forms],
                 templates=[template.to_dict() for template in self.templates],
                 commands=[command.to_dict() for command in self.commands],
+                references=[list(ref) for ref in self.references],
                 line_number=self.line_number,
                 file_format=self.file_format.value,
                 props=self.props
@@ -330,12 +677,15 @@ class ConfObject(Supportable):
 
 class ObjectAttribute(Supportable):
 
-    def __init__(self, name: str, uuid: str, parent: Union[ConfObject, 'ObjectAttribute'], line_number: int):
+    def __init__(self, name: str, uuid: str, parent: Union[ConfObject, 'ObjectAttribute'], line_number: int,
+                 attr_type: Optional[TypeDescription] = None):
         super(ObjectAttribute, self).__init__(uuid)
         self.parent: Union[ConfObject, 'ObjectAttribute'] = parent
         self.name: str = name
         self.attributes: List[ObjectAttribute] = list()
         self.line_number: int = line_number
+        # Для табличных частей тип не задан
+        self.type: Optional[TypeDescription] = attr_type
 
     def set_attributes(self, attributes: List[dict]):
         for attr_data in attributes:
@@ -355,13 +705,19 @@ class ObjectAttribute(Supportable):
         for attr in self.attributes:
             attr.set_support(support)
 
+    def supportables(self) -> Iterator[Supportable]:
+        yield self
+        for attr in self.attributes:
+            yield from attr.supportables()
+
     @classmethod
     def from_dict(cls, attr_data: dict, parent: Union[ConfObject, 'ObjectAttribute']) -> 'ObjectAttribute':
         attr = cls(
             name=attr_data['name'],
             uuid=attr_data['uuid'],
             parent=parent,
-            line_number=attr_data['line_number']
+            line_number=attr_data['line_number'],
+            attr_type=TypeDescription.from_dict(attr_data.get('type'))
         )
         if 'attributes' in attr_data:
             attr.set_attributes(attr_data['attributes'])
@@ -373,7 +729,8 @@ class ObjectAttribute(Supportable):
             dict(
                 name=self.name,
                 attributes=[attr.to_dict() for attr in self.attributes],
-                line_number=self.line_number
+                line_number=self.line_number,
+                type=None if self.type is None else self.type.to_dict()
             )
         )
         return data
@@ -386,6 +743,46 @@ class ObjectAttribute(Supportable):
         return f'<ObjectAttribute: {self.parent}.{self.name}>'
 
 
+class ObjectChild(Supportable):
+    """
+    Подчиненный объект метаданных, который полностью описан в описании объекта (команда).
+    """
+
+    def __init__(self, name: str, uuid: str, parent: ConfObject, line_number: int, child_type: str):
+        super(ObjectChild, self).__init__(uuid)
+        self.parent = parent
+        self.name = name
+        self.line_number = line_number
+        self.child_type = child_type
+
+    @property
+    def full_name(self):
+        return f'{self.parent.full_name}.{self.child_type}.{self.name}'
+
+    @classmethod
+    def from_dict(cls, data: dict, parent: ConfObject, child_type: str) -> 'ObjectChild':
+        return cls(
+            name=data['name'],
+            uuid=data['uuid'],
+            parent=parent,
+            line_number=data['line_number'],
+            child_type=child_type
+        )
+
+    def to_dict(self):
+        data = super(ObjectChild, self).to_dict()
+        data.update(
+            dict(
+                name=self.name,
+                line_number=self.line_number
+            )
+        )
+        return data
+
+    def __repr__(self):
+        return f'<ObjectChild: {self.full_name}>'
+
+
 class Configuration(Supportable):
 
     def __init__(self, uuid: str, props: dict, conf_objects: List[dict], root_path: Path, name: str,
@@ -394,6 +791,7 @@ class Configuration(Supportable):
 
         self._parser: 'ABCConfigParser' = parser
         self.name = name
+        self.obj_type = ObjectType.CONFIGURATION
         self.root_path = Path(root_path)
         self.file_format = file_format
 
@@ -401,18 +799,30 @@ class Configuration(Supportable):
         self.support_type = SupportType.NONE_SUPPORT
         self.props = props
         self.__path_resolver: Optional[ABCPathResolver] = None
+        self._module_index: Optional[ModuleIndex] = None
+        self._support_index: Optional[SupportIndex] = None
+        self._query_index: Optional[QueryIndex] = None
+        self._subsystem_index: Optional[SubSystemIndex] = None
+        self._manifest: Optional[DumpManifest] = None
+        self._manifest_lock = threading.Lock()
+        self._merkle_tree: Optional[MerkleTree] = None
+        self._reference_index: Optional[ReferenceIndex] = None
+        # Конфигурация восстановлена из словаря (json): файлов выгрузки у нее нет
+        self._restored = False
 
     def read_child(self, conf_obj: dict) -> Union[ConfObject, SubSystem]:
         if conf_obj['obj_type'] == 'Subsystem':
             return SubSystem(
                 name=conf_obj['obj_name'],
-                parent=self
+                parent=self,
+                file_format=self.file_format
             )
         else:
             return ConfObject(
                 name=conf_obj['obj_name'],
                 obj_type=conf_obj['obj_type'],
-                parent=self
+                parent=self,
+                file_format=self.file_format
             )
 
     @property
@@ -429,10 +839,112 @@ class Configuration(Supportable):
                 continue
             conf_support.update(support_data[key]['conf_objects'])
 
-        super(Configuration, self).set_support(conf_support)
+        self._support_index = SupportIndex(list(self.supportables()))
+        self._support_index.assign(conf_support)
+        self._query_index = None
+
+    def supportables(self) -> Iterator[Supportable]:
+        yield self
+        for obj in self.conf_objects:
+            yield from obj.supportables()
+
+    @property
+    def support_index(self) -> SupportIndex:
+        if self._support_index is None:
+            self._support_index = SupportIndex(list(self.supportables()))
+        return self._support_index
+
+    def objects_by_support(self, *support_types: SupportType) -> List[Supportable]:
+        return self.support_index.objects_by_support(*support_types)
+
+    @property
+    def query_index(self) -> QueryIndex:
+        if self._query_index is None:
+            self._query_index = QueryIndex(self)
+        return self._query_index
+
+    def query(self, **kwargs) -> ConfigurationQuery:
+        return ConfigurationQuery(self).filter(**kwargs)
 
+    @property
+    def subsystem_index(self) -> SubSystemIndex:
+        if self._subsystem_index is None:
+            self._subsystem_index = SubSystemIndex(self.conf_objects)
+        return self._subsystem_index
+
+    def subsystems(self, obj: Union[ConfObject, SubSystem], recursive: bool = True) -> List[SubSystem]:
+        return self.subsystem_index.subsystems(obj, recursive)
+
+    @property
+    def reference_index(self) -> ReferenceIndex:
+        if self._reference_index is None:
+            self._reference_index = ReferenceIndex(self.conf_objects)
+        return self._reference_index
+
+    def referenced_by(self, obj: Union[ConfObject, SubSystem, str]) -> List[ConfObject]:
+        return self.reference_index.referenced_by(obj)
+
+    def templates(self, *template_types: TemplateType) -> List[Template]:
+        """
+        Макеты объектов и общие макеты конфигурации, с template_types - только макеты указанных типов.
+        Данные макетов (payload) держат открытые файлы: после чтения payload макет закрывается (close или with).
+        """
+        result = []
         for obj in self.conf_objects:
-            obj.set_support(conf_support)
+            if not isinstance(obj, ConfObject):
+                continue
+            if obj.template is not None:
+                result.append(obj.template)
+            result.extend(obj.templates)
+        if template_types:
+            result = [template for template in result if template.template_type in template_types]
+        return result
+
+    def dcs_queries(self, workers: Optional[int] = None) -> Iterator[Tuple[Template, List[DCSQuery]]]:
+        """
+        Запросы схем компоновки данных всех макетов конфигурации: (макет, запросы).
+        Схемы читаются параллельно, результаты выдаются в порядке макетов. Файлы схем не остаются открытыми,
+        payload макетов не отображается в память.
+        """
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            templates = self.templates()
+            # Тип макета определяется в потоках: для макетов выгрузки конфигуратора читается описание макета
+            for template, queries in zip(templates, executor.map(Template.queries, templates)):
+                if template.is_dcs:
+                    yield template, queries
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @property
+    def manifest(self) -> DumpManifest:
+        # Манифест запрашивается из потоков (дерево хешей, сравнение): выгрузка сканируется один раз
+        with self._manifest_lock:
+            if self._manifest is None or self._manifest.root_path != self.root_path:
+                self._manifest = DumpManifest(self.root_path)
+            return self._manifest
+
+    def reset_manifest(self):
+        self._manifest = None
+
+    def reset_indexes(self):
+        self._support_index = None
+        self._query_index = None
+        self._subsystem_index = None
+        self._merkle_tree = None
+        self._reference_index = None
+
+    @property
+    def merkle_tree(self) -> MerkleTree:
+        if self._merkle_tree is None:
+            if self._restored and self.root_path == Path(''):
+                raise ValueError('Конфигурация прочитана из json без дерева хешей, файлов выгрузки для его построения нет')
+            self._merkle_tree = MerkleTree.build(self)
+        return self._merkle_tree
+
+    @property
+    def content_hash(self) -> str:
+        return self.merkle_tree.hash
 
     def get_object(self, name: str, obj_type: Union[ObjectType, str]) -> Union[ConfObject, SubSystem]:
         cur_obj_type = obj_type
@@ -445,6 +957,68 @@ class Configuration(Supportable):
         except IndexError:
             raise IndexError(f'Объект не найден! Имя:{name} Тип:{obj_type}')
 
+    def module_index(self, index_path: Optional[Union[str, Path]] = None, refresh: bool = False) -> ModuleIndex:
+        """
+        Индекс идентификаторов модулей конфигурации.
+        Индекс обновляется по измененным модулям при построении и при refresh=True, между обновлениями
+        выгрузка не сканируется. Если указан index_path, индекс читается из файла и сохраняется после обновления.
+        """
+        if self._module_index is None or self._module_index.root_path != self.root_path:
+            if index_path is not None and Path(index_path).exists():
+                self._module_index = ModuleIndex.load(index_path, self.root_path)
+            else:
+                self._module_index = ModuleIndex(self.root_path)
+            refresh = True
+
+        if refresh:
+            self._module_index.update()
+            if index_path is not None:
+                self._module_index.save(index_path)
+
+        return self._module_index
+
+    def search_modules(self, token: str, index_path: Optional[Union[str, Path]] = None,
+                       refresh: bool = False) -> List[IndexEntry]:
+        entries = self.module_index(index_path, refresh).search(token)
+        return resolve_sub_programs(entries)
+
+    def module_queries(self, workers: Optional[int] = None, cache: Optional[ModuleCache] = None) -> ModuleQueryIndex:
+        """
+        Индекс запросов в модулях объектов и форм: объект метаданных - запросы, которые читают его таблицы.
+        Модули разбираются параллельно.
+        """
+        paths = [(path, obj) for obj in self.conf_objects if isinstance(obj, ConfObject)
+                 for path in obj.module_files().values()]
+        return ModuleQueryIndex.build(paths, workers=workers, cache=cache)
+
+    def lint_modules(self, linter: Optional[ModuleLinter] = None, workers: Optional[int] = None) -> Iterator[LintIssue]:
+        """
+        Проверка модулей объектов и форм правилами производительности (запросы и поиск в цикле,
+        обращения через точку, серверные вызовы из клиентского кода). Модули проверяются параллельно.
+        """
+        linter = ModuleLinter() if linter is None else linter
+        paths = [(path, obj) for obj in self.conf_objects if isinstance(obj, ConfObject)
+                 for path in obj.module_files().values()]
+        return linter.lint_files(paths, workers=workers)
+
+    async def aread_all_modules(self, cache: Optional[ModuleCache] = None, executor: Optional[Executor] = None,
+                                concurrency: int = 8):
+        """
+        Асинхронное чтение модулей всех объектов конфигурации.
+        Одновременно читаются модули не более чем concurrency объектов, между объектами управление
+        возвращается циклу событий.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def read_object_modules(obj: ConfObject):
+            async with semaphore:
+                await obj.aread_modules(cache=cache, executor=executor)
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*[
+            read_object_modules(obj) for obj in self.conf_objects if isinstance(obj, ConfObject)
+        ])
+
     def add_object(self, obj: ConfObject):
         try:
             self.get_object(obj.name, obj.obj_type)
@@ -456,6 +1030,7 @@ class Configuration(Supportable):
             new_object = self.clone_object(obj)
 
         self.conf_objects.append(new_object)
+        self.reset_indexes()
 
         return new_object
 
@@ -469,7 +1044,11 @@ class Configuration(Supportable):
             type_path.mkdir()
 
         shutil.copytree(obj.obj_dir, new_object.obj_dir)
+        if obj.file_name.parent.absolute() == obj.obj_dir:
+            # Описание объекта лежит в каталоге объекта (EDT) и скопировано под старым именем
+            new_object.obj_dir.joinpath(obj.file_name.name).unlink()
         shutil.copy(obj.file_name, new_object.file_name)
+        self.reset_manifest()
 
         return new_object
 
@@ -497,9 +1076,32 @@ class Configuration(Supportable):
                 obj = ConfObject.from_dict(obj_data, conf)
             conf.conf_objects.append(obj)
 
+        # Состав подсистем сохранен в порядке подсистем конфигурации: одноименные вложенные подсистемы
+        # разных родителей сопоставляются по порядку, а не по имени
+        subsystems = [obj for obj in conf.conf_objects if obj.obj_type == ObjectType.SUBSYSTEM]
+        subsystems_data = list(data.get('subsystems', {}).items())
+        by_name = dict()
+        for subsystem, (qualified_name, subsystem_data) in zip(subsystems, subsystems_data):
+            if qualified_name.rsplit('.', 1)[-1] != subsystem.name:
+                break
+            by_name[qualified_name] = (subsystem, subsystem_data)
+
+        for subsystem, subsystem_data in by_name.values():
+            parent = subsystem_data['parent']
+            if parent is not None and parent in by_name:
+                subsystem.parent = by_name[parent][0]
+            subsystem._childes_names = [el.split('.', 1) for el in subsystem_data['members']]
+
+        conf._restored = True
+        if 'hashes' in data:
+            conf._merkle_tree = MerkleTree.from_dict(data['hashes'])
+
         return conf
 
-    def to_dict(self):
+    def to_dict(self, hashes: bool = False):
+        """
+        hashes - добавить дерево хешей конфигурации. Для построения дерева читаются все модули выгрузки.
+        """
         data = super(Configuration, self).to_dict()
         data.update(
              dict(
@@ -508,8 +1110,11 @@ class Configuration(Supportable):
                 conf_objects=[obj.to_dict() for obj in self.conf_objects],
                 props=self.props,
                 file_format=self.file_format.value,
+                subsystems=self.subsystem_index.to_dict(),
             )
         )
+        if hashes:
+            data['hashes'] = self.merkle_tree.to_dict()
         return data
 
     def save_to_file(self):
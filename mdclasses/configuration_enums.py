@@ -69,4 +69,17 @@ class SupportType(enum.Enum):
     NOT_EDITABLE = 0
     EDITABLE_SUPPORT_ENABLED = 1
     NOT_SUPPORTED = 2
-    NONE_SUPPORT = 3
\ No newline at end of file
+    NONE_SUPPORT = 3
+
+
+class TemplateType(enum.Enum):
+    SPREADSHEET_DOCUMENT = 'SpreadsheetDocument'
+    BINARY_DATA = 'BinaryData'
+    ACTIVE_DOCUMENT = 'ActiveDocument'
+    HTML_DOCUMENT = 'HTMLDocument'
+    TEXT_DOCUMENT = 'TextDocument'
+    GEOGRAPHICAL_SCHEMA = 'GeographicalSchema'
+    GRAPHICAL_SCHEMA = 'GraphicalSchema'
+    DATA_COMPOSITION_SCHEMA = 'DataCompositionSchema'
+    DATA_COMPOSITION_APPEARANCE_TEMPLATE = 'DataCompositionAppearanceTemplate'
+    ADD_IN = 'AddIn'
@@ -0,0 +1,277 @@
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from pathlib import Path
+
+from mdclasses.conf_base import Configuration, ConfObject, ObjectAttribute, SubSystem
+from mdclasses.Module import ModuleParser, ModuleCache, create_module
+from mdclasses.Module.Module import SubProgram
+from mdclasses.merkle import object_key
+from mdclasses.utils.file_utils import file_digest
+from mdclasses.utils.instrumentation import phase
+
+
+class ChangeType(Enum):
+    ADDED = 'added'
+    REMOVED = 'removed'
+    CHANGED = 'changed'
+
+
+class Change:
+    """
+    Запись об изменении.
+
+    kind - вид изменившегося элемента: object, prop, attribute, content (состав подсистемы),
+    module, sub_program. obj_name - полное имя объекта, path - путь к элементу внутри объекта.
+    """
+
+    __slots__ = ('change_type', 'kind', 'obj_name', 'path', 'old', 'new')
+
+    def __init__(self, change_type: ChangeType, kind: str, obj_name: str, path: str = '', old=None, new=None):
+        self.change_type = change_type
+        self.kind = kind
+        self.obj_name = obj_name
+        self.path = path
+        self.old = old
+        self.new = new
+
+    def to_dict(self) -> dict:
+        return dict(
+            change_type=self.change_type.value,
+            kind=self.kind,
+            obj_name=self.obj_name,
+            path=self.path,
+            old=_plain(self.old),
+            new=_plain(self.new),
+        )
+
+    def __repr__(self):
+        path = f' {self.path}' if self.path else ''
+        return f'<Change: {self.change_type.value} {self.kind} {self.obj_name}{path}>'
+
+
+def _object_key(obj: Union[ConfObject, SubSystem]) -> str:
+    return f'{obj.obj_type.value}.{object_key(obj)}'
+
+
+def _plain(value):
+    return str(value) if isinstance(value, Path) else value
+
+
+ConfElement = Union[ConfObject, SubSystem]
+
+
+class ConfigurationDiff:
+    """
+    Сравнение двух выгрузок конфигурации.
+
+    Объекты сопоставляются по uuid, оставшиеся - по (тип, имя). Свойства и реквизиты сравниваются
+    структурно, модули - по хешу содержимого файла: разбираются только модули с разным содержимым,
+    после чего сравниваются подпрограммы. Пары объектов сравниваются параллельно,
+    изменения выдаются потоком в порядке объектов старой конфигурации, затем добавленные объекты.
+    """
+
+    def __init__(self, old: Configuration, new: Configuration, modules: bool = True,
+                 workers: Optional[int] = None, cache: Optional[ModuleCache] = None, use_hashes: bool = False):
+        self.old = old
+        self.new = new
+        self.modules = modules
+        self.workers = workers
+        self.cache = cache
+        # С use_hashes сравниваются только объекты с разными узлами в деревьях хешей конфигураций
+        self.use_hashes = use_hashes
+        self._parser = ModuleParser()
+
+    def pairs(self) -> Tuple[List[Tuple[ConfElement, ConfElement]], List[ConfElement], List[ConfElement]]:
+        """
+        Сопоставление объектов: (пары, удаленные, добавленные). Вложенные подсистемы без uuid
+        сопоставляются по имени с именами родителей.
+        """
+        new_by_uuid = {obj.uuid: obj for obj in self.new.conf_objects if obj.uuid}
+        new_by_name = {(obj.obj_type, object_key(obj)): obj for obj in self.new.conf_objects}
+        matched = set()
+
+        pairs = []
+        unmatched = []
+        for obj in self.old.conf_objects:
+            new_obj = new_by_uuid.get(obj.uuid) if obj.uuid else None
+            if new_obj is None or id(new_obj) in matched:
+                unmatched.append(obj)
+                continue
+            matched.add(id(new_obj))
+            pairs.append((obj, new_obj))
+
+        removed = []
+        for obj in unmatched:
+            new_obj = new_by_name.get((obj.obj_type, object_key(obj)))
+            if new_obj is None or id(new_obj) in matched:
+                removed.append(obj)
+                continue
+            matched.add(id(new_obj))
+            pairs.append((obj, new_obj))
+
+        added = [obj for obj in self.new.conf_objects if id(obj) not in matched]
+        return pairs, removed, added
+
+    def changes(self) -> Iterator[Change]:
+        with phase('configuration_diff', path=self.new.root_path) as cur_phase:
+            yield from _diff_props(self.old.name, self.old.props, self.new.props)
+
+            pairs, removed, added = self.pairs()
+            if self.use_hashes:
+                changed = self.old.merkle_tree.changed_objects(self.new.merkle_tree)
+                pairs = [(old, new) for old, new in pairs
+                         if _object_key(old) in changed or _object_key(new) in changed]
+            cur_phase.count('pairs', len(pairs))
+
+            for obj in removed:
+                yield Change(ChangeType.REMOVED, 'object', obj.full_name, old=obj)
+
+            if self.modules:
+                # Манифесты выгрузок строятся до запуска потоков: по ним ищутся файлы модулей
+                self.old.manifest
+                self.new.manifest
+
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+            try:
+                for changes in executor.map(self._diff_pair, pairs):
+                    cur_phase.count('changes', len(changes))
+                    yield from changes
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+            for obj in added:
+                yield Change(ChangeType.ADDED, 'object', obj.full_name, new=obj)
+
+    def _diff_pair(self, pair: Tuple[ConfElement, ConfElement]) -> List[Change]:
+        old, new = pair
+        obj_name = new.full_name
+        changes = []
+
+        if old.name != new.name:
+            changes.append(Change(ChangeType.CHANGED, 'object', obj_name, old=old.name, new=new.name))
+
+        changes.extend(_diff_props(obj_name, old.props, new.props))
+
+        if isinstance(old, SubSystem):
+            changes.extend(_diff_content(obj_name, old, new))
+            return changes
+
+        changes.extend(_diff_attributes(obj_name, '', old.attributes, new.attributes))
+        if self.modules:
+            changes.extend(self._diff_modules(obj_name, old, new))
+        return changes
+
+    def _diff_modules(self, obj_name: str, old: ConfObject, new: ConfObject) -> List[Change]:
+        changes = []
+        old_modules = old.module_files()
+        new_modules = new.module_files()
+
+        for name, old_path in old_modules.items():
+            new_path = new_modules.get(name)
+            if new_path is None:
+                changes.append(Change(ChangeType.REMOVED, 'module', obj_name, name, old=old_path))
+                continue
+            if file_digest(old_path) == file_digest(new_path):
+                continue
+            changes.append(Change(ChangeType.CHANGED, 'module', obj_name, name, old=old_path, new=new_path))
+            changes.extend(_diff_sub_programs(
+                obj_name, name,
+                _sub_programs(create_module(self._parser, old_path, old, cache=self.cache)),
+                _sub_programs(create_module(self._parser, new_path, new, cache=self.cache))
+            ))
+
+        for name, new_path in new_modules.items():
+            if name not in old_modules:
+                changes.append(Change(ChangeType.ADDED, 'module', obj_name, name, new=new_path))
+
+        return changes
+
+
+def diff_configurations(old: Configuration, new: Configuration, modules: bool = True,
+                        workers: Optional[int] = None) -> Iterator[Change]:
+    return ConfigurationDiff(old, new, modules=modules, workers=workers).changes()
+
+
+def _diff_props(obj_name: str, old: dict, new: dict, path: str = '') -> Iterator[Change]:
+    for key, old_value in old.items():
+        cur_path = f'{path}.{key}' if path else key
+        if key not in new:
+            yield Change(ChangeType.REMOVED, 'prop', obj_name, cur_path, old=old_value)
+            continue
+        new_value = new[key]
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            yield from _diff_props(obj_name, old_value, new_value, cur_path)
+        elif old_value != new_value:
+            yield Change(ChangeType.CHANGED, 'prop', obj_name, cur_path, old=old_value, new=new_value)
+
+    for key, new_value in new.items():
+        if key not in old:
+            yield Change(ChangeType.ADDED, 'prop', obj_name, f'{path}.{key}' if path else key, new=new_value)
+
+
+def _diff_attributes(obj_name: str, path: str, old: List[ObjectAttribute],
+                     new: List[ObjectAttribute]) -> Iterator[Change]:
+    new_by_uuid = {attr.uuid: attr for attr in new if attr.uuid}
+    new_by_name = {attr.name: attr for attr in new}
+    matched = set()
+
+    for attr in old:
+        new_attr = new_by_uuid.get(attr.uuid) if attr.uuid else None
+        if new_attr is None or id(new_attr) in matched:
+            new_attr = new_by_name.get(attr.name)
+        cur_path = f'{path}.{attr.name}' if path else attr.name
+        if new_attr is None or id(new_attr) in matched:
+            yield Change(ChangeType.REMOVED, 'attribute', obj_name, cur_path, old=attr)
+            continue
+        matched.add(id(new_attr))
+        if attr.name != new_attr.name:
+            yield Change(ChangeType.CHANGED, 'attribute', obj_name, cur_path, old=attr.name, new=new_attr.name)
+        if attr.type != new_attr.type:
+            yield Change(ChangeType.CHANGED, 'attribute', obj_name, f'{cur_path}.Type',
+                         old=attr.type, new=new_attr.type)
+        yield from _diff_attributes(obj_name, cur_path, attr.attributes, new_attr.attributes)
+
+    for attr in new:
+        if id(attr) not in matched:
+            yield Change(ChangeType.ADDED, 'attribute', obj_name, f'{path}.{attr.name}' if path else attr.name,
+                         new=attr)
+
+
+def _diff_content(obj_name: str, old: SubSystem, new: SubSystem) -> Iterator[Change]:
+    old_names = [child.full_name for child in old.childes]
+    new_names = [child.full_name for child in new.childes]
+    new_set = set(new_names)
+    old_set = set(old_names)
+    for name in old_names:
+        if name not in new_set:
+            yield Change(ChangeType.REMOVED, 'content', obj_name, name)
+    for name in new_names:
+        if name not in old_set:
+            yield Change(ChangeType.ADDED, 'content', obj_name, name)
+
+
+def _sub_programs(module) -> Dict[str, SubProgram]:
+    result = {}
+    for sub_program in module.procedures():
+        result[sub_program.name.upper()] = sub_program
+    for sub_program in module.functions():
+        result[sub_program.name.upper()] = sub_program
+    return result
+
+
+def _diff_sub_programs(obj_name: str, module_name: str, old: Dict[str, SubProgram],
+                       new: Dict[str, SubProgram]) -> Iterator[Change]:
+    for key, sub_program in old.items():
+        path = f'{module_name}.{sub_program.name}'
+        new_sub_program = new.get(key)
+        if new_sub_program is None:
+            yield Change(ChangeType.REMOVED, 'sub_program', obj_name, path, old=sub_program)
+        elif sub_program.content_hash != new_sub_program.content_hash:
+            yield Change(ChangeType.CHANGED, 'sub_program', obj_name, path, old=sub_program, new=new_sub_program)
+
+    for key, sub_program in new.items():
+        if key not in old:
+            yield Change(ChangeType.ADDED, 'sub_program', obj_name, f'{module_name}.{sub_program.name}',
+                         new=sub_program)
+
@@ -0,0 +1,39 @@
+from typing import Iterator, Optional
+
+from mdclasses.conf_base import Configuration, ConfObject
+from mdclasses.diff import ConfigurationDiff
+from mdclasses.Module import ModuleMerger, MergeResult
+
+
+def merge_configuration_modules(base: Configuration, theirs: Configuration, ours: Configuration,
+                                workers: Optional[int] = None, write: bool = False,
+                                merger: Optional[ModuleMerger] = None) -> Iterator[MergeResult]:
+    """
+    Трехстороннее слияние модулей конфигураций: base - прошлая поставка, theirs - новая поставка,
+    ours - наша конфигурация. Объекты сопоставляются как в ConfigurationDiff, модули - по имени.
+    Сливаются модули наших объектов, которые есть в новой поставке; добавление и удаление объектов
+    не выполняется.
+    """
+    if merger is None:
+        merger = ModuleMerger(workers=workers)
+
+    theirs_pairs = {id(obj): other for other, obj in ConfigurationDiff(theirs, ours).pairs()[0]}
+    base_pairs = {id(obj): other for other, obj in ConfigurationDiff(base, ours).pairs()[0]}
+
+    def paths():
+        for obj in ours.conf_objects:
+            theirs_obj = theirs_pairs.get(id(obj))
+            if not isinstance(obj, ConfObject) or theirs_obj is None:
+                continue
+            base_obj = base_pairs.get(id(obj))
+            base_modules = {} if base_obj is None else base_obj.module_files()
+            theirs_modules = theirs_obj.module_files()
+
+            for name, ours_path in obj.module_files().items():
+                theirs_path = theirs_modules.get(name)
+                if theirs_path is None:
+                    continue
+                base_path = base_modules.get(name)
+                yield base_path, theirs_path, ours_path
+
+    return merger.merge_all(paths(), write=write)
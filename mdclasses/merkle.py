@@ -0,0 +1,202 @@
+from typing import Dict, Iterator, Optional, Set, Tuple, Union, TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+from json import dumps
+
+from mdclasses.utils.file_utils import content_digest, text_digest
+from mdclasses.utils.instrumentation import phase
+
+if TYPE_CHECKING:
+    from mdclasses.conf_base import Configuration, ConfObject, SubSystem, ObjectAttribute
+
+
+CONTENT = '#content'
+PROPS = '#props'
+
+
+def object_content_hash(obj: Union['ConfObject', 'SubSystem']) -> str:
+    """
+    Хеш содержимого объекта: имя, тип, uuid, свойства, реквизиты, формы, макеты и команды
+    (для подсистемы - состав).
+    Номера строк и поддержка в хеш не входят.
+    """
+    data = dict(name=obj.name, obj_type=obj.obj_type.value, uuid=obj.uuid, props=obj.props)
+    if hasattr(obj, 'attributes'):
+        data['attributes'] = [_attribute_data(attr) for attr in obj.attributes]
+        data['childes'] = [(child.name, child.uuid) for child in obj.forms + obj.templates + obj.commands]
+    else:
+        data['members'] = sorted(child.full_name for child in obj.childes)
+    return _data_digest(data)
+
+
+def _attribute_data(attr: 'ObjectAttribute') -> dict:
+    return dict(name=attr.name, uuid=attr.uuid, type=None if attr.type is None else attr.type.to_dict(),
+                attributes=[_attribute_data(child) for child in attr.attributes])
+
+
+def object_key(obj: Union['ConfObject', 'SubSystem']) -> str:
+    """
+    Имя узла объекта в дереве: имя объекта, для подсистем - имя с именами родителей
+    (вложенные подсистемы разных родителей могут называться одинаково).
+    """
+    return getattr(obj, 'qualified_name', obj.name)
+
+
+def _data_digest(data) -> str:
+    return text_digest(dumps(data, sort_keys=True, ensure_ascii=False, default=str))
+
+
+class MerkleNode:
+
+    __slots__ = ('hash', 'children')
+
+    def __init__(self, hash_value: str = '', children: Optional[Dict[str, 'MerkleNode']] = None):
+        self.hash = hash_value
+        self.children: Dict[str, MerkleNode] = dict() if children is None else children
+        if children:
+            self.rehash()
+
+    def rehash(self):
+        self.hash = content_digest(
+            ''.join(f'{name}:{child.hash}\n' for name, child in sorted(self.children.items())).encode('utf-8')
+        )
+
+    def to_dict(self) -> Union[str, dict]:
+        if not self.children:
+            return self.hash
+        return dict(hash=self.hash, children={name: child.to_dict() for name, child in self.children.items()})
+
+    @classmethod
+    def from_dict(cls, data: Union[str, dict]) -> 'MerkleNode':
+        if isinstance(data, str):
+            return cls(data)
+        node = cls(data['hash'])
+        node.children = {name: cls.from_dict(child) for name, child in data['children'].items()}
+        return node
+
+    def __repr__(self):
+        return f'<MerkleNode: {self.hash}>'
+
+
+class MerkleTree:
+    """
+    Дерево хешей конфигурации: конфигурация -> тип объекта -> объект -> содержимое объекта и модули.
+
+    Хеш модуля - хеш его текста, модули для построения дерева не разбираются.
+    Сравнение деревьев спускается только в узлы с разными хешами.
+    """
+
+    def __init__(self, root: Optional[MerkleNode] = None):
+        self.root = MerkleNode() if root is None else root
+
+    @property
+    def hash(self) -> str:
+        return self.root.hash
+
+    @classmethod
+    def build(cls, conf: 'Configuration', workers: Optional[int] = None) -> 'MerkleTree':
+        with phase('build_merkle_tree', path=conf.root_path) as cur_phase:
+            tree = cls()
+            tree.root.children[PROPS] = MerkleNode(_data_digest(conf.props))
+            # Индекс подсистем и манифест выгрузки строятся до запуска потоков: они нужны для хешей
+            # состава подсистем и поиска файлов модулей
+            conf.subsystem_index
+            conf.manifest
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                nodes = list(executor.map(build_object_node, conf.conf_objects))
+
+            for obj, node in zip(conf.conf_objects, nodes):
+                tree._type_node(obj).children[object_key(obj)] = node
+            for type_node in tree.root.children.values():
+                if type_node.children:
+                    type_node.rehash()
+            tree.root.rehash()
+            cur_phase.count('objects', len(nodes))
+        return tree
+
+    def _type_node(self, obj: Union['ConfObject', 'SubSystem']) -> MerkleNode:
+        type_node = self.root.children.get(obj.obj_type.value)
+        if type_node is None:
+            type_node = MerkleNode()
+            self.root.children[obj.obj_type.value] = type_node
+        return type_node
+
+    def object_node(self, obj: Union['ConfObject', 'SubSystem']) -> Optional[MerkleNode]:
+        type_node = self.root.children.get(obj.obj_type.value)
+        return None if type_node is None else type_node.children.get(object_key(obj))
+
+    def refresh(self, obj: Union['ConfObject', 'SubSystem']):
+        # Пересчет узла одного объекта (например, после изменения его модулей) и узлов выше него
+        type_node = self._type_node(obj)
+        type_node.children[object_key(obj)] = build_object_node(obj)
+        type_node.rehash()
+        self.root.rehash()
+
+    def remove(self, obj: Union['ConfObject', 'SubSystem']):
+        type_node = self.root.children.get(obj.obj_type.value)
+        if type_node is None or type_node.children.pop(object_key(obj), None) is None:
+            return
+        if type_node.children:
+            type_node.rehash()
+        else:
+            del self.root.children[obj.obj_type.value]
+        self.root.rehash()
+
+    def diff(self, other: 'MerkleTree') -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """
+        Различающиеся листья деревьев: (путь, хеш в этом дереве, хеш в другом).
+        Путь - имена узлов через '/', например Document/Документ1/ObjectModule.
+        """
+        yield from _diff_nodes('', self.root, other.root)
+
+    def changed_objects(self, other: 'MerkleTree') -> Set[str]:
+        # Объекты (Тип.Имя узла, см. object_key), узлы которых различаются в деревьях
+        result = set()
+        if self.hash == other.hash:
+            return result
+        for type_name in set(self.root.children) | set(other.root.children):
+            if type_name == PROPS:
+                continue
+            type_node = self.root.children.get(type_name, _EMPTY)
+            other_type_node = other.root.children.get(type_name, _EMPTY)
+            if type_node.hash == other_type_node.hash:
+                continue
+            for name in set(type_node.children) | set(other_type_node.children):
+                node = type_node.children.get(name, _EMPTY)
+                if node.hash != other_type_node.children.get(name, _EMPTY).hash:
+                    result.add(f'{type_name}.{name}')
+        return result
+
+    def to_dict(self) -> Union[str, dict]:
+        return self.root.to_dict()
+
+    @classmethod
+    def from_dict(cls, data: Union[str, dict]) -> 'MerkleTree':
+        return cls(MerkleNode.from_dict(data))
+
+
+_EMPTY = MerkleNode()
+
+
+def build_object_node(obj: Union['ConfObject', 'SubSystem']) -> MerkleNode:
+    children = {CONTENT: MerkleNode(object_content_hash(obj))}
+    if hasattr(obj, 'module_files'):
+        for name, path in obj.module_files().items():
+            children[name] = MerkleNode(text_digest(path.read_text(encoding='utf-8-sig')))
+    return MerkleNode(children=children)
+
+
+def _diff_nodes(path: str, node: MerkleNode, other: MerkleNode) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    if node.hash == other.hash:
+        return
+    if not node.children and not other.children:
+        yield path, node.hash or None, other.hash or None
+        return
+    for name in sorted(set(node.children) | set(other.children)):
+        child_path = f'{path}/{name}' if path else name
+        child = node.children.get(name)
+        other_child = other.children.get(name)
+        if child is None or other_child is None:
+            yield child_path, None if child is None else child.hash, None if other_child is None else other_child.hash
+        else:
+            yield from _diff_nodes(child_path, child, other_child)
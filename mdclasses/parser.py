@@ -1,11 +1,13 @@
 from pathlib import Path
 import re
 from abc import ABC, abstractmethod
-from lxml.etree import QName, ElementTree, Element, tostring, parse
-from typing import Dict, List, Union
+from lxml.etree import QName, ElementTree, Element, SubElement, tostring, parse, iterparse
+from typing import Dict, Iterator, List, Union
+from uuid import UUID
 
 from mdclasses.conf_base import ABCConfigParser, ABCObjectParser, ConfObject
 from mdclasses.configuration_enums import ObjectType, Format
+from mdclasses.utils.path_resolver import get_path_resolver
 
 
 class XMLParser:
@@ -22,7 +24,10 @@ class XMLParser:
 def get_parser(file: Union[str, Path], obj_type: ObjectType,
                export_type: Format = Format.CONFIGURATOR) -> Union['PureXMLConfigParser',
                                                                    'PureXMLObjectParser',
-                                                                   'PureXMLSubsystemParser']:
+                                                                   'PureXMLSubsystemParser',
+                                                                   'EDTConfigParser',
+                                                                   'EDTObjectParser',
+                                                                   'EDTSubsystemParser']:
     if export_type == Format.CONFIGURATOR:
         if obj_type == ObjectType.CONFIGURATION:
             return PureXMLConfigParser(file, obj_type)
@@ -30,6 +35,13 @@ def get_parser(file: Union[str, Path], obj_type: ObjectType,
             return PureXMLSubsystemParser(file, obj_type)
         else:
             return PureXMLObjectParser(file, obj_type)
+    elif export_type == Format.EDT:
+        if obj_type == ObjectType.CONFIGURATION:
+            return EDTConfigParser(file, obj_type)
+        if obj_type == ObjectType.SUBSYSTEM:
+            return EDTSubsystemParser(file, obj_type)
+        else:
+            return EDTObjectParser(file, obj_type)
     else:
         raise NotImplementedError
 
@@ -132,6 +144,8 @@ class PureXMLObjectParser(PureXMLParser, ABCObjectParser):
         for child_obj in child_objs:
             set_child_by_tag(childes, child_obj)
 
+        childes['references'] = _collect_references(obj, obj, f'{self.obj_type.value}.{name_obj.text}')
+
         return uuid, childes, name_obj.sourceline, properties
 
 
@@ -155,59 +169,222 @@ class PureXMLSubsystemParser(PureXMLParser, ABCObjectParser):
         return uuid, childes, name_obj.sourceline, properties
 
 
-class SupportConfigurationParser:
-    REG_EXP = r'(?:,|\\n|^)(\"(?:(?:\"\")*[^\"]*)*\"|[^\",\\n]*|(?:\\n|$))'
+class EDTParser(XMLParser, ABC):
+    """
+    Разбор описаний объектов проекта EDT (.mdo).
+
+    Файл читается потоково (iterparse): обрабатываются элементы верхнего уровня,
+    после обработки элемент освобождается, дерево целиком в памяти не строится.
+    """
+
+    def __init__(self, file: Union[str, Path], obj_type: ObjectType):
+        super(EDTParser, self).__init__(file, obj_type)
+        self.uuid = ''
+
+    def _elements(self) -> Iterator[Element]:
+        depth = 0
+        for event, el in iterparse(str(self.file), events=('start', 'end'), remove_comments=True):
+            if event == 'start':
+                if depth == 0:
+                    if QName(el).localname != self.obj_type.value:
+                        raise ValueError(f'Не найден объект по типу {self.obj_type.value} в файле {self.file}')
+                    self.uuid = el.get('uuid', '')
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth == 1:
+                yield el
+                el.clear()
+                parent = el.getparent()
+                while el.getprevious() is not None:
+                    del parent[0]
+
+
+class EDTConfigParser(EDTParser, ABCConfigParser):
+
+    def parse(self) -> (str, list, str, dict):
+        childes = []
+        name = ''
+        properties = {}
+
+        type_dirs = _edt_type_dirs()
+
+        for el in self._elements():
+            tag = QName(el).localname
+            obj_type = type_dirs.get(tag.lower())
+            if tag == 'languages':
+                childes.append(dict(
+                    obj_type=ObjectType.LANGUAGE.value,
+                    obj_name=el.findtext('name'),
+                    line_number=el.sourceline
+                ))
+            elif obj_type is not None and len(el) == 0 and el.text:
+                childes.append(dict(
+                    obj_type=obj_type.value,
+                    obj_name=el.text.split('.', 1)[1],
+                    line_number=el.sourceline
+                ))
+            else:
+                if tag == 'name':
+                    name = el.text
+                properties[_edt_property_name(tag)] = _read_edt_properties(el)
+
+        return self.uuid, childes, name, properties
 
-    FILE_CONF_NUMBER = 2
+    def object_list(self) -> List[str]:
+        return [f'{child["obj_type"]}.{child["obj_name"]}' for child in self.parse()[1]]
+
+    def add_objects_to_configuration(self, objects: List[ConfObject]):
+        if not objects:
+            return
+        with self.file.open('rb') as f:
+            root = parse(f).getroot()
+
+        path_resolver = get_path_resolver(Format.EDT)
+        for obj in objects:
+            tag_lower = str(path_resolver.type_path(obj.obj_type)).lower()
+            same_tags = [el for el in root if QName(el).localname.lower() == tag_lower]
+            if same_tags:
+                child = Element(same_tags[-1].tag)
+                same_tags[-1].addnext(child)
+            else:
+                tag = str(path_resolver.type_path(obj.obj_type))
+                child = SubElement(root, tag[0].lower() + tag[1:])
+            child.text = obj.full_name
 
-    CONF_VERSION_SHIFT = 3
-    CONF_PROVIDER_SHIFT = 4
-    CONF_NAME_SHIFT = 5
-    CONF_OBJECTS_SHIFT = 6
+        with open(self.file, r'wb') as f:
+            f.write(tostring(root, xml_declaration=True, encoding='UTF-8', pretty_print=True))
+
+
+class EDTObjectParser(EDTParser, ABCObjectParser):
+
+    ATTRIBUTE_TAGS = {
+        'attributes', 'dimensions', 'resources', 'enumValues', 'accountingFlags',
+        'extDimensionAccountingFlags', 'addressingAttributes', 'columns', 'operations'
+    }
+    # Табличные части и шаблоны URL с вложенными элементами
+    NESTED_TAGS = {'tabularSections': 'attributes', 'urlTemplates': 'methods'}
+    CHILD_TAGS = {'forms', 'templates', 'commands'}
+    SKIPPED_TAGS = {'recalculations', 'tables', 'cubes', 'functions'}
+
+    def parse(self) -> (str, list, str, dict):
+        childes = dict(
+            attributes=list(),
+            forms=list(),
+            templates=list(),
+            commands=list(),
+            others=list(),
+            references=list()
+        )
+        line_number = 0
+        properties = {}
+
+        for el in self._elements():
+            tag = QName(el).localname
+            childes['references'].extend(_collect_references(el, el.getparent()))
+            if tag in self.ATTRIBUTE_TAGS:
+                childes['attributes'].append(_parse_edt_attr_child(el))
+            elif tag in self.NESTED_TAGS:
+                tabular_data = _parse_edt_attr_child(el)
+                tabular_data['attributes'] = [_parse_edt_attr_child(tab_attr)
+                                              for tab_attr in el.iterchildren(self.NESTED_TAGS[tag])]
+                childes['attributes'].append(tabular_data)
+            elif tag in self.CHILD_TAGS:
+                childes[tag].append(_parse_edt_child(el))
+            elif tag in self.SKIPPED_TAGS:
+                pass
+            else:
+                if tag == 'name':
+                    line_number = el.sourceline
+                properties[_edt_property_name(tag)] = _read_edt_properties(el)
+
+        full_name = f'{self.obj_type.value}.{properties.get("Name")}'
+        childes['references'] = [ref for ref in childes['references'] if ref[0] != full_name]
+
+        return self.uuid, childes, line_number, properties
+
+
+class EDTSubsystemParser(EDTParser, ABCObjectParser):
+
+    def parse(self) -> (str, list, str, dict):
+        childes = dict(
+            others=list()
+        )
+        line_number = 0
+        properties = {}
+        nested = []
 
-    OBJECT_TUPLE_LEN = 4
-    OBJECT_SUPPORT_TYPE_SHIFT = 0
-    OBJECT_UUID_SHIFT = 2
+        for el in self._elements():
+            tag = QName(el).localname
+            if tag == 'content':
+                childes['others'].append(el.text.split('.')[:2])
+            elif tag == 'subsystems':
+                nested.append([ObjectType.SUBSYSTEM.value, el.text])
+            else:
+                if tag == 'name':
+                    line_number = el.sourceline
+                properties[_edt_property_name(tag)] = _read_edt_properties(el)
 
+        childes['others'].extend(nested)
+
+        return self.uuid, childes, line_number, properties
+
+
+class SupportConfigurationParser:
     '''
-    Описание формата по позиции в картеже описании элемента:
-        0 - support_type;
-        2 - UUID элмента 
+    Чтение файла описания поддержки конфигурации (ParentConfigurations.bin).
+
+    Файл - последовательность полей через запятую, строки в кавычках ("" внутри строки - экранированная кавычка).
+    Формат по позиции полей:
+        1 - количество конфигураций поставщиков;
+        далее для каждой конфигурации: 3 служебных поля, версия, поставщик, имя, количество объектов,
+        описания объектов по 4 поля (0 - support_type, 2 - UUID элемента) и 2 служебных поля.
+
+    Файл читается частями, поля разбираются по мере чтения.
     '''
 
-    def __init__(self, file_path: Union[str, Path]):
+    CHUNK_SIZE = 64 * 1024
+
+    FIELD_HEADER_LEN = 2
+    CONF_HEADER_LEN = 3
+    CONF_FOOTER_LEN = 2
+
+    QuotedOrSeparatorRegExp = re.compile(r'"(?:[^"]|"")*"|,')
+
+    FIELD_STRIP_CHARS = ' \t\r\n{}'
+
+    def __init__(self, file_path: Union[str, Path], uuid_as_bytes: bool = False):
         self.file_path = Path(file_path)
+        self.uuid_as_bytes = uuid_as_bytes
 
     def parse(self) -> dict:
         conf_data = {}
         if not self.file_path.exists():
             return dict()
 
-        data = self.file_path.read_text(encoding='utf-8-sig')
-
-        file_reg_exp = re.compile(self.REG_EXP)
-        file_data = file_reg_exp.findall(data)
+        fields = self.fields()
 
-        cur_element = 3
-        cur_configuration = int(file_data[self.FILE_CONF_NUMBER])
+        self._skip(fields, self.FIELD_HEADER_LEN)
+        cur_configuration = int(next(fields))
 
         for conf_number in range(cur_configuration):
+            self._skip(fields, self.CONF_HEADER_LEN)
 
-            conf_version = file_data[cur_element+self.CONF_VERSION_SHIFT]
-            conf_provider = file_data[cur_element+self.CONF_PROVIDER_SHIFT]
-            conf_name = file_data[cur_element+self.CONF_NAME_SHIFT].replace('"', '')
-            cur_conf_objects = int(file_data[cur_element+self.CONF_OBJECTS_SHIFT])
+            conf_version = next(fields)
+            conf_provider = next(fields)
+            conf_name = next(fields).replace('"', '')
+            cur_conf_objects = int(next(fields))
             conf_objects = {}
 
-            for object_num in range(
-                    cur_element + 1 + self.CONF_OBJECTS_SHIFT,
-                    cur_element + self.CONF_OBJECTS_SHIFT + cur_conf_objects * self.OBJECT_TUPLE_LEN,
-                    self.OBJECT_TUPLE_LEN):
-                object_support_type = int(file_data[object_num + self.OBJECT_SUPPORT_TYPE_SHIFT])
-                object_uuid = file_data[object_num + self.OBJECT_UUID_SHIFT]
-                conf_objects[object_uuid] = object_support_type
+            for object_num in range(cur_conf_objects):
+                object_support_type = int(next(fields))
+                next(fields)
+                object_uuid = next(fields)
+                next(fields)
+                conf_objects[self._uuid_key(object_uuid)] = object_support_type
 
-            cur_element = object_num + 2 + self.OBJECT_TUPLE_LEN
+            self._skip(fields, self.CONF_FOOTER_LEN)
 
             conf_data[conf_name] = dict(
                 conf_version=conf_version,
@@ -217,6 +394,53 @@ class SupportConfigurationParser:
 
         return conf_data
 
+    def fields(self) -> Iterator[str]:
+        buffer = ''
+        with self.file_path.open('r', encoding='utf-8-sig') as f:
+            for chunk in iter(lambda: f.read(self.CHUNK_SIZE), ''):
+                buffer += chunk
+                # Разбираются только поля, полностью попавшие в прочитанную часть файла
+                cut = self._last_separator(buffer)
+                if cut < 0:
+                    continue
+                for field in self._split(buffer[:cut]):
+                    yield field.strip(self.FIELD_STRIP_CHARS)
+                buffer = buffer[cut + 1:]
+        if buffer:
+            for field in self._split(buffer):
+                yield field.strip(self.FIELD_STRIP_CHARS)
+
+    @staticmethod
+    def _last_separator(text: str) -> int:
+        # Запятая разделяет поля, если перед ней четное количество кавычек
+        pos = text.rfind(',')
+        while pos >= 0 and text.count('"', 0, pos) % 2:
+            pos = text.rfind(',', 0, pos)
+        return pos
+
+    def _split(self, text: str) -> List[str]:
+        if '"' not in text:
+            return text.split(',')
+
+        fields = []
+        start = 0
+        for match in self.QuotedOrSeparatorRegExp.finditer(text):
+            if match.group() == ',':
+                fields.append(text[start:match.start()])
+                start = match.end()
+        fields.append(text[start:])
+        return fields
+
+    @staticmethod
+    def _skip(fields: Iterator[str], count: int):
+        for _ in range(count):
+            next(fields)
+
+    def _uuid_key(self, value: str) -> Union[str, bytes]:
+        if self.uuid_as_bytes:
+            return UUID(value).bytes
+        return value
+
 
 def _get_childes(obj: ElementTree):
     return obj.xpath('./tns:ChildObjects/*', namespaces={'tns': obj.nsmap[None]})
@@ -228,21 +452,45 @@ def _get_uuid(obj: ElementTree):
 
 def _parse_attr_child(obj: ElementTree):
     name_obj = _get_property(obj, 'Name')[0]
+    type_obj = _get_property(obj, 'Type')
     return dict(
         uuid=_get_uuid(obj),
         name=name_obj.text,
-        line_number=name_obj.sourceline
+        line_number=name_obj.sourceline,
+        type=_parse_type(type_obj[0]) if type_obj else None
     )
 
 
+def _parse_child(obj: ElementTree):
+    # Формы и макеты в описании объекта указаны только именем, команды описаны полностью
+    if len(obj) == 0:
+        return dict(uuid='', name=obj.text, line_number=obj.sourceline)
+    name_obj = _get_property(obj, 'Name')[0]
+    return dict(uuid=_get_uuid(obj), name=name_obj.text, line_number=name_obj.sourceline)
+
+
+def _parse_type(obj: ElementTree) -> dict:
+    types = []
+    qualifiers = {}
+    for el in obj:
+        tag = QName(el).localname
+        if tag in ('Type', 'TypeSet'):
+            types.append(el.text)
+        elif tag.endswith('Qualifiers'):
+            prefix = 'Binary' if tag == 'BinaryDataQualifiers' else ''
+            for qualifier in el:
+                qualifiers[f'{prefix}{QName(qualifier).localname}'] = qualifier.text
+    return dict(types=types, qualifiers=qualifiers)
+
+
 def set_child_by_tag(childes: Dict[str, list], obj: ElementTree):
     tag = QName(obj).localname
     if tag == 'Form':
-        pass
+        childes['forms'].append(_parse_child(obj))
     elif tag == 'Template':
-        pass
+        childes['templates'].append(_parse_child(obj))
     elif tag == 'Command':
-        pass
+        childes['commands'].append(_parse_child(obj))
     elif tag in ['Recalculation', 'Table', 'Cube', 'Function']:
         pass
     elif tag in ['Attribute', 'Operation', 'Column',
@@ -277,3 +525,165 @@ def _read_properties(obj: ElementTree):
             val = _read_properties(el)
         props[tag] = val
     return props
+
+
+def _edt_property_name(tag: str) -> str:
+    # Свойства EDT именуются в lowerCamelCase, в выгрузке конфигуратора - в CamelCase
+    return tag[0].upper() + tag[1:]
+
+
+def _read_edt_properties(obj: Element):
+    if len(obj) == 0:
+        return obj.text
+    props = {}
+    for el in obj:
+        props[_edt_property_name(QName(el).localname)] = _read_edt_properties(el)
+    return props
+
+
+def _parse_edt_attr_child(obj: Element):
+    name_obj = obj.find('name')
+    type_obj = obj.find('type')
+    return dict(
+        uuid=obj.get('uuid'),
+        name=name_obj.text,
+        line_number=name_obj.sourceline,
+        type=_parse_edt_type(type_obj) if type_obj is not None else None
+    )
+
+
+def _parse_edt_child(obj: Element):
+    name_obj = obj.find('name')
+    data = dict(uuid=obj.get('uuid'), name=name_obj.text, line_number=name_obj.sourceline)
+    # Тип макета EDT хранится в описании объекта, в выгрузке конфигуратора - в описании макета
+    template_type = obj.findtext('templateType')
+    if template_type is not None:
+        data['template_type'] = template_type
+    return data
+
+
+def _parse_edt_type(obj: Element) -> dict:
+    # Квалификаторы EDT приводятся к именам выгрузки конфигуратора
+    qualifiers = {}
+    string_qualifiers = obj.find('stringQualifiers')
+    if string_qualifiers is not None:
+        qualifiers['Length'] = string_qualifiers.findtext('length', '0')
+        qualifiers['AllowedLength'] = 'Fixed' if string_qualifiers.findtext('fixed') == 'true' else 'Variable'
+    number_qualifiers = obj.find('numberQualifiers')
+    if number_qualifiers is not None:
+        qualifiers['Digits'] = number_qualifiers.findtext('precision', '0')
+        qualifiers['FractionDigits'] = number_qualifiers.findtext('scale', '0')
+        qualifiers['AllowedSign'] = 'Nonnegative' if number_qualifiers.findtext('nonNegative') == 'true' else 'Any'
+    date_qualifiers = obj.find('dateQualifiers')
+    if date_qualifiers is not None:
+        qualifiers['DateFractions'] = date_qualifiers.findtext('dateFractions', 'Date')
+    binary_qualifiers = obj.find('binaryDataQualifiers')
+    if binary_qualifiers is not None:
+        qualifiers['BinaryLength'] = binary_qualifiers.findtext('length', '0')
+        qualifiers['BinaryAllowedLength'] = 'Fixed' if binary_qualifiers.findtext('fixed') == 'true' else 'Variable'
+    return dict(types=[el.text for el in obj.iterfind('types')], qualifiers=qualifiers)
+
+
+def _edt_type_dirs() -> Dict[str, ObjectType]:
+    path_resolver = get_path_resolver(Format.EDT)
+    return {
+        str(path_resolver.type_path(obj_type)).lower(): obj_type
+        for obj_type in ObjectType
+        if obj_type not in (ObjectType.UNDEFINED, ObjectType.CONFIGURATION, ObjectType.LANGUAGE)
+    }
+
+
+# Свойства с текстом для пользователя, ссылки в них не ищутся
+_TEXT_PROPERTIES = {
+    'synonym', 'comment', 'tooltip', 'explanation', 'presentation', 'listpresentation', 'objectpresentation',
+    'extendedpresentation', 'extendedlistpresentation', 'extendedobjectpresentation', 'format', 'editformat',
+    'mask', 'inputhint'
+}
+_REFERENCE_TEXT = re.compile(r'^(?:cfg:)?([A-Za-z]+)\.([^\s.]+)')
+
+
+def _reference_prefixes() -> List[tuple]:
+    # Префиксы имен типов и ссылок: CatalogRef.Имя, DocumentObject.Имя, Catalog.Имя и т.п.
+    skipped = (ObjectType.UNDEFINED, ObjectType.CONFIGURATION, ObjectType.FORM, ObjectType.TEMPLATE,
+               ObjectType.MODULE, ObjectType.COMMAND, ObjectType.TABLE, ObjectType.CUBE, ObjectType.RECALCULATION,
+               ObjectType.DIMENSION_TABLE, ObjectType.INTERFACE)
+    prefixes = [(obj_type.value, obj_type) for obj_type in ObjectType if obj_type not in skipped]
+    prefixes.append(('Characteristic', ObjectType.CHART_OF_CHARACTERISTIC_TYPES))
+    return sorted(prefixes, key=lambda el: -len(el[0]))
+
+
+_reference_prefix_list = _reference_prefixes()
+
+
+def _reference_target(text: str) -> Union[str, None]:
+    match = _REFERENCE_TEXT.match(text)
+    if match is None:
+        return None
+    type_name = match.group(1)
+    for prefix, obj_type in _reference_prefix_list:
+        if type_name.startswith(prefix) and (len(type_name) == len(prefix) or type_name[len(prefix)].isupper()):
+            return f'{obj_type.value}.{match.group(2)}'
+    return None
+
+
+def _collect_references(element: Element, root: Element, owner: str = '') -> List[tuple]:
+    """
+    Ссылки на объекты конфигурации в описании объекта: типы (cfg:CatalogRef.Имя),
+    ссылки на объекты метаданных (Document.Имя.Attribute.Реквизит) и т.п.
+    Возвращает список (полное имя объекта, путь к свойству), ссылки на сам объект owner пропускаются.
+    """
+    references = []
+    for el in element.iter(tag=Element):
+        text = el.text
+        if not text or '.' not in text:
+            continue
+        target = _reference_target(text.strip())
+        if target is None or target == owner:
+            continue
+        path = _reference_path(el, root)
+        if path is not None:
+            references.append((target, path))
+    return references
+
+
+def _reference_path(el: Element, root: Element) -> Union[str, None]:
+    # Путь к свойству: Attribute.Реквизит1.Type, TabularSection.ТЧ.Attribute.Реквизит1.Type, RegisterRecords
+    parts = []
+    prop = None
+    prev, cur = el, el.getparent()
+    while cur is not None:
+        owner = cur.get('uuid') is not None and cur is not root
+        if prop is None and (owner or cur is root or QName(cur).localname == 'Properties'):
+            prop = QName(prev).localname
+            if prop.lower() in _TEXT_PROPERTIES:
+                return None
+            prop = _edt_property_name(prop)
+        if owner:
+            parts.append(f'{_reference_owner_tag(cur)}.{_reference_owner_name(cur)}')
+        if cur is root:
+            break
+        prev, cur = cur, cur.getparent()
+
+    parts.reverse()
+    parts.append(prop)
+    return '.'.join(parts)
+
+
+def _reference_owner_tag(el: Element) -> str:
+    tag = QName(el).localname
+    if tag[0].islower():
+        # Коллекции EDT (attributes, tabularSections) называются во множественном числе
+        tag = _edt_property_name(tag[:-1] if tag.endswith('s') else tag)
+    return tag
+
+
+def _reference_owner_name(el: Element) -> str:
+    for child in el:
+        tag = QName(child).localname
+        if tag == 'name':
+            return child.text
+        if tag == 'Properties':
+            for prop in child:
+                if QName(prop).localname == 'Name':
+                    return prop.text
+    return ''
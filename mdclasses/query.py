@@ -0,0 +1,170 @@
+from typing import Dict, List, Optional, Set, Union, Iterator, Callable, TYPE_CHECKING
+import fnmatch
+import re
+
+from mdclasses.configuration_enums import ObjectType, SupportType
+
+if TYPE_CHECKING:
+    from mdclasses.conf_base import Configuration, ConfObject, SubSystem
+
+
+class QueryIndex:
+    """
+    Вторичные индексы объектов конфигурации для запросов.
+
+    Индексы строятся при первом обращении и хранят позиции объектов в conf_objects.
+    """
+
+    def __init__(self, conf: 'Configuration'):
+        self.objects: List[Union['ConfObject', 'SubSystem']] = list(conf.conf_objects)
+        self._by_type: Optional[Dict[ObjectType, Set[int]]] = None
+        self._by_support: Optional[Dict[SupportType, Set[int]]] = None
+        self._by_attribute: Optional[Dict[str, Set[int]]] = None
+        self._by_prop: Dict[str, Dict[object, Set[int]]] = dict()
+
+    def by_type(self, obj_type: ObjectType) -> Set[int]:
+        if self._by_type is None:
+            self._by_type = self._build(lambda obj: [obj.obj_type])
+        return self._by_type.get(obj_type, set())
+
+    def by_support(self, support_type: SupportType) -> Set[int]:
+        if self._by_support is None:
+            self._by_support = self._build(lambda obj: [obj.support_type])
+        return self._by_support.get(support_type, set())
+
+    def by_attribute(self, name: str) -> Set[int]:
+        if self._by_attribute is None:
+            self._by_attribute = self._build(lambda obj: _attribute_names(getattr(obj, 'attributes', [])))
+        return self._by_attribute.get(name.upper(), set())
+
+    def by_prop(self, name: str, value) -> Set[int]:
+        if name not in self._by_prop:
+            self._by_prop[name] = self._build(lambda obj: _hashable_values(obj.props.get(name)))
+        try:
+            return self._by_prop[name].get(value, set())
+        except TypeError:
+            return set(pos for pos, obj in enumerate(self.objects) if obj.props.get(name) == value)
+
+    def _build(self, keys: Callable) -> Dict[object, Set[int]]:
+        index = dict()
+        for position, obj in enumerate(self.objects):
+            for key in keys(obj):
+                index.setdefault(key, set()).add(position)
+        return index
+
+
+def _attribute_names(attributes) -> Iterator[str]:
+    for attribute in attributes:
+        yield attribute.name.upper()
+        yield from _attribute_names(attribute.attributes)
+
+
+def _hashable_values(value) -> list:
+    try:
+        hash(value)
+    except TypeError:
+        return []
+    return [value]
+
+
+class ConfigurationQuery:
+    """
+    Запрос к объектам конфигурации. Условия объединяются по И:
+
+        conf.query(obj_type=ObjectType.DOCUMENT).where(Posting='Allow').with_attribute('Реквизит1').all()
+    """
+
+    def __init__(self, conf: 'Configuration'):
+        self._conf = conf
+        self._types: List[ObjectType] = list()
+        self._support_types: List[SupportType] = list()
+        self._attributes: List[str] = list()
+        self._props: Dict[str, object] = dict()
+        self._name_patterns: List[re.Pattern] = list()
+
+    def filter(self, obj_type: Optional[Union[ObjectType, str, List[ObjectType]]] = None,
+               name: Optional[str] = None,
+               support_type: Optional[Union[SupportType, List[SupportType]]] = None,
+               props: Optional[Dict[str, object]] = None,
+               attribute: Optional[Union[str, List[str]]] = None) -> 'ConfigurationQuery':
+        if obj_type is not None:
+            self.of_type(*(obj_type if isinstance(obj_type, (list, tuple)) else [obj_type]))
+        if name is not None:
+            self.name_like(name)
+        if support_type is not None:
+            self.support(*(support_type if isinstance(support_type, (list, tuple)) else [support_type]))
+        if props is not None:
+            self.where(**props)
+        if attribute is not None:
+            for attr_name in (attribute if isinstance(attribute, (list, tuple)) else [attribute]):
+                self.with_attribute(attr_name)
+        return self
+
+    def of_type(self, *obj_types: Union[ObjectType, str]) -> 'ConfigurationQuery':
+        self._types.extend(ObjectType(obj_type) if isinstance(obj_type, str) else obj_type
+                           for obj_type in obj_types)
+        return self
+
+    def name_like(self, pattern: str) -> 'ConfigurationQuery':
+        # Шаблон в стиле fnmatch (* и ?), без учета регистра
+        self._name_patterns.append(re.compile(fnmatch.translate(pattern), flags=re.IGNORECASE))
+        return self
+
+    def support(self, *support_types: SupportType) -> 'ConfigurationQuery':
+        self._support_types.extend(support_types)
+        return self
+
+    def on_support(self) -> 'ConfigurationQuery':
+        return self.support(SupportType.NOT_EDITABLE, SupportType.EDITABLE_SUPPORT_ENABLED,
+                            SupportType.NOT_SUPPORTED)
+
+    def where(self, **props) -> 'ConfigurationQuery':
+        self._props.update(props)
+        return self
+
+    def with_attribute(self, name: str) -> 'ConfigurationQuery':
+        self._attributes.append(name)
+        return self
+
+    def _candidates(self) -> List[Set[int]]:
+        index = self._conf.query_index
+        sets = []
+        if self._types:
+            sets.append(set().union(*(index.by_type(obj_type) for obj_type in self._types)))
+        if self._support_types:
+            sets.append(set().union(*(index.by_support(support_type) for support_type in self._support_types)))
+        for name, value in self._props.items():
+            sets.append(index.by_prop(name, value))
+        for name in self._attributes:
+            sets.append(index.by_attribute(name))
+        return sets
+
+    def all(self) -> List[Union['ConfObject', 'SubSystem']]:
+        index = self._conf.query_index
+        sets = sorted(self._candidates(), key=len)
+
+        if sets:
+            positions = set(sets[0])
+            for cur_set in sets[1:]:
+                positions &= cur_set
+                if not positions:
+                    break
+        else:
+            positions = range(len(index.objects))
+
+        result = []
+        for position in sorted(positions):
+            obj = index.objects[position]
+            if all(pattern.match(obj.name) for pattern in self._name_patterns):
+                result.append(obj)
+        return result
+
+    def first(self) -> Optional[Union['ConfObject', 'SubSystem']]:
+        result = self.all()
+        return result[0] if result else None
+
+    def count(self) -> int:
+        return len(self.all())
+
+    def __iter__(self):
+        return iter(self.all())
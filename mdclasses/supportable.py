@@ -0,0 +1,55 @@
+from typing import Iterator
+from abc import ABC, abstractmethod
+
+from mdclasses.configuration_enums import SupportType
+
+
+class Serializable(ABC):
+
+    @abstractmethod
+    def to_dict(self) -> dict:
+        pass
+
+    @classmethod
+    @abstractmethod
+    def from_dict(cls, args, kwargs):
+        pass
+    
+
+class Supportable(Serializable):
+
+    def __init__(self, uuid: str = ''):
+        self.uuid = uuid
+        self.support_type = SupportType.NONE_SUPPORT
+
+    def set_support(self, support: dict):
+        try:
+            self.support_type = SupportType(support[self.uuid])
+        except KeyError:
+            self.support_type = SupportType.NONE_SUPPORT
+
+    def supportables(self) -> Iterator['Supportable']:
+        yield self
+
+    @property
+    def on_support(self) -> bool:
+        return self.support_type in [
+            SupportType.NOT_EDITABLE,
+            SupportType.EDITABLE_SUPPORT_ENABLED,
+            SupportType.NOT_SUPPORTED
+        ]
+    
+    def to_dict(self) -> dict:
+        return dict(
+            uuid=self.uuid,
+            support_type={self.uuid: self.support_type.value}
+        )
+
+    @classmethod
+    def from_dict(cls, *args, **kwargs):
+        data = args[0] if 'data' not in kwargs else kwargs['data']
+
+        obj = cls(data['uuid']) if 'obj' not in kwargs else kwargs['obj']
+
+        obj.uuid = data['uuid']
+        obj.set_support(data['support_type'])
@@ -0,0 +1,38 @@
+from unittest import case
+from pathlib import Path
+import shutil
+import tempfile
+
+from mdclasses.builder import read_configuration
+from mdclasses.benchmarks import generate_configuration, run_benchmarks, SCENARIOS
+from mdclasses import ObjectType
+
+
+class TestBenchmarks(case.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+
+    def test_generate_configuration(self):
+        config_dir = generate_configuration(self.temp_path.joinpath('config'), objects=3, attributes=4, modules=2)
+        conf = read_configuration(config_dir)
+
+        template = conf.get_object('Справочник1', ObjectType.CATALOG)
+        catalog = conf.get_object('БенчСправочник00002', ObjectType.CATALOG)
+        self.assertEqual(len(catalog.attributes), len(template.attributes) + 4,
+                         'Не верно сформированы реквизиты объекта')
+
+        catalog.read_modules()
+        module = next(filter(lambda m: m.name == 'ObjectModule', catalog.modules))
+        self.assertEqual(len(list(module.procedures())), 2, 'Не верно сформирован модуль объекта')
+
+    def test_run_benchmarks(self):
+        config_dir = generate_configuration(self.temp_path.joinpath('config'), objects=1, attributes=1, modules=1)
+        results = run_benchmarks(config_dir, repeat=1)
+
+        self.assertListEqual(list(results['scenarios'].keys()), [s.name for s in SCENARIOS],
+                             'Выполнены не все сценарии')
+        self.assertEqual(len(results['scenarios']['read_modules']['runs']), 1, 'Не верно количество замеров')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_path)
@@ -1,8 +1,14 @@
 from unittest import case
 from pathlib import Path
+import shutil
+import tempfile
 
 from mdclasses.Module.Module import (create_module, ModuleParser, TextData,
                                      Region, Function, Procedure, PreprocessorInstruction, ModuleElement, Module)
+from mdclasses.Module import ModuleWriter, ModuleIndex, ModuleCache, ModuleMerger, MergeStatus, resolve_sub_programs
+from mdclasses.Module import extract_queries, ModuleLinter
+from mdclasses.Module.ModuleQueries import string_literals
+from mdclasses.configuration_enums import ObjectType
 
 
 test_module = Path(Path(__file__).parent).joinpath('test_data', 'module')
@@ -163,3 +169,264 @@ class TestModuleParser(case.TestCase):
 
         self.assertTrue(not module1.match(module2), 'Модули не соответствуют.')
 
+    def test_module_writer(self):
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            parser = ModuleParser()
+            for name in ['TestModule.bsl', 'VariableModule.bsl', 'test_module.bsl']:
+                shutil.copy(test_module.joinpath(name), temp_dir.joinpath(name))
+            temp_dir.joinpath('VariableModule.bsl').chmod(0o640)
+
+            changed = create_module(parser, temp_dir.joinpath('VariableModule.bsl'))
+            proc = next(changed.procedures())
+            proc.public = not proc.public
+
+            same_text = create_module(parser, temp_dir.joinpath('TestModule.bsl'))
+            for element in same_text.element_by_class(TextData):
+                element.text_data = element.text_data
+
+            not_changed = create_module(parser, temp_dir.joinpath('test_module.bsl'))
+
+            writer = ModuleWriter(workers=2)
+            writer.add_modules([changed, same_text, not_changed])
+            report = writer.write()
+
+            self.assertTrue(report.success, 'Запись модулей завершилась с ошибками')
+            self.assertListEqual(report.written, [changed.file_name], 'Не записан измененный модуль')
+            self.assertListEqual(report.skipped, [same_text.file_name], 'Модуль с прежним текстом перезаписан')
+            self.assertListEqual(report.not_changed, [not_changed.file_name], 'Неизмененный модуль не пропущен')
+            self.assertEqual(changed.file_name.read_text('utf-8-sig'), changed.text, 'Текст модуля записан не верно')
+            self.assertEqual(changed.file_name.stat().st_mode & 0o777, 0o640, 'Не сохранены права доступа модуля')
+            self.assertListEqual(sorted(p.name for p in temp_dir.iterdir()),
+                                 ['TestModule.bsl', 'VariableModule.bsl', 'test_module.bsl'],
+                                 'После записи остались временные файлы')
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_module_index(self):
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            shutil.copytree(test_module, temp_dir.joinpath('module'))
+            index_path = temp_dir.joinpath('modules.idx')
+
+            index = ModuleIndex(temp_dir)
+            stats = index.update()
+            self.assertEqual(stats['added'], 6, 'Не все модули проиндексированы')
+
+            entries = resolve_sub_programs(index.search('вапа'))
+            self.assertEqual(len(entries), 1, 'Не верно найден идентификатор')
+            self.assertEqual(entries[0].line, 12, 'Не верно определена строка')
+            self.assertEqual(entries[0].sub_program.name, 'Вапа', 'Не верно определена подпрограмма')
+
+            entries = resolve_sub_programs(index.search('ААА'))
+            self.assertIsNone(entries[0].sub_program, 'Переменная модуля не принадлежит подпрограмме')
+
+            index.save(index_path)
+            loaded = ModuleIndex.load(index_path, temp_dir)
+            self.assertEqual(
+                [(e.path, e.line) for e in loaded.search('СообщитьПользователю')],
+                [(e.path, e.line) for e in index.search('СообщитьПользователю')],
+                'Индекс не верно прочитан из файла'
+            )
+
+            module_path = temp_dir.joinpath('module', 'VariableModule.bsl')
+            module_path.write_text('Процедура Новая()\nКонецПроцедуры\n', 'utf-8-sig')
+            stats = loaded.update()
+            self.assertEqual(stats['updated'], 1, 'Измененный модуль не переиндексирован')
+            self.assertListEqual(loaded.search('вапа'), [], 'В индексе остались данные старого текста')
+            self.assertEqual(len(loaded.search('Новая')), 1, 'Новый текст модуля не проиндексирован')
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_parse_module_file(self):
+        parser = ModuleParser()
+        module_path = Path(test_module).joinpath('TestModule.bsl').absolute()
+        text = module_path.read_text('utf-8-sig')
+
+        from_file = parser.parse_module_file(module_path)
+        from_text = parser.parse_module_text(text)
+
+        self.assertListEqual(
+            [(b.block_type, b.start, b.end, b.text) for b in from_file.sub_elements],
+            [(b.block_type, b.start, b.end, b.text) for b in from_text.sub_elements],
+            'Разбор файла модуля отличается от разбора текста'
+        )
+
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            crlf_path = temp_dir.joinpath('CRLF.bsl')
+            crlf_path.write_bytes(text.replace('\n', '\r\n').encode('utf-8-sig'))
+            module = create_module(parser, crlf_path)
+            self.assertEqual(module.text, text, 'Не верно прочитан модуль с переводами строк CRLF')
+
+            short_path = temp_dir.joinpath('Short.bsl')
+            short_path.write_bytes('Процедура А()\nКонецПроцедуры'.encode('utf-8-sig'))
+            self.assertEqual(create_module(parser, short_path).text, 'Процедура А()\nКонецПроцедуры',
+                             'Текст неизмененного модуля отличается от текста файла')
+
+            cr_path = temp_dir.joinpath('CR.bsl')
+            cr_path.write_bytes('Процедура А()\r\tБ = 1;\r\nКонецПроцедуры\r'.encode('utf-8'))
+            module = create_module(parser, cr_path)
+            self.assertEqual(module.text, cr_path.read_text('utf-8-sig'), 'Не верно прочитан модуль с переводами строк CR')
+            self.assertListEqual(
+                [(b.block_type, b.text) for b in parser.parse_module_file(cr_path).sub_elements],
+                [(b.block_type, b.text) for b in parser.parse_module_text(cr_path.read_text('utf-8-sig')).sub_elements],
+                'Разбор файла с переводами строк CR отличается от разбора текста'
+            )
+
+            empty_path = temp_dir.joinpath('Empty.bsl')
+            empty_path.write_bytes(b'')
+            self.assertEqual(create_module(parser, empty_path).text, '', 'Не верно прочитан пустой модуль')
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_module_cache(self):
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            parser = ModuleParser()
+            module_path = Path(test_module).joinpath('TestModule.bsl').absolute()
+            cache = ModuleCache(temp_dir.joinpath('cache'), memory_items=1)
+
+            parent = object()
+            module = create_module(parser, module_path, parent, cache=cache)
+            self.assertEqual(cache.misses, 1, 'Первый разбор модуля должен выполняться без кеша')
+            self.assertIs(module.parent, parent, 'Не установлен владелец модуля')
+
+            cached = create_module(parser, module_path, cache=cache)
+            self.assertEqual(cache.hits, 1, 'Повторный разбор модуля должен браться из кеша')
+            self.assertEqual(cached.text, module.text, 'Модуль из кеша отличается от исходного')
+            self.assertEqual(cached.name, module.name, 'Модуль из кеша отличается от исходного')
+            self.assertEqual(
+                cached.find_sub_program('СообщитьПользователю').params[0].name,
+                module.find_sub_program('СообщитьПользователю').params[0].name,
+                'Параметры подпрограммы из кеша отличаются от исходных'
+            )
+            self.assertIsNone(cached.parent, 'Владелец модуля взят из кеша')
+            self.assertNotIn('parent', cache.get(cache.key(module_path))['data'], 'Владелец модуля сохранен в кеше')
+
+            disk_cache = ModuleCache(temp_dir.joinpath('cache'))
+            create_module(parser, module_path, cache=disk_cache)
+            self.assertEqual(disk_cache.hits, 1, 'Результат разбора не прочитан из кеша на диске')
+
+            small_cache = ModuleCache(temp_dir.joinpath('small'), max_size=1)
+            for name in ['TestModule.bsl', 'VariableModule.bsl']:
+                create_module(parser, Path(test_module).joinpath(name), cache=small_cache)
+            self.assertLessEqual(len(list(temp_dir.joinpath('small').glob('*/*.json.gz'))), 1,
+                                 'Кеш на диске превысил допустимый размер')
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_module_merge(self):
+        base = '\n'.join([
+            '#Область Служебные',
+            '',
+            'Процедура Процедура1()',
+            '\tА = 1;',
+            'КонецПроцедуры',
+            '',
+            'Процедура Процедура2()',
+            '\tБ = 1;',
+            'КонецПроцедуры',
+            '',
+            '#КонецОбласти',
+            '',
+            'Функция Функция1()',
+            '\tВозврат 1;',
+            'КонецФункции',
+        ])
+        theirs = base.replace('А = 1;', 'А = 2;').replace('Б = 1;', 'Б = 2;') + '\n'.join([
+            '',
+            '',
+            'Функция Функция2()',
+            '\tВозврат 2;',
+            'КонецФункции',
+        ])
+        ours = base.replace('Б = 1;', 'Б = 3;').replace('Возврат 1;', 'Возврат 3;')
+
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            paths = []
+            for name, text in [('base', base), ('theirs', theirs), ('ours', ours)]:
+                path = temp_dir.joinpath(name, 'Module.bsl')
+                path.parent.mkdir()
+                path.write_text(text, encoding='utf-8-sig')
+                paths.append(path)
+            unchanged = temp_dir.joinpath('base', 'Unchanged.bsl')
+            unchanged.write_text(base, encoding='utf-8-sig')
+            merger = ModuleMerger(workers=2, ours_label='наш', theirs_label='поставщик')
+
+            results = list(merger.merge_all([tuple(paths), (unchanged, unchanged, paths[2])], write=True))
+
+            result = results[0]
+            self.assertEqual(result.status, MergeStatus.CONFLICT, 'Не определен конфликт')
+            self.assertListEqual(result.conflicts, ['Служебные.Процедура2'], 'Не верно определены конфликты')
+            merged = paths[2].read_text(encoding='utf-8-sig')
+            self.assertEqual(merged, result.text, 'Результат слияния не записан')
+            self.assertIn('А = 2;', merged, 'Не принято изменение поставщика')
+            self.assertIn('Возврат 3;', merged, 'Не сохранено наше изменение')
+            self.assertIn('Функция Функция2()', merged, 'Не добавлена новая функция поставщика')
+            self.assertIn('<<<<<<< наш\nПроцедура Процедура2()\n\tБ = 3;', merged, 'Нет маркеров конфликта')
+            self.assertIn('=======\nПроцедура Процедура2()\n\tБ = 2;\nКонецПроцедуры\n>>>>>>> поставщик', merged,
+                          'Нет маркеров конфликта')
+
+            self.assertEqual(results[1].status, MergeStatus.UNCHANGED, 'Неизмененный модуль не пропущен')
+            self.assertIsNone(results[1].text, 'Неизмененный модуль не пропущен')
+
+            paths[2].write_text(ours.replace('Б = 3;', 'Б = 1;'), encoding='utf-8-sig')
+            result = merger.merge(*paths)
+            self.assertEqual(result.status, MergeStatus.MERGED, 'Не выполнено автоматическое слияние')
+            self.assertEqual(result.text, theirs.replace('Возврат 1;', 'Возврат 3;'), 'Слияние выполнено не верно')
+
+            base = 'Процедура Пустая()\nКонецПроцедуры\n\nПроцедура А()\n\tА = 1;\nКонецПроцедуры\n'
+            theirs = base + '// вендор\n'
+            ours = base.replace('А = 1;', 'А = 2;')
+            for path, text in zip(paths, [base, theirs, ours]):
+                path.write_text(text, encoding='utf-8-sig')
+            result = merger.merge(*paths)
+            self.assertEqual(result.status, MergeStatus.MERGED, 'Добавление поставщика после подпрограммы - конфликт')
+            self.assertEqual(result.text, ours + '// вендор\n', 'Слияние выполнено не верно')
+            self.assertTrue(result.text.startswith('Процедура Пустая()\nКонецПроцедуры\n'),
+                            'Текст неизмененной процедуры изменен слиянием')
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_extract_queries(self):
+        module = self.get_test_module()
+        queries = extract_queries(module)
+
+        self.assertEqual(len(queries), 8, 'Не все запросы найдены в модуле')
+        self.assertEqual(queries[0].line, 245, 'Не верно определена строка запроса')
+        self.assertEqual(queries[0].sub_program.name, 'ЗначенияРеквизитовОбъекта', 'Не верно определена подпрограмма')
+        self.assertTrue(queries[0].text.startswith('ВЫБРАТЬ РАЗРЕШЕННЫЕ\n&ТекстЗапросаПолей'),
+                        'Не верно собран многострочный текст запроса')
+
+        cache_query = next(query for query in queries if query.tables)
+        self.assertEqual(cache_query.sub_program.name, 'УдалитьЗаписиКэшаВерсий', 'Не верно найдены таблицы запроса')
+        self.assertEqual(cache_query.tables[0].obj_type, ObjectType.INFORMATION_REGISTER, 'Не верно определен тип таблицы')
+
+        literals = list(string_literals('А = "Текст ""в кавычках""; // ""комментарий""\n\t|продолжение"; // "нет"'))
+        self.assertListEqual(literals, [(0, 'Текст "в кавычках"; // "комментарий"\nпродолжение')],
+                             'Не верно прочитаны строковые литералы')
+
+    def test_lint_module(self):
+        linter = ModuleLinter(workers=2)
+        module_path = Path(test_module).joinpath('LintModule.bsl').absolute()
+        issues = linter.lint_file(module_path)
+
+        self.assertListEqual(
+            [(issue.rule, issue.line, issue.sub_program) for issue in issues],
+            [('server_call_from_client', 4, 'ЗаполнитьНаКлиенте'),
+             ('server_call_from_client', 7, 'ЗаполнитьНаКлиенте'),
+             ('server_call_from_client', 8, 'ЗаполнитьНаКлиенте'),
+             ('query_in_loop', 33, 'ЗаполнитьНаСервере'),
+             ('find_in_loop', 36, 'ЗаполнитьНаСервере'),
+             ('dot_chain_in_loop', 35, 'ЗаполнитьНаСервере'),
+             ('find_in_loop', 49, 'ОбработатьВОднойСтроке')],
+            'Не верно найдены проблемы в модуле'
+        )
+        self.assertTrue(all(issue.path == module_path for issue in issues), 'Не верно определен файл модуля')
+
+        cached = list(linter.lint_files([module_path, module_path]))
+        self.assertEqual(linter.cache.hits, 2, 'Результаты проверки не взяты из кеша')
+        self.assertListEqual([issue.to_dict() for issue in cached], [issue.to_dict() for issue in issues * 2],
+                             'Результаты проверки из кеша отличаются')
@@ -1,18 +1,34 @@
 from unittest import case
 from pathlib import Path
-from json import dumps, load
+from json import dumps, load, loads
 import shutil
 import tempfile
 import os
+from uuid import UUID
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
 
 from mdclasses.builder import (create_configuration, read_configuration_objects, read_configuration,
-                               save_to_json, read_from_json)
-from mdclasses import ObjectType, ConfObject, Configuration, Module
+                               save_to_json, read_from_json, add_observer, remove_observer, PhaseReporter)
+from mdclasses import (ObjectType, ConfObject, Configuration, Module, SupportType, Format, aread_configuration,
+                       TemplateType)
+from mdclasses.conf_base import SubSystem
 from mdclasses.parser import SupportConfigurationParser
+from mdclasses.benchmarks.baseline import RegExpSupportConfigurationParser
+from mdclasses.benchmarks.generator import write_support_file
+from mdclasses.utils.manifest import DumpManifest
+from mdclasses.diff import ConfigurationDiff, ChangeType, diff_configurations
+from mdclasses.merge import merge_configuration_modules
+from mdclasses.Module import MergeStatus, ModuleLinter
+from mdclasses.Module.ModuleLinter import ServerCallFromClientRule
+from mdclasses.type_description import TypeDescription
+from mdclasses.Template.dcs import read_dcs_queries
 
 test_data_root = Path(Path(__file__).parent).joinpath('test_data', 'config')
 json_report_path = Path(Path(__file__).parent).joinpath('test_data', 'json_data', 'report.json')
 json_config_path = Path(Path(__file__).parent).joinpath('test_data', 'json_data', 'configuration_not_full.json')
+edt_data_root = Path(Path(__file__).parent).joinpath('test_data', 'edt').absolute()
 
 encoding = 'utf-8'
 
@@ -132,8 +148,42 @@ class TestConfiguration(case.TestCase):
         doc.read_forms()
         self.assertEqual(len(doc.forms), 1, 'не все формы были прочитаны.')
 
+        self.assertFalse(doc.forms[0]._module_read, 'Модуль формы прочитан до обращения к нему')
         self.assertIsInstance(doc.forms[0].module, Module, 'Модуль не прочитан')
 
+        doc.read_forms(parse_modules=True, workers=2)
+        self.assertTrue(doc.forms[0]._module_read, 'Модуль формы не прочитан при чтении форм')
+        self.assertIsInstance(doc.forms[0].module, Module, 'Модуль не прочитан')
+
+    def test_read_form_structure(self):
+        conf_path = Path(test_data_root).absolute()
+        conf = read_configuration(conf_path)
+
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+        doc.read_forms()
+        form = doc.forms[0]
+
+        self.assertIsNone(form._structure, 'Структура формы прочитана до обращения к ней')
+
+        self.assertListEqual([(opt.name, opt.value) for opt in form.options],
+                             [('AutoTime', 'CurrentOrLast'), ('UsePostingMode', 'Auto'), ('RepostOnWrite', 'true')],
+                             'Не верно прочитаны свойства формы')
+        self.assertEqual(len(form.elements), 29, 'Не верно прочитаны элементы формы')
+
+        number = form.elements[1]
+        self.assertTupleEqual((number.element_type, number.name, number.data_path),
+                              ('InputField', 'Номер', 'Объект.Number'), 'Не верно прочитан элемент формы')
+        self.assertIs(form.elements[2].parent, number, 'Не верно определен родитель элемента формы')
+
+        self.assertListEqual([attr.name for attr in form.attributes], ['Объект'], 'Не верно прочитаны реквизиты')
+        self.assertListEqual(form.attributes[0].types, ['cfg:DocumentObject.Документ1'], 'Не верно прочитан тип')
+        self.assertTrue(form.attributes[0].main, 'Не определен основной реквизит')
+
+        action = form.commands[0].action
+        self.assertEqual(action.handler, 'Команда1', 'Не верно прочитано действие команды')
+        self.assertIs(action.sub_program, form.module.find_sub_program('Команда1'),
+                      'Обработчик не связан с процедурой модуля')
+
     def read_empty_form(self):
         conf_path = Path(test_data_root).absolute()
         conf = read_configuration(conf_path)
@@ -198,6 +248,364 @@ class TestConfiguration(case.TestCase):
 
         self.assertEqual(len(obj_data), 11, 'Количество прочитанных объектов, определено не верно.')
 
+    def test_search_modules(self):
+        conf_path = Path(test_data_root).absolute()
+        conf = create_configuration(conf_path)
+
+        entries = conf.search_modules('парам1')
+        names = sorted(set(entry.sub_program.name for entry in entries))
+        self.assertIn('Процедура3', names, 'Не найдена подпрограмма по идентификатору')
+        self.assertIn('Функция2', names, 'Не найдена подпрограмма по идентификатору')
+
+        index = conf.module_index()
+        update = index.update
+        updates = []
+        index.update = lambda: updates.append(1) or update()
+        conf.search_modules('парам1')
+        self.assertListEqual(updates, [], 'Выгрузка просканирована при повторном поиске')
+        conf.search_modules('парам1', refresh=True)
+        self.assertListEqual(updates, [1], 'Индекс не обновлен по запросу')
+
+    def test_instrumentation(self):
+        conf_path = Path(test_data_root).absolute()
+        reporter = PhaseReporter()
+        add_observer(reporter)
+        try:
+            conf = read_configuration(conf_path)
+            conf.get_object('Документ1', ObjectType.DOCUMENT).read_modules()
+        finally:
+            remove_observer(reporter)
+
+        report = reporter.report()
+        for phase in ['create_configuration', 'parse', 'handle_child_subsystems', 'get_support_data',
+                      'create_module', 'parse_block']:
+            self.assertIn(phase, report, f'Не получены замеры этапа {phase}')
+
+        self.assertEqual(report['create_module']['count'], 2, 'Не верно количество замеров чтения модулей')
+        self.assertEqual(report['create_configuration']['counters']['objects'], 46, 'Не верно значение счетчика')
+        self.assertGreater(report['parse']['size'], 0, 'Не определен размер прочитанных файлов')
+
+        read_configuration(conf_path)
+        self.assertEqual(reporter.report()['create_configuration']['count'], 1,
+                         'Замеры выполняются после удаления наблюдателя')
+
+    def test_read_support_streaming(self):
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            support_path = temp_dir.joinpath('ParentConfigurations.bin')
+            uuids = ['1996326a-5156-4eb1-a9fe-5db6ab532426', 'db782936-9c10-4a51-acab-ca941d0dabd6']
+            write_support_file(support_path, uuids, configurations=3)
+
+            support_parser = SupportConfigurationParser(support_path)
+            support_parser.CHUNK_SIZE = 7
+            data = support_parser.parse()
+
+            self.assertDictEqual(data, RegExpSupportConfigurationParser(support_path).parse(),
+                                 'Результат чтения отличается от прежней реализации')
+            self.assertEqual(len(data), 3, 'Прочитаны не все конфигурации поставщиков')
+            self.assertEqual(data['Поставщик2']['conf_objects'][uuids[1]], 2, 'не верно определено свойство')
+
+            provider = '"Поставщик, ""ООО"""'
+            support_path.write_text(
+                support_path.read_text(encoding='utf-8-sig').replace('"Поставщик"', provider),
+                encoding='utf-8-sig'
+            )
+            data = support_parser.parse()
+            self.assertEqual(data['Поставщик0']['conf_provider'], provider,
+                             'Не верно прочитана строка с запятой и кавычками')
+
+            data = SupportConfigurationParser(support_path, uuid_as_bytes=True).parse()
+            self.assertIn(UUID(uuids[0]).bytes, data['Поставщик0']['conf_objects'], 'uuid не преобразован в ключ')
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_set_support(self):
+        conf_path = Path(test_data_root).absolute()
+        conf = read_configuration(conf_path)
+
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+        report = conf.get_object('Отчет1', ObjectType.REPORT)
+        tabular = doc.attributes[1]
+
+        for uuid_key in [str, lambda value: UUID(value).bytes]:
+            support_data = {
+                'Поставщик': dict(conf_objects={
+                    uuid_key(doc.uuid): 0,
+                    uuid_key(tabular.attributes[0].uuid): 0,
+                    uuid_key(report.uuid): 1,
+                }),
+                conf.name: dict(conf_objects={uuid_key(conf.uuid): 0})
+            }
+            conf.set_support(support_data)
+
+            self.assertEqual(doc.support_type, SupportType.NOT_EDITABLE, 'Не верно установлена поддержка объекта')
+            self.assertEqual(tabular.attributes[0].support_type, SupportType.NOT_EDITABLE,
+                             'Не верно установлена поддержка реквизита табличной части')
+            self.assertEqual(tabular.support_type, SupportType.NONE_SUPPORT, 'Не верно установлена поддержка')
+            self.assertEqual(conf.support_type, SupportType.NONE_SUPPORT, 'Не верно установлена поддержка')
+
+            self.assertListEqual(conf.objects_by_support(SupportType.NOT_EDITABLE), [doc, tabular.attributes[0]],
+                                 'Не верно определены объекты по типу поддержки')
+            self.assertListEqual(
+                conf.objects_by_support(SupportType.NOT_EDITABLE, SupportType.EDITABLE_SUPPORT_ENABLED),
+                [doc, tabular.attributes[0], report],
+                'Не верно определены объекты по типу поддержки')
+
+    def test_query(self):
+        conf_path = Path(test_data_root).absolute()
+        conf = read_configuration(conf_path)
+
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+        catalogs = [conf.get_object('Справочник1', ObjectType.CATALOG),
+                    conf.get_object('Справочник2', ObjectType.CATALOG)]
+
+        self.assertListEqual(conf.query(obj_type=ObjectType.DOCUMENT, props=dict(Posting='Allow')).all(), [doc],
+                             'Не верно отобраны объекты по свойству')
+        self.assertListEqual(conf.query(name='справочник*').all(), catalogs, 'Не верно отобраны объекты по имени')
+        self.assertListEqual(conf.query().of_type('Catalog').with_attribute('реквизит1').all(), catalogs,
+                             'Не верно отобраны объекты по реквизиту')
+        self.assertEqual(conf.query(obj_type=ObjectType.CATALOG).where(Posting='Allow').count(), 0,
+                         'Не верно отобраны объекты по свойству')
+
+        conf.set_support({'Поставщик': dict(conf_objects={doc.uuid: 0})})
+        self.assertListEqual(conf.query().on_support().all(), [doc], 'Не верно отобраны объекты на поддержке')
+
+        new_doc = ConfObject('Документ2', ObjectType.DOCUMENT, conf)
+        conf.add_object(new_doc)
+        self.assertIn(new_doc, conf.query(obj_type=ObjectType.DOCUMENT).all(),
+                      'Индекс запросов не сброшен при добавлении объекта')
+
+    def test_subsystem_index(self):
+        conf_path = Path(test_data_root).absolute()
+        conf = read_configuration(conf_path)
+
+        subsystem1 = conf.get_object('Подсистема1', ObjectType.SUBSYSTEM)
+        subsystem2 = conf.get_object('Подсистема2', ObjectType.SUBSYSTEM)
+        subsystem3 = conf.get_object('Подсистема3', ObjectType.SUBSYSTEM)
+        catalog = conf.get_object('Справочник2', ObjectType.CATALOG)
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+
+        self.assertEqual(subsystem2.level, 1, 'Не верно определен уровень вложенной подсистемы')
+        self.assertListEqual(subsystem2.childes, [catalog], 'Не верно определен состав подсистемы')
+        self.assertNotIn(catalog, subsystem1.members(), 'Объект вложенной подсистемы в составе родителя')
+        self.assertIn(catalog, subsystem1.members(recursive=True), 'Не учтен состав вложенной подсистемы')
+
+        self.assertListEqual(conf.subsystems(catalog), [subsystem2, subsystem1],
+                             'Не верно определены подсистемы объекта')
+        self.assertListEqual(conf.subsystems(catalog, recursive=False), [subsystem2],
+                             'Не верно определены подсистемы объекта')
+        self.assertListEqual(conf.subsystems(doc), [subsystem1, subsystem3], 'Не верно определены подсистемы объекта')
+
+        restored = Configuration.from_dict(conf.to_dict())
+        restored_catalog = restored.get_object('Справочник2', ObjectType.CATALOG)
+        self.assertListEqual(
+            [obj.name for obj in restored.subsystems(restored_catalog)],
+            ['Подсистема2', 'Подсистема1'],
+            'Состав подсистем не восстановлен из словаря'
+        )
+        self.assertEqual(restored.get_object('Подсистема2', ObjectType.SUBSYSTEM).level, 1,
+                         'Не восстановлена вложенность подсистем')
+
+        first = SubSystem('Общая', subsystem1, childes=[('Catalog', 'Справочник2')])
+        second = SubSystem('Общая', subsystem3, childes=[('Document', 'Документ1')])
+        conf.conf_objects.extend([first, second])
+        conf.reset_indexes()
+        self.assertListEqual(first.members(), [catalog], 'Не верно определен состав одноименной подсистемы')
+        self.assertListEqual(second.members(), [doc], 'Не верно определен состав одноименной подсистемы')
+        self.assertIn(second, conf.subsystems(doc), 'Не верно определены подсистемы объекта')
+
+        restored = Configuration.from_dict(conf.to_dict())
+        restored_first, restored_second = [obj for obj in restored.conf_objects if obj.name == 'Общая']
+        self.assertEqual(restored_first.qualified_name, 'Подсистема1.Общая', 'Не восстановлена вложенность подсистем')
+        self.assertEqual(restored_second.qualified_name, 'Подсистема3.Общая', 'Не восстановлена вложенность подсистем')
+        self.assertListEqual([obj.full_name for obj in restored_second.members()], ['Document.Документ1'],
+                             'Состав одноименной подсистемы не восстановлен из словаря')
+
+    def test_reference_index(self):
+        conf = read_configuration(Path(test_data_root).absolute())
+
+        register = conf.get_object('РегистрНакопления1', ObjectType.ACCUMULATION_REGISTER)
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+        self.assertIn(('AccumulationRegister.РегистрНакопления1', 'RegisterRecords'), doc.references,
+                      'Не прочитаны ссылки объекта')
+        self.assertListEqual(conf.referenced_by(register), [doc], 'Не верно определены ссылающиеся объекты')
+
+        group = conf.get_object('ГруппаКоманд1', ObjectType.COMMAND_GROUP)
+        self.assertEqual(len(conf.referenced_by(group)), 12, 'Не верно определены ссылающиеся объекты')
+        self.assertIn((doc, 'Command.Команда1.Group'), conf.reference_index.references(group),
+                      'Не определен путь к свойству со ссылкой')
+        self.assertListEqual(
+            sorted(obj.full_name for obj in conf.referenced_by('Catalog.Справочник1')),
+            ['EventSubscription.ПодпискаНаСобытие1', 'FilterCriterion.КритерийОтбора1',
+             'FunctionalOptionsParameter.ПараметрФункциональныхОпций1'],
+            'Не верно определены ссылающиеся объекты'
+        )
+        self.assertFalse(conf.reference_index.is_referenced(doc.full_name + '1'), 'Найдены лишние ссылки')
+        self.assertListEqual(conf.reference_index.unresolved(), [], 'Найдены ссылки на отсутствующие объекты')
+
+    def test_attribute_types(self):
+        conf = read_configuration(Path(test_data_root).absolute())
+
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+        attr_type = doc.attributes[0].type
+        self.assertListEqual(list(attr_type.types), ['String'], 'Не верно прочитан тип реквизита')
+        self.assertEqual(attr_type.qualifier('Length'), '10', 'Не верно прочитаны квалификаторы строки')
+        self.assertIsNone(doc.attributes[1].type, 'У табличной части не должно быть типа')
+        self.assertIs(doc.attributes[1].attributes[0].type, attr_type, 'Одинаковые описания типов не интернированы')
+
+        register = conf.get_object('РегистрНакопления1', ObjectType.ACCUMULATION_REGISTER)
+        resource = next(attr for attr in register.attributes if attr.name == 'Ресурс1')
+        self.assertListEqual(resource.type.primitive_types, ['Number'], 'Не верно прочитан тип ресурса')
+        self.assertEqual(resource.type.qualifier('Digits'), '10', 'Не верно прочитаны квалификаторы числа')
+        self.assertIs(TypeDescription.from_dict(resource.type.to_dict()), resource.type,
+                      'Описание типа не восстановлено из словаря')
+
+    def test_object_childes(self):
+        conf = read_configuration(Path(test_data_root).absolute())
+
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+        self.assertListEqual([form.name for form in doc.forms], ['ФормаДокумента'], 'Не прочитаны формы объекта')
+        self.assertEqual(doc.forms[0].line_number, 118, 'Не верно определена строка формы')
+        self.assertTrue(doc.forms[0].description_path.exists(), 'Не верно определен путь к описанию формы')
+        self.assertTrue(doc.forms[0].structure_path.exists(), 'Не верно определен путь к структуре формы')
+        self.assertListEqual([template.name for template in doc.templates], ['Макет'], 'Не прочитаны макеты объекта')
+        self.assertEqual(doc.commands[0].uuid, '12fc1b79-4a7c-4112-9646-7030ce632688', 'Не прочитаны команды объекта')
+
+        register = conf.get_object('РегистрРасчета1', ObjectType.CALCULATION_REGISTER)
+        self.assertListEqual([form.name for form in register.forms], ['ФормаСписка', 'ФормаНабораЗаписей'],
+                             'Не прочитаны формы объекта')
+
+        doc.read_forms()
+        self.assertEqual(len(doc.forms), 1, 'Формы с диска не сопоставлены с формами описания')
+        self.assertEqual(doc.forms[0].line_number, 118, 'Не сохранена строка формы из описания')
+
+    def test_templates(self):
+        conf = read_configuration(Path(test_data_root).absolute())
+
+        report = conf.get_object('Отчет1', ObjectType.REPORT)
+        self.assertListEqual([template.name for template in report.templates], ['Макет', 'ОсновнаяСхемаКомпоновкиДанных'],
+                             'Не прочитаны макеты объекта')
+        template = report.templates[1]
+        self.assertEqual(template.template_type, TemplateType.DATA_COMPOSITION_SCHEMA, 'Не верно определен тип макета')
+        self.assertFalse(template.loaded, 'Данные макета прочитаны до обращения к ним')
+
+        queries = template.queries()
+        self.assertListEqual([query.data_set for query in queries], ['НаборДанных1', 'НаборДанных3'],
+                             'Не прочитаны запросы схемы компоновки данных')
+        self.assertListEqual(queries[0].fields, ['Ссылка', 'Реквизит1'], 'Не прочитаны поля набора данных')
+        self.assertIn('Документ.Документ1', queries[0].text, 'Не прочитан текст запроса')
+        self.assertListEqual(report.templates[0].queries(), [], 'Запросы найдены в текстовом макете')
+        self.assertFalse(any(template.loaded for template in report.templates),
+                         'Данные макетов отображены в память при чтении запросов')
+        self.assertEqual(next(read_dcs_queries(template.payload_path)).data_set, 'НаборДанных1',
+                         'Не прочитан первый запрос схемы')
+
+        with conf.get_object('Макет', ObjectType.COMMON_TEMPLATE).template as common_template:
+            self.assertEqual(common_template.template_type, TemplateType.BINARY_DATA, 'Не верно определен тип макета')
+            self.assertEqual(common_template.payload, b'', 'Не верно прочитаны данные макета')
+
+        self.assertListEqual(
+            [(template.name, len(queries)) for template, queries in conf.dcs_queries(workers=2)],
+            [('ОсновнаяСхемаКомпоновкиДанных', 2)],
+            'Не верно найдены схемы компоновки данных'
+        )
+        self.assertEqual(len(conf.templates(TemplateType.TEXT_DOCUMENT)), 12, 'Не верно отобраны макеты по типу')
+
+    def test_module_queries(self):
+        conf = read_configuration(Path(test_data_root).absolute())
+
+        index = conf.module_queries(workers=2)
+        self.assertEqual(len(index), 1, 'Не верно найдены запросы модулей')
+        query = index.queries[0]
+        self.assertEqual(query.sub_program.name, 'Функция1', 'Не верно определена подпрограмма запроса')
+        self.assertListEqual(
+            [(table.full_name, table.table) for table in query.tables],
+            [('Document.Документ1', ''), ('Catalog.Справочник1', ''),
+             ('AccumulationRegister.РегистрНакопления1', 'Остатки'), ('Document.Документ1', 'ТабличнаяЧасть1')],
+            'Не верно определены таблицы запроса'
+        )
+        register = conf.get_object('РегистрНакопления1', ObjectType.ACCUMULATION_REGISTER)
+        self.assertListEqual(index.reading(register), [query], 'Не верно определены запросы к объекту')
+        self.assertListEqual(index.reading('Catalog.Справочник2'), [], 'Запрос из комментария попал в индекс')
+
+    def test_lint_modules(self):
+        conf = read_configuration(Path(test_data_root).absolute())
+
+        linter = ModuleLinter()
+        self.assertListEqual(list(conf.lint_modules(linter=linter, workers=2)), [],
+                             'Найдены проблемы в модулях без проблем')
+        misses = linter.cache.misses
+        list(conf.lint_modules(linter=linter, workers=2))
+        self.assertEqual(linter.cache.misses, misses, 'Модули без изменений проверены повторно')
+
+        threads = set()
+
+        class ThreadRule(ServerCallFromClientRule):
+            def check(self, code):
+                threads.add(threading.get_ident())
+                return super().check(code)
+
+        list(conf.lint_modules(linter=ModuleLinter(rules=[ThreadRule()], workers=8), workers=1))
+        self.assertEqual(len(threads), 1, 'Не учтено число потоков проверки')
+
+        issues = list(conf.lint_modules(linter=ModuleLinter(rules=[ServerCallFromClientRule(max_calls=0)])))
+        self.assertListEqual(
+            [(issue.path.parts[-6:-1], issue.sub_program) for issue in issues],
+            [(('Документ1', 'Forms', 'ФормаДокумента', 'Ext', 'Form'), 'Команда1')],
+            'Не верно найдены серверные вызовы из клиентского кода'
+        )
+
+    def test_cached_paths(self):
+        conf_path = Path(test_data_root).absolute()
+        conf = read_configuration(conf_path)
+
+        catalog = conf.get_object('Справочник1', ObjectType.CATALOG)
+        subsystem = conf.get_object('Подсистема2', ObjectType.SUBSYSTEM)
+
+        self.assertIs(catalog.ext_path, catalog.ext_path, 'Путь объекта не закэширован')
+        self.assertIs(subsystem.root_path, subsystem.root_path, 'Корень вложенной подсистемы не закэширован')
+        self.assertIs(subsystem.file_name, subsystem.file_name, 'Путь вложенной подсистемы не закэширован')
+        root_path = subsystem.root_path
+        subsystem.file_name
+        self.assertIs(subsystem.root_path, root_path, 'Кэш корня подсистемы сброшен при обращении к пути')
+        self.assertEqual(catalog.file_name, conf_path.joinpath('Catalogs', 'Справочник1.xml'),
+                         'Не верно определен путь к файлу объекта')
+        self.assertEqual(subsystem.file_name,
+                         conf_path.joinpath('Subsystems', 'Подсистема1', 'Subsystems', 'Подсистема2.xml'),
+                         'Не верно определен путь к файлу вложенной подсистемы')
+
+        catalog.name = 'Справочник3'
+        self.assertEqual(catalog.obj_dir, conf_path.joinpath('Catalogs', 'Справочник3'),
+                         'Кэш путей не сброшен при изменении имени')
+
+        new_root = conf_path.parent.joinpath('other')
+        conf.root_path = new_root
+        self.assertEqual(catalog.file_name, new_root.joinpath('Catalogs', 'Справочник3.xml'),
+                         'Кэш путей не сброшен при изменении корня')
+        self.assertEqual(subsystem.root_path, new_root.joinpath('Subsystems', 'Подсистема1'),
+                         'Кэш путей не сброшен при изменении корня')
+
+    def test_manifest(self):
+        conf_path = Path(test_data_root).absolute()
+        manifest = DumpManifest(conf_path)
+
+        doc_ext = conf_path.joinpath('Documents', 'Документ1', 'Ext')
+        self.assertListEqual(
+            sorted(manifest.files(doc_ext, '.bsl')),
+            sorted(el for el in doc_ext.iterdir() if el.suffix == '.bsl'),
+            'Не верно определены модули объекта по манифесту'
+        )
+        self.assertTrue(manifest.is_file(conf_path.joinpath('Configuration.xml')), 'Файл не найден в манифесте')
+        self.assertTrue(manifest.is_dir(doc_ext), 'Каталог не найден в манифесте')
+        self.assertFalse(manifest.exists(conf_path.joinpath('Documents', 'Документ2')),
+                         'Найден отсутствующий каталог')
+        self.assertListEqual(manifest.files(conf_path.parent), [], 'Найдены файлы вне выгрузки')
+
+        conf = read_configuration(conf_path)
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+        doc.read_forms()
+        self.assertIsNotNone(doc.forms[0].module, 'Модуль формы не найден по манифесту')
+
     def test_from_json(self):
         config = read_from_json(json_config_path)
 
@@ -208,6 +616,280 @@ class TestConfiguration(case.TestCase):
         os.remove(json_path)
 
 
+class TestEDTConfiguration(case.TestCase):
+
+    def test_read_configuration(self):
+        conf = read_configuration(edt_data_root, Format.EDT)
+
+        self.assertEqual(conf.name, 'Конфигурация', 'Не верно определено имя конфигурации.')
+        self.assertEqual(conf.root_path, edt_data_root.joinpath('src'), 'Не верно установлен корень конфигурации')
+        self.assertEqual(len(conf.conf_objects), 6, 'Не корректно загружен состав объектов.')
+
+        catalog = conf.get_object('Справочник1', ObjectType.CATALOG)
+        self.assertEqual(catalog.uuid, '0b8e2d0e-5a7c-4e0a-9a2c-1f7c7e5c7e10', 'Не верно определен uuid объекта')
+        self.assertEqual(catalog.line_number, 6, 'Не верно определена строка в файле')
+        self.assertListEqual([attr.name for attr in catalog.attributes], ['Реквизит1', 'ТабличнаяЧасть1'],
+                             'Не верно прочитаны реквизиты')
+        self.assertEqual(catalog.attributes[1].attributes[0].name, 'Реквизит1',
+                         'Не верно прочитаны реквизиты табличной части')
+
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+        self.assertListEqual(conf.query(props=dict(Posting='Allow')).all(), [doc], 'Не верно прочитаны свойства')
+
+        subsystem = conf.get_object('Подсистема2', ObjectType.SUBSYSTEM)
+        self.assertEqual(subsystem.level, 1, 'Не верно определен уровень вложенной подсистемы')
+        self.assertListEqual(subsystem.childes, [doc], 'Не верно определен состав подсистемы')
+
+    def test_reference_index(self):
+        conf = read_configuration(edt_data_root, Format.EDT)
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+
+        self.assertListEqual(doc.references, [('Catalog.Справочник1', 'Attribute.Реквизит1.Type')],
+                             'Не верно прочитаны ссылки объекта')
+        self.assertListEqual(conf.referenced_by(conf.get_object('Справочник1', ObjectType.CATALOG)), [doc],
+                             'Не верно определены ссылающиеся объекты')
+
+    def test_attribute_types(self):
+        conf = read_configuration(edt_data_root, Format.EDT)
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+
+        self.assertListEqual(doc.attributes[0].type.reference_types, ['CatalogRef.Справочник1'],
+                             'Не верно прочитан ссылочный тип реквизита')
+        self.assertFalse(doc.attributes[0].type.composite, 'Тип реквизита не составной')
+
+    def test_read_modules_and_forms(self):
+        conf = read_configuration(edt_data_root, Format.EDT, workers=2)
+
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+        self.assertEqual(doc.forms[0].uuid, '0b8e2d0e-5a7c-4e0a-9a2c-1f7c7e5c7e22', 'Не прочитаны формы объекта')
+        doc.read_modules()
+        doc.read_forms()
+        self.assertEqual(len(doc.modules), 2, 'не все модули были прочитаны.')
+        self.assertEqual(len(doc.forms), 1, 'не все формы были прочитаны.')
+        self.assertEqual(doc.forms[0].name, 'ФормаДокумента', 'Не верно определено имя формы')
+        self.assertIsInstance(doc.forms[0].module, Module, 'Модуль формы не прочитан')
+
+        handlers = doc.forms[0].handlers()
+        self.assertListEqual([(h.event, h.handler) for h in handlers], [('OnCreateAtServer', 'ПриСозданииНаСервере')],
+                             'Не верно прочитаны обработчики формы')
+        self.assertIs(handlers[0].sub_program, doc.forms[0].module.find_sub_program('ПриСозданииНаСервере'),
+                      'Обработчик не связан с процедурой модуля')
+        self.assertEqual(doc.forms[0].elements[0].element_type, 'AutoCommandBar', 'Не верно прочитан элемент формы')
+
+        common_module = conf.get_object('ОбщийМодуль1', ObjectType.COMMON_MODULE)
+        common_module.read_modules()
+        self.assertEqual(len(common_module.modules), 1, 'Модуль общего модуля не прочитан')
+
+
+class TestAsyncConfiguration(case.TestCase):
+
+    def test_aread_configuration(self):
+        conf_path = Path(test_data_root).absolute()
+        expected = read_configuration(conf_path)
+
+        async def load():
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                conf = await aread_configuration(conf_path, executor=executor)
+                await conf.aread_all_modules(executor=executor)
+            return conf
+
+        conf = asyncio.run(load())
+
+        self.assertListEqual([(obj.full_name, obj.uuid) for obj in conf.conf_objects],
+                             [(obj.full_name, obj.uuid) for obj in expected.conf_objects],
+                             'Состав конфигурации отличается от синхронного чтения')
+        self.assertEqual(conf.get_object('Документ1', ObjectType.DOCUMENT).support_type,
+                         expected.get_object('Документ1', ObjectType.DOCUMENT).support_type,
+                         'Не установлена поддержка')
+
+        doc = conf.get_object('Документ1', ObjectType.DOCUMENT)
+        expected_doc = expected.get_object('Документ1', ObjectType.DOCUMENT)
+        expected_doc.read_modules()
+        self.assertListEqual([module.file_name for module in doc.modules],
+                             [module.file_name for module in expected_doc.modules],
+                             'Модули прочитаны не верно')
+
+    def test_cancel(self):
+        conf_path = Path(test_data_root).absolute()
+
+        async def load():
+            task = asyncio.ensure_future(aread_configuration(conf_path))
+            await asyncio.sleep(0)
+            task.cancel()
+            await task
+
+        with self.assertRaises(asyncio.CancelledError, msg='Чтение конфигурации не отменено'):
+            asyncio.run(load())
+
+
+class TestConfigurationDiff(case.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+        self.old_path = self.temp_path.joinpath('old')
+        self.new_path = self.temp_path.joinpath('new')
+        shutil.copytree(test_data_root, self.old_path)
+        shutil.copytree(test_data_root, self.new_path)
+
+    def test_diff_same(self):
+        old = read_configuration(self.old_path)
+        new = read_configuration(self.new_path)
+        reporter = PhaseReporter()
+        add_observer(reporter)
+        try:
+            changes = list(diff_configurations(old, new))
+        finally:
+            remove_observer(reporter)
+
+        self.assertListEqual(changes, [], 'Найдены изменения в одинаковых выгрузках')
+        self.assertNotIn('create_module', reporter.report(), 'Разобраны неизмененные модули')
+        self.assertEqual(reporter.report()['scan_manifest']['count'], 2, 'Выгрузки просканированы несколько раз')
+
+    def test_diff(self):
+        doc_file = self.new_path.joinpath('Documents', 'Документ1.xml')
+        text = doc_file.read_text(encoding='utf-8-sig')
+        text = text.replace('<Posting>Allow</Posting>', '<Posting>Deny</Posting>')
+        text = text.replace('<Name>Реквизит1</Name>', '<Name>Реквизит5</Name>', 1)
+        doc_file.write_text(text, encoding='utf-8-sig')
+
+        module_file = self.new_path.joinpath('Documents', 'Документ1', 'Ext', 'ObjectModule.bsl')
+        text = module_file.read_text(encoding='utf-8-sig')
+        text = text.replace('Процедура Процедура2()\n\t', 'Процедура Процедура2()\n\tА = 1;')
+        text = text.replace('Функция Функция3()', 'Функция Функция4()')
+        module_file.write_text(text, encoding='utf-8-sig')
+
+        shutil.rmtree(self.new_path.joinpath('Reports'))
+        conf_file = self.new_path.joinpath('Configuration.xml')
+        conf_file.write_text(conf_file.read_text(encoding='utf-8-sig').replace('<Report>Отчет1</Report>', ''),
+                             encoding='utf-8-sig')
+
+        old = read_configuration(self.old_path)
+        new = read_configuration(self.new_path)
+
+        reporter = PhaseReporter()
+        add_observer(reporter)
+        try:
+            changes = list(ConfigurationDiff(old, new, workers=2).changes())
+        finally:
+            remove_observer(reporter)
+
+        result = {(ch.change_type, ch.kind, ch.obj_name, ch.path) for ch in changes}
+        expected = {
+            (ChangeType.REMOVED, 'object', 'Report.Отчет1', ''),
+            (ChangeType.REMOVED, 'content', 'Subsystem.Подсистема1', 'Report.Отчет1'),
+            (ChangeType.CHANGED, 'prop', 'Document.Документ1', 'Posting'),
+            (ChangeType.CHANGED, 'attribute', 'Document.Документ1', 'Реквизит1'),
+            (ChangeType.CHANGED, 'module', 'Document.Документ1', 'ObjectModule'),
+            (ChangeType.CHANGED, 'sub_program', 'Document.Документ1', 'ObjectModule.Процедура2'),
+            (ChangeType.REMOVED, 'sub_program', 'Document.Документ1', 'ObjectModule.Функция3'),
+            (ChangeType.ADDED, 'sub_program', 'Document.Документ1', 'ObjectModule.Функция4'),
+        }
+        self.assertSetEqual(result, expected, 'Не верно определены изменения')
+        self.assertEqual(reporter.report()['create_module']['count'], 2, 'Разобраны неизмененные модули')
+
+        posting = next(ch for ch in changes if ch.kind == 'prop')
+        self.assertEqual((posting.old, posting.new), ('Allow', 'Deny'), 'Не верно значение свойства')
+
+    def test_merkle_tree(self):
+        old = read_configuration(self.old_path)
+        new = read_configuration(self.new_path)
+        reporter = PhaseReporter()
+        add_observer(reporter)
+        try:
+            old.merkle_tree
+        finally:
+            remove_observer(reporter)
+        self.assertEqual(reporter.report()['scan_manifest']['count'], 1, 'Выгрузка просканирована несколько раз')
+        self.assertEqual(old.content_hash, new.content_hash, 'Хеши одинаковых выгрузок различаются')
+
+        module_path = self.new_path.joinpath('Documents', 'Документ1', 'Ext', 'ObjectModule.bsl')
+        module_path.write_text(module_path.read_text(encoding='utf-8-sig').replace(
+            'Процедура Процедура2()\n\t', 'Процедура Процедура2()\n\tА = 1;'), encoding='utf-8-sig')
+        catalog = new.get_object('Справочник1', ObjectType.CATALOG)
+        catalog.props['Comment'] = 'Новый комментарий'
+
+        new.reset_indexes()
+        self.assertNotEqual(old.content_hash, new.content_hash, 'Не изменился хеш конфигурации')
+        self.assertSetEqual(old.merkle_tree.changed_objects(new.merkle_tree),
+                            {'Document.Документ1', 'Catalog.Справочник1'}, 'Не верно определены измененные объекты')
+        self.assertListEqual([path for path, _, _ in old.merkle_tree.diff(new.merkle_tree)],
+                             ['Catalog/Справочник1/#content', 'Document/Документ1/ObjectModule'],
+                             'Не верно определены измененные узлы')
+
+        doc = new.get_object('Документ1', ObjectType.DOCUMENT)
+        doc.read_modules()
+        module = next(module for module in doc.modules if module.name == 'ObjectModule')
+        self.assertEqual(new.merkle_tree.object_node(doc).children['ObjectModule'].hash, module.content_hash,
+                         'Хеш модуля в дереве отличается от хеша текста модуля')
+
+        changes = list(ConfigurationDiff(old, new, use_hashes=True).changes())
+        self.assertSetEqual({(ch.kind, ch.obj_name, ch.path) for ch in changes}, {
+            ('prop', 'Catalog.Справочник1', 'Comment'),
+            ('module', 'Document.Документ1', 'ObjectModule'),
+            ('sub_program', 'Document.Документ1', 'ObjectModule.Процедура2'),
+        }, 'Не верно определены изменения по дереву хешей')
+
+        self.assertNotIn('hashes', new.to_dict(), 'Дерево хешей сохранено без запроса')
+        restored = Configuration.from_dict(loads(dumps(new.to_dict(hashes=True), ensure_ascii=False)))
+        self.assertEqual(restored.content_hash, new.content_hash, 'Хеши не сохранены в to_dict')
+
+        restored = Configuration.from_dict(new.to_dict())
+        with self.assertRaises(ValueError):
+            restored.merkle_tree
+
+    def test_merkle_tree_nested_subsystems(self):
+        confs = [read_configuration(self.old_path), read_configuration(self.new_path)]
+        nested = []
+        for conf in confs:
+            parent = conf.get_object('Подсистема1', ObjectType.SUBSYSTEM)
+            subsystem = SubSystem('Подсистема3', parent, childes=[('Catalog', 'Справочник1')])
+            subsystem.uuid = 'e0b3b4ba-76f4-4d5e-9a47-3a2b1f7c9d10'
+            conf.conf_objects.append(subsystem)
+            conf.reset_indexes()
+            nested.append(subsystem)
+        old, new = confs
+
+        subsystems = [obj for obj in new.conf_objects if obj.obj_type == ObjectType.SUBSYSTEM]
+        self.assertEqual(len(new.merkle_tree.root.children['Subsystem'].children), len(subsystems),
+                         'Узлы одноименных подсистем совпали')
+
+        nested[1].props['Comment'] = 'Новый комментарий'
+        new.reset_indexes()
+        self.assertSetEqual(old.merkle_tree.changed_objects(new.merkle_tree), {'Subsystem.Подсистема1.Подсистема3'},
+                            'Не верно определены измененные объекты')
+        changes = list(ConfigurationDiff(old, new, use_hashes=True).changes())
+        self.assertListEqual([(ch.kind, ch.path) for ch in changes], [('prop', 'Comment')],
+                             'Не найдено изменение вложенной подсистемы')
+
+    def test_merge_modules(self):
+        ours_path = self.temp_path.joinpath('ours')
+        shutil.copytree(test_data_root, ours_path)
+        module_path = Path('Documents', 'Документ1', 'Ext', 'ObjectModule.bsl')
+
+        theirs_file = self.new_path.joinpath(module_path)
+        theirs_file.write_text(theirs_file.read_text(encoding='utf-8-sig').replace(
+            'Процедура Процедура2()\n\t', 'Процедура Процедура2()\n\tА = 1;'), encoding='utf-8-sig')
+        ours_file = ours_path.joinpath(module_path)
+        ours_file.write_text(ours_file.read_text(encoding='utf-8-sig').replace(
+            'Процедура Процедура3(Парам1, Парам2)\n\t', 'Процедура Процедура3(Парам1, Парам2)\n\tБ = 1;'),
+            encoding='utf-8-sig')
+
+        results = list(merge_configuration_modules(
+            read_configuration(self.old_path), read_configuration(self.new_path), read_configuration(ours_path),
+            workers=2, write=True
+        ))
+
+        merged = [result for result in results if result.status != MergeStatus.UNCHANGED]
+        self.assertListEqual([(result.path, result.status) for result in merged],
+                             [(ours_file.absolute(), MergeStatus.MERGED)], 'Не верно выполнено слияние модулей')
+        text = ours_file.read_text(encoding='utf-8-sig')
+        self.assertIn('А = 1;', text, 'Не принято изменение поставщика')
+        self.assertIn('Б = 1;', text, 'Не сохранено наше изменение')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp_path)
+
+
 class TestChangeConfiguration(case.TestCase):
 
     def setUp(self) -> None:
@@ -0,0 +1,89 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+
+
+# Имена примитивных типов выгрузки конфигуратора (xs:, v8:) приводятся к именам EDT и встроенного языка
+_TYPE_NAMES = {
+    'xs:string': 'String',
+    'xs:decimal': 'Number',
+    'xs:boolean': 'Boolean',
+    'xs:dateTime': 'Date',
+    'xs:base64Binary': 'BinaryData',
+}
+
+PRIMITIVE_TYPES = frozenset({'String', 'Number', 'Boolean', 'Date', 'BinaryData', 'Null', 'Undefined'})
+
+
+def normalize_type_name(type_name: str) -> str:
+    type_name = type_name.strip()
+    if type_name in _TYPE_NAMES:
+        return _TYPE_NAMES[type_name]
+    prefix, _, name = type_name.partition(':')
+    return name if name else prefix
+
+
+class TypeDescription:
+    """
+    Описание типа реквизита: список типов (примитивные, ссылочные, составной тип) и квалификаторы.
+
+    Описания неизменяемы и интернируются: одинаковые описания разных реквизитов - один объект.
+    Квалификаторы хранятся в именах выгрузки конфигуратора: Length, AllowedLength, Digits,
+    FractionDigits, AllowedSign, DateFractions, для двоичных данных - BinaryLength, BinaryAllowedLength.
+    """
+
+    __slots__ = ('types', 'qualifiers')
+
+    _cache: Dict[tuple, 'TypeDescription'] = dict()
+    _lock = threading.Lock()
+
+    def __init__(self, types: Tuple[str, ...], qualifiers: Tuple[Tuple[str, str], ...]):
+        self.types = types
+        self.qualifiers = qualifiers
+
+    @classmethod
+    def create(cls, types: Iterable[str], qualifiers: Optional[Dict[str, str]] = None) -> 'TypeDescription':
+        key = (
+            tuple(normalize_type_name(type_name) for type_name in types),
+            tuple(sorted((qualifiers or {}).items()))
+        )
+        description = cls._cache.get(key)
+        if description is None:
+            with cls._lock:
+                description = cls._cache.setdefault(key, cls(*key))
+        return description
+
+    @property
+    def composite(self) -> bool:
+        return len(self.types) > 1
+
+    @property
+    def primitive_types(self) -> List[str]:
+        return [type_name for type_name in self.types if type_name in PRIMITIVE_TYPES]
+
+    @property
+    def reference_types(self) -> List[str]:
+        # Ссылочные типы объектов конфигурации: CatalogRef.Имя, DocumentRef.Имя и т.п.
+        return [type_name for type_name in self.types if '.' in type_name]
+
+    def qualifier(self, name: str) -> Optional[str]:
+        return dict(self.qualifiers).get(name)
+
+    def to_dict(self) -> dict:
+        return dict(types=list(self.types), qualifiers=dict(self.qualifiers))
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> Optional['TypeDescription']:
+        if data is None:
+            return None
+        return cls.create(data['types'], data.get('qualifiers'))
+
+    def __eq__(self, other):
+        if not isinstance(other, TypeDescription):
+            return NotImplemented
+        return self.types == other.types and self.qualifiers == other.qualifiers
+
+    def __hash__(self):
+        return hash((self.types, self.qualifiers))
+
+    def __repr__(self):
+        return f'<TypeDescription: {", ".join(self.types)}>'
@@ -0,0 +1,67 @@
+from pathlib import Path
+from typing import Union
+import hashlib
+import os
+import shutil
+import tempfile
+
+
+def _read_umask() -> int:
+    # umask читается только вместе с установкой нового значения, поэтому один раз при импорте:
+    # изменение umask во время параллельной записи повлияло бы на файлы других потоков
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _read_umask()
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def text_digest(text: str) -> str:
+    return content_digest(text.encode('utf-8'))
+
+
+def file_digest(path: Union[str, Path]) -> str:
+    path = Path(path)
+    if not path.exists():
+        return ''
+    return content_digest(path.read_bytes())
+
+
+def encode_text(text: str, encoding: str = 'utf-8-sig') -> bytes:
+    # Повторяем поведение Path.write_text: перевод строк в формат текущей ОС.
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    return text.encode(encoding)
+
+
+def write_bytes_atomic(path: Union[str, Path], data: bytes):
+    """
+    Запись файла через временный файл в том же каталоге: данные сбрасываются на диск (fsync),
+    после чего временный файл атомарно заменяет целевой.
+    Права доступа целевого файла сохраняются, новый файл получает права по umask, как при обычной записи.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            shutil.copymode(str(path), tmp_name)
+        else:
+            os.chmod(tmp_name, 0o666 & ~_UMASK)
+        os.replace(tmp_name, str(path))
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+
+def write_text_atomic(path: Union[str, Path], text: str, encoding: str = 'utf-8-sig'):
+    write_bytes_atomic(path, encode_text(text, encoding))
@@ -0,0 +1,162 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+import threading
+import time
+
+
+class PhaseEvent:
+
+    __slots__ = ('phase', 'duration', 'path', 'size', 'counters')
+
+    def __init__(self, phase: str, duration: float, path: Optional[Path] = None, size: Optional[int] = None,
+                 counters: Optional[Dict[str, int]] = None):
+        self.phase = phase
+        self.duration = duration
+        self.path = path
+        self.size = size
+        self.counters = {} if counters is None else counters
+
+    def __repr__(self):
+        return f'<PhaseEvent: {self.phase} {self.duration:.6f}s {self.path}>'
+
+
+class ABCObserver(ABC):
+
+    @abstractmethod
+    def handle(self, event: PhaseEvent):
+        pass
+
+
+class _NullPhase:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+
+    def __init__(self, instrumentation: 'Instrumentation', phase: str, path: Optional[Union[str, Path]],
+                 size: Optional[int], counters: Dict[str, int]):
+        self._instrumentation = instrumentation
+        self._phase = phase
+        self._path = None if path is None else Path(path)
+        self._size = size
+        self._counters = counters
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        duration = time.perf_counter() - self._start
+
+        size = self._size
+        if size is None and self._path is not None:
+            try:
+                size = self._path.stat().st_size
+            except OSError:
+                size = None
+
+        self._instrumentation.emit(PhaseEvent(self._phase, duration, self._path, size, self._counters))
+        return False
+
+    def count(self, name: str, value: int = 1):
+        self._counters[name] = self._counters.get(name, 0) + value
+
+
+class Instrumentation:
+    """
+    Замеры этапов чтения конфигурации.
+
+    Пока не зарегистрирован ни один наблюдатель, phase() возвращает пустой контекст
+    и замеры не выполняются.
+    """
+
+    def __init__(self):
+        self._observers: List[Union[ABCObserver, Callable[[PhaseEvent], None]]] = list()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return len(self._observers) != 0
+
+    def add_observer(self, observer: Union[ABCObserver, Callable[[PhaseEvent], None]]):
+        with self._lock:
+            self._observers = self._observers + [observer]
+
+    def remove_observer(self, observer: Union[ABCObserver, Callable[[PhaseEvent], None]]):
+        with self._lock:
+            self._observers = [el for el in self._observers if el is not observer]
+
+    def phase(self, phase: str, path: Optional[Union[str, Path]] = None, size: Optional[int] = None,
+              **counters: int) -> Union[_Phase, _NullPhase]:
+        if not self._observers:
+            return _NULL_PHASE
+        return _Phase(self, phase, path, size, counters)
+
+    def emit(self, event: PhaseEvent):
+        for observer in self._observers:
+            if isinstance(observer, ABCObserver):
+                observer.handle(event)
+            else:
+                observer(event)
+
+
+class PhaseReporter(ABCObserver):
+    """
+    Наблюдатель, собирающий сводку по этапам: количество, суммарное, минимальное и максимальное время,
+    объем прочитанных файлов и счетчики.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, dict] = dict()
+        self._lock = threading.Lock()
+
+    def handle(self, event: PhaseEvent):
+        with self._lock:
+            data = self._data.get(event.phase)
+            if data is None:
+                data = dict(count=0, total=0.0, min=event.duration, max=event.duration, size=0, counters={})
+                self._data[event.phase] = data
+            data['count'] += 1
+            data['total'] += event.duration
+            data['min'] = min(data['min'], event.duration)
+            data['max'] = max(data['max'], event.duration)
+            data['size'] += 0 if event.size is None else event.size
+            for name, value in event.counters.items():
+                data['counters'][name] = data['counters'].get(name, 0) + value
+
+    def report(self) -> Dict[str, dict]:
+        with self._lock:
+            return {phase: dict(data, counters=dict(data['counters'])) for phase, data in self._data.items()}
+
+    def clear(self):
+        with self._lock:
+            self._data = dict()
+
+    def __str__(self):
+        lines = [f'{"Этап":<30}{"Кол-во":>10}{"Всего, с":>12}{"Мин, с":>12}{"Макс, с":>12}{"Байт":>14}']
+        for phase, data in sorted(self.report().items(), key=lambda el: -el[1]['total']):
+            lines.append(
+                f'{phase:<30}{data["count"]:>10}{data["total"]:>12.4f}{data["min"]:>12.4f}'
+                f'{data["max"]:>12.4f}{data["size"]:>14}'
+            )
+        return '\n'.join(lines)
+
+
+instrumentation = Instrumentation()
+
+add_observer = instrumentation.add_observer
+remove_observer = instrumentation.remove_observer
+phase = instrumentation.phase
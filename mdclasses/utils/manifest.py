@@ -0,0 +1,97 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import os
+
+from mdclasses.utils.instrumentation import phase
+
+
+class ManifestDir:
+
+    __slots__ = ('files', 'dirs')
+
+    def __init__(self):
+        self.files: List[str] = list()
+        self.dirs: List[str] = list()
+
+
+class DumpManifest:
+    """
+    Манифест файлов выгрузки конфигурации.
+
+    Выгрузка обходится один раз через os.scandir, тип элемента берется из записи каталога без stat.
+    Сохраняются все каталоги и файлы модулей (.bsl) и описаний (.xml, .mdo, .form),
+    дальнейший поиск модулей и форм выполняется по манифесту без обращения к диску.
+    """
+
+    SUFFIXES = ('.bsl', '.xml', '.mdo', '.form')
+
+    def __init__(self, root_path: Union[str, Path]):
+        self.root_path = Path(root_path)
+        self._cwd = os.getcwd()
+        self._abs_root = os.path.normpath(os.path.join(self._cwd, os.fspath(root_path)))
+        self._prefix = self._abs_root if self._abs_root.endswith(os.sep) else self._abs_root + os.sep
+        self._dirs: Dict[str, ManifestDir] = dict()
+        self._scan()
+
+    def _scan(self):
+        with phase('scan_manifest', path=self.root_path) as cur_phase:
+            stack = ['']
+            while stack:
+                rel_path = stack.pop()
+                cur_dir = ManifestDir()
+                try:
+                    entries = os.scandir(os.path.join(self._abs_root, rel_path))
+                except OSError:
+                    continue
+                with entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            cur_dir.dirs.append(entry.name)
+                            stack.append(entry.name if not rel_path else f'{rel_path}{os.sep}{entry.name}')
+                        elif entry.name.endswith(self.SUFFIXES):
+                            cur_dir.files.append(entry.name)
+                self._dirs[rel_path] = cur_dir
+            cur_phase.count('dirs', len(self._dirs))
+
+    def _relative(self, path: Union[str, Path]) -> Optional[str]:
+        path = os.fspath(path)
+        if not os.path.isabs(path):
+            path = os.path.join(self._cwd, path)
+        path = os.path.normpath(path)
+        if path == self._abs_root:
+            return ''
+        if path.startswith(self._prefix):
+            return path[len(self._prefix):]
+        return None
+
+    def _dir(self, path: Union[str, Path]) -> Optional[ManifestDir]:
+        rel_path = self._relative(path)
+        return None if rel_path is None else self._dirs.get(rel_path)
+
+    def exists(self, path: Union[str, Path]) -> bool:
+        return self._dir(path) is not None or self.is_file(path)
+
+    def is_dir(self, path: Union[str, Path]) -> bool:
+        return self._dir(path) is not None
+
+    def is_file(self, path: Union[str, Path]) -> bool:
+        path = Path(path)
+        cur_dir = self._dir(path.parent)
+        return cur_dir is not None and path.name in cur_dir.files
+
+    def files(self, path: Union[str, Path], suffix: Optional[str] = None) -> List[Path]:
+        cur_dir = self._dir(path)
+        if cur_dir is None:
+            return []
+        path = Path(path)
+        return [path.joinpath(name) for name in cur_dir.files if suffix is None or name.endswith(suffix)]
+
+    def dirs(self, path: Union[str, Path]) -> List[Path]:
+        cur_dir = self._dir(path)
+        if cur_dir is None:
+            return []
+        path = Path(path)
+        return [path.joinpath(name) for name in cur_dir.dirs]
+
+    def __len__(self):
+        return len(self._dirs)
@@ -1,5 +1,7 @@
 from pathlib import Path
 from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Union
 
 from mdclasses.configuration_enums import Format, ObjectType
 
@@ -21,37 +23,171 @@ class ABCPathResolver(ABC):
     def form_path(self, obj_type: ObjectType, obj_name: str = '', form_name: str = '') -> Path:
         pass
 
+    @abstractmethod
+    def template_path(self, obj_type: ObjectType, obj_name: str = '', template_name: str = '') -> Path:
+        pass
+
+    @abstractmethod
+    def template_description_path(self, template_dir: Path) -> Optional[Path]:
+        pass
+
+    @abstractmethod
+    def template_data_dir(self, template_dir: Path) -> Path:
+        pass
+
     @abstractmethod
     def type_path(self, obj_type: ObjectType) -> Path:
         pass
 
+    @abstractmethod
+    def obj_dir(self, obj_type: ObjectType, name: str = '') -> Path:
+        pass
+
+    @abstractmethod
+    def form_description_path(self, form_dir: Path) -> Path:
+        pass
+
+    @abstractmethod
+    def form_structure_path(self, form_dir: Path) -> Path:
+        pass
+
+    @abstractmethod
+    def form_module_dir(self, form_dir: Path) -> Path:
+        pass
+
+    def source_root(self, config_dir: Union[str, Path]) -> Path:
+        return Path(config_dir)
+
+
+_resolvers: Dict[Format, ABCPathResolver] = dict()
+
 
 def get_path_resolver(file_format: Format) -> ABCPathResolver:
+    # Резолверы не хранят состояния, кроме кэша путей, поэтому на каждый формат создается один экземпляр
+    resolver = _resolvers.get(file_format)
+    if resolver is not None:
+        return resolver
+
     if file_format == Format.EDT:
-        return EDTPathResolver(file_format)
+        resolver = EDTPathResolver(file_format)
     elif file_format == Format.CONFIGURATOR:
-        return XMLPathResolver(file_format)
+        resolver = XMLPathResolver(file_format)
     else:
         raise NotImplementedError(f'Не определена обработка формата {file_format}')
 
+    _resolvers[file_format] = resolver
+    return resolver
+
+
+class PathCache:
+    """
+    Кэш вычисленных путей объекта.
+
+    Кэш действителен, пока не изменились элементы ключа (родитель, корень, имя, тип объекта).
+    Элементы сравниваются по идентичности, поэтому проверка ключа не требует сравнения путей.
+    """
+
+    __slots__ = ('_key', '_paths')
+
+    def __init__(self):
+        self._key: Optional[tuple] = None
+        self._paths: Dict[str, Path] = dict()
+
+    def get(self, key: tuple, name: str, factory: Callable[[], Path]) -> Path:
+        cur_key = self._key
+        if cur_key is None or len(cur_key) != len(key) or any(a is not b for a, b in zip(cur_key, key)):
+            self._key = key
+            self._paths = dict()
+
+        path = self._paths.get(name)
+        if path is None:
+            path = factory()
+            self._paths[name] = path
+        return path
+
+    def clear(self):
+        self._key = None
+        self._paths = dict()
+
 
 class EDTPathResolver(ABCPathResolver):
+    """
+    Пути проекта EDT. Корнем конфигурации считается каталог src проекта:
+
+        src/Configuration/Configuration.mdo
+        src/Catalogs/Справочник1/Справочник1.mdo
+        src/Catalogs/Справочник1/ObjectModule.bsl
+        src/Catalogs/Справочник1/Forms/ФормаЭлемента/Form.form
+        src/Catalogs/Справочник1/Forms/ФормаЭлемента/Module.bsl
+    """
+
+    def source_root(self, config_dir: Union[str, Path]) -> Path:
+        config_dir = Path(config_dir)
+        src_dir = config_dir.joinpath('src')
+        if src_dir.joinpath('Configuration').is_dir():
+            return src_dir
+        return config_dir
 
+    @lru_cache(maxsize=None)
     def conf_file_path(self, obj_type: ObjectType, name: str = '') -> Path:
-        raise NotImplementedError(f'Не определена обработка формата {self.file_format}')
+        if obj_type == ObjectType.CONFIGURATION:
+            return Path('Configuration', 'Configuration.mdo')
+        return self.obj_dir(obj_type, name).joinpath(f'{name}.mdo')
 
+    @lru_cache(maxsize=None)
     def ext_path(self, obj_type: ObjectType, name: str = '') -> Path:
-        raise NotImplementedError(f'Не определена обработка формата {self.file_format}')
+        # Модули объекта лежат в каталоге объекта рядом с его описанием
+        return self.obj_dir(obj_type, name)
 
+    @lru_cache(maxsize=None)
     def form_path(self, obj_type: ObjectType, obj_name: str = '', form_name: str = '') -> Path:
-        raise NotImplementedError(f'Не определена обработка формата {self.file_format}')
+        if obj_type in _types_without_forms:
+            raise ValueError(f'У объекта типа {obj_type} нет форм!')
+        elif obj_type == ObjectType.CONSTANT:
+            return Path('CommonForms', 'ФормаКонстант')
+        elif obj_type == ObjectType.COMMON_FORM:
+            return Path('CommonForms', obj_name)
+        return self.obj_dir(obj_type, obj_name).joinpath('Forms', form_name)
 
+    @lru_cache(maxsize=None)
+    def template_path(self, obj_type: ObjectType, obj_name: str = '', template_name: str = '') -> Path:
+        if obj_type == ObjectType.COMMON_TEMPLATE:
+            return self.obj_dir(obj_type, obj_name)
+        return self.obj_dir(obj_type, obj_name).joinpath('Templates', template_name)
+
+    def template_description_path(self, template_dir: Path) -> Optional[Path]:
+        # Макеты объектов описаны в описании объекта (.mdo), отдельного файла описания нет
+        return None
+
+    def template_data_dir(self, template_dir: Path) -> Path:
+        return template_dir
+
+    @lru_cache(maxsize=None)
     def type_path(self, obj_type: ObjectType) -> Path:
-        raise NotImplementedError(f'Не определена обработка формата {self.file_format}')
+        if obj_type == ObjectType.CONFIGURATION:
+            return Path('Configuration')
+        return _type_dirs.get(obj_type, Path(f'{obj_type.value}s'))
+
+    @lru_cache(maxsize=None)
+    def obj_dir(self, obj_type: ObjectType, name: str = '') -> Path:
+        if obj_type == ObjectType.CONFIGURATION:
+            return Path('Configuration')
+        return self.type_path(obj_type).joinpath(name)
+
+    def form_description_path(self, form_dir: Path) -> Path:
+        # Описание и структура формы EDT хранятся в одном файле
+        return self.form_structure_path(form_dir)
+
+    def form_structure_path(self, form_dir: Path) -> Path:
+        return form_dir.joinpath('Form.form')
+
+    def form_module_dir(self, form_dir: Path) -> Path:
+        return form_dir
 
 
 class XMLPathResolver(ABCPathResolver):
 
+    @lru_cache(maxsize=None)
     def conf_file_path(self, obj_type: ObjectType, name: str = '') -> Path:
         if obj_type == ObjectType.CONFIGURATION:
             result = f'{obj_type.value}.xml'
@@ -60,6 +196,7 @@ class XMLPathResolver(ABCPathResolver):
 
         return Path(result)
 
+    @lru_cache(maxsize=None)
     def ext_path(self, obj_type: ObjectType, name: str = '') -> Path:
         if obj_type == ObjectType.CONFIGURATION:
             result = Path('')
@@ -68,16 +205,9 @@ class XMLPathResolver(ABCPathResolver):
 
         return Path(f'{result}/Ext')
 
+    @lru_cache(maxsize=None)
     def form_path(self, obj_type: ObjectType, obj_name: str = '', form_name: str = '') -> Path:
-        types_without_forms = [
-            ObjectType.CONFIGURATION,
-            ObjectType.COMMAND_GROUP,
-            ObjectType.COMMON_MODULE,
-            ObjectType.COMMON_ATTRIBUTE,
-            ObjectType.COMMON_PICTURE,
-            ObjectType.COMMON_TEMPLATE
-        ]
-        if obj_type in types_without_forms:
+        if obj_type in _types_without_forms:
             raise ValueError(f'У объекта типа {obj_type} нет форм!')
         elif obj_type == ObjectType.CONSTANT:
             result = f'CommonForms/ФормаКонстант/'
@@ -88,20 +218,54 @@ class XMLPathResolver(ABCPathResolver):
 
         return Path(f'{result}')
 
-    def type_path(self, obj_type: ObjectType) -> Path:
-        if obj_type == ObjectType.CONFIGURATION:
-            result = Path('')
-        elif obj_type == ObjectType.FILTER_CRITERION:
-            result = Path(f'FilterCriteria')
-        elif obj_type == ObjectType.CHART_OF_CHARACTERISTIC_TYPES:
-            result = Path(f'ChartsOfCharacteristicTypes')
-        elif obj_type == ObjectType.CHART_OF_ACCOUNTS:
-            result = Path(f'ChartsOfAccounts')
-        elif obj_type == ObjectType.BUSINESS_PROCESS:
-            result = Path(f'BusinessProcesses')
-        elif obj_type == ObjectType.CHART_OF_CALCULATION_TYPES:
-            result = Path(f'ChartsOfCalculationTypes')
+    @lru_cache(maxsize=None)
+    def template_path(self, obj_type: ObjectType, obj_name: str = '', template_name: str = '') -> Path:
+        if obj_type == ObjectType.COMMON_TEMPLATE:
+            result = f'{self.type_path(obj_type)}/{obj_name}'
         else:
-            result = Path(f'{obj_type.value}s')
+            result = f'{self.type_path(obj_type)}/{obj_name}/Templates/{template_name}'
 
         return Path(result)
+
+    def template_description_path(self, template_dir: Path) -> Optional[Path]:
+        return template_dir.parent.joinpath(f'{template_dir.name}.xml')
+
+    def template_data_dir(self, template_dir: Path) -> Path:
+        return template_dir.joinpath('Ext')
+
+    @lru_cache(maxsize=None)
+    def type_path(self, obj_type: ObjectType) -> Path:
+        if obj_type == ObjectType.CONFIGURATION:
+            return Path('')
+        return _type_dirs.get(obj_type, Path(f'{obj_type.value}s'))
+
+    @lru_cache(maxsize=None)
+    def obj_dir(self, obj_type: ObjectType, name: str = '') -> Path:
+        return self.ext_path(obj_type, name).parent
+
+    def form_description_path(self, form_dir: Path) -> Path:
+        return form_dir.parent.joinpath(f'{form_dir.name}.xml')
+
+    def form_structure_path(self, form_dir: Path) -> Path:
+        return form_dir.joinpath('Ext', 'Form.xml')
+
+    def form_module_dir(self, form_dir: Path) -> Path:
+        return form_dir.joinpath('Ext', 'Form')
+
+
+_types_without_forms = (
+    ObjectType.CONFIGURATION,
+    ObjectType.COMMAND_GROUP,
+    ObjectType.COMMON_MODULE,
+    ObjectType.COMMON_ATTRIBUTE,
+    ObjectType.COMMON_PICTURE,
+    ObjectType.COMMON_TEMPLATE
+)
+
+_type_dirs = {
+    ObjectType.FILTER_CRITERION: Path('FilterCriteria'),
+    ObjectType.CHART_OF_CHARACTERISTIC_TYPES: Path('ChartsOfCharacteristicTypes'),
+    ObjectType.CHART_OF_ACCOUNTS: Path('ChartsOfAccounts'),
+    ObjectType.BUSINESS_PROCESS: Path('BusinessProcesses'),
+    ObjectType.CHART_OF_CALCULATION_TYPES: Path('ChartsOfCalculationTypes'),
+}